@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import YouTubeVideo, Subtitle, Settings
+from .models import YouTubeVideo, Subtitle, Settings, Job, TranslationMemory, MediaBlob
 
 
 @admin.register(YouTubeVideo)
@@ -17,7 +17,7 @@ class SubtitleAdmin(admin.ModelAdmin):
 
 @admin.register(Settings)
 class SettingsAdmin(admin.ModelAdmin):
-    list_display = ('max_video_height', 'use_he_aac_v2')
+    list_display = ('max_video_height', 'use_he_aac_v2', 'copy_audio_stream')
 
     def has_add_permission(self, request):
         # Prevent creating multiple Settings instances
@@ -26,3 +26,24 @@ class SettingsAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Prevent deleting the Settings instance
         return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'created', 'finished')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('started', 'finished')
+
+
+@admin.register(TranslationMemory)
+class TranslationMemoryAdmin(admin.ModelAdmin):
+    list_display = ('source_text', 'target_language', 'model', 'hits', 'last_used')
+    list_filter = ('target_language', 'model')
+    search_fields = ('source_text', 'translation')
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created')
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('sha256', 'name', 'size', 'refcount')
@@ -6,6 +6,7 @@ import orjson
 from .subtitle import api as subtitle_router
 from .video import api as video_router
 from .setting import api as setting_router
+from .job import api as job_router
 
 
 class ORJSONParser(Parser):
@@ -24,3 +25,4 @@ api = NinjaAPI(parser=ORJSONParser(), renderer=ORJSONRenderer())
 api.add_router('/videos', video_router, tags=['Video'])
 api.add_router('/subtitles', subtitle_router, tags=['Subtitle'])
 api.add_router('/settings', setting_router, tags=['Setting'])
+api.add_router('/jobs', job_router, tags=['Job'])
@@ -0,0 +1,51 @@
+from django.shortcuts import get_object_or_404
+from ninja import Router
+from ninja.errors import HttpError
+
+from apps.models import Job, YouTubeVideo, Subtitle
+from apps.services.job_service import JobService
+from .schemas import (
+    JobSchema,
+    VideoDownloadRequest,
+    TranscribeJobRequest,
+    TranslationJobRequest,
+    BurnJobRequest,
+    IngestJobRequest,
+)
+
+api = Router()
+
+
+@api.post('/download', response=JobSchema)
+def enqueue_download(request, payload: VideoDownloadRequest):
+    return JobService().enqueue(Job.Kind.DOWNLOAD, payload.dict())
+
+
+@api.post('/transcribe', response=JobSchema)
+def enqueue_transcribe(request, payload: TranscribeJobRequest):
+    get_object_or_404(YouTubeVideo, video_id=payload.video_id)
+    return JobService().enqueue(Job.Kind.TRANSCRIBE, payload.dict())
+
+
+@api.post('/translate', response=JobSchema)
+def enqueue_translate(request, payload: TranslationJobRequest):
+    get_object_or_404(Subtitle, pk=payload.subtitle_id)
+    return JobService().enqueue(Job.Kind.TRANSLATE, payload.dict())
+
+
+@api.post('/burn', response=JobSchema)
+def enqueue_burn(request, payload: BurnJobRequest):
+    get_object_or_404(Subtitle, pk=payload.subtitle_id)
+    return JobService().enqueue(Job.Kind.BURN, payload.dict())
+
+
+@api.post('/ingest', response=JobSchema)
+def enqueue_ingest(request, payload: IngestJobRequest):
+    if not payload.urls and not payload.video_ids:
+        raise HttpError(400, 'Provide at least one URL or video id')
+    return JobService().enqueue(Job.Kind.INGEST, payload.dict())
+
+
+@api.get('/{job_id}', response=JobSchema)
+def get_job(request, job_id: int):
+    return get_object_or_404(Job, pk=job_id)
@@ -1,7 +1,12 @@
 from ninja import Schema, ModelSchema, Field
-from typing import Optional
+from pydantic import model_validator
+from typing import List, Literal, Optional
 
-from apps.models import Subtitle, Settings
+from apps.constants import BURN_MAX_SEGMENTS, INGEST_CONCURRENCY, INGEST_MAX_CONCURRENCY
+from apps.models import Subtitle, Settings, Job
+from apps.services.subtitle_service import subtitle_version
+
+X264Preset = Literal['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow']
 
 
 class SubtitleListSchema(ModelSchema):
@@ -20,12 +25,46 @@ class SubtitleSchema(ModelSchema):
 
     video_id: str = Field(..., alias='video.video_id')
     video_title: str = Field(..., alias='video.title')
+    version: str
+
+    @staticmethod
+    def resolve_version(obj):
+        return subtitle_version(obj)
+
+
+class SubtitleMetaSchema(ModelSchema):
+    class Meta:
+        model = Subtitle
+        fields = ['id', 'language', 'is_transcribed', 'created', 'updated']
+
+    video_id: str = Field(..., alias='video.video_id')
+    video_title: str = Field(..., alias='video.title')
+    version: str
+
+    @staticmethod
+    def resolve_version(obj):
+        return subtitle_version(obj)
+
+
+class VideoSchema(Schema):
+    video_id: Optional[str] = None
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    duration: Optional[float] = None
+    video_url: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+class VideoPageSchema(Schema):
+    items: List[VideoSchema]
+    next_cursor: Optional[int] = None
 
 
 class SettingsSchema(ModelSchema):
     class Meta:
         model = Settings
-        exclude = ['id']
+        exclude = ['id', 'updated']
 
 
 class VideoDownloadRequest(Schema):
@@ -36,6 +75,25 @@ class SubtitleUpdateSchema(Schema):
     content: str
 
 
+class CueOperation(Schema):
+    op: Literal['insert', 'update', 'delete']
+    index: int = Field(..., ge=0)
+    start: Optional[int] = Field(None, ge=0)
+    end: Optional[int] = Field(None, ge=0)
+    text: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_insert(self):
+        if self.op == 'insert' and None in (self.start, self.end, self.text):
+            raise ValueError('insert requires start, end and text')
+        return self
+
+
+class SubtitlePatchSchema(Schema):
+    version: str
+    operations: List[CueOperation]
+
+
 class TranslationRequest(Schema):
     target_language: str
     temperature: Optional[float] = None
@@ -44,3 +102,34 @@ class TranslationRequest(Schema):
 class BurnRequest(Schema):
     start_seconds: Optional[float] = None
     end_seconds: Optional[float] = None
+    preset: Optional[X264Preset] = None
+    crf: Optional[int] = Field(None, ge=0, le=51)
+    threads: Optional[int] = Field(None, ge=1, le=128)
+    segments: int = Field(1, ge=1, le=BURN_MAX_SEGMENTS)
+    preview: bool = False
+    at_seconds: Optional[float] = Field(None, ge=0)
+
+
+class JobSchema(ModelSchema):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'progress', 'attempts', 'result', 'error', 'created', 'started', 'finished']
+
+
+class TranscribeJobRequest(Schema):
+    video_id: str
+    chunked: bool = False
+
+
+class TranslationJobRequest(TranslationRequest):
+    subtitle_id: int
+
+
+class BurnJobRequest(BurnRequest):
+    subtitle_id: int
+
+
+class IngestJobRequest(Schema):
+    urls: List[str] = []
+    video_ids: List[str] = []
+    concurrency: int = Field(INGEST_CONCURRENCY, ge=1, le=INGEST_MAX_CONCURRENCY)
@@ -8,7 +8,7 @@ api = Router()
 
 @api.get('', response=SettingsSchema)
 def get_settings(request):
-    settings = Settings.objects.first()
+    settings = Settings.load()
     if not settings:
         settings = Settings.objects.create()
     return settings
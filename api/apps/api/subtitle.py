@@ -1,60 +1,113 @@
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
 from ninja import Router
+from ninja.errors import HttpError
 from ninja.pagination import paginate, PageNumberPagination
 from typing import List
 
+from apps.exceptions import SubtitleConflictError, SubtitleError
 from apps.models import Subtitle
-from apps.services.subtitle_service import SubtitleService
-from apps.utils import srt_to_webvtt
+from apps.responses import conditional_response, media_response
+from apps.services.subtitle_service import (
+    SubtitleService,
+    invalidate_burned_videos,
+    patch_subtitle,
+    render_webvtt,
+    subtitle_version,
+)
+from apps.services.translation_memory import translation_memory_stats
 from .schemas import (
     SubtitleListSchema,
+    SubtitleMetaSchema,
     SubtitleSchema,
     SubtitleUpdateSchema,
+    SubtitlePatchSchema,
     TranslationRequest,
     BurnRequest
 )
 
 api = Router()
 
+# Columns each schema reads; everything else (notably `content`) stays unloaded
+LIST_COLUMNS = ('id', 'language', 'is_transcribed', 'video__id', 'video__video_id', 'video__thumbnail')
+META_COLUMNS = ('id', 'language', 'is_transcribed', 'created', 'updated', 'video__id', 'video__video_id', 'video__title')
+
 
 @api.get('', response=List[SubtitleListSchema])
 @paginate(PageNumberPagination)
 def list_subtitles(request):
-    return Subtitle.objects.select_related('video').order_by('-id')
+    return Subtitle.objects.select_related('video').only(*LIST_COLUMNS).order_by('-id')
+
+
+@api.get('/translation-memory')
+def get_translation_memory_stats(request):
+    return translation_memory_stats()
 
 
 @api.get('/{subtitle_id}.vtt')
 def get_subtitle_as_webvtt(request, subtitle_id: int):
-    subtitle = get_object_or_404(Subtitle, pk=subtitle_id)
-    content = srt_to_webvtt(subtitle.content)
-    return HttpResponse(content, content_type='text/vtt')
+    # Only the validators are loaded until the body is actually needed
+    subtitle = get_object_or_404(Subtitle.objects.only('id', 'updated'), pk=subtitle_id)
+    etag = subtitle_version(subtitle)
+
+    response = conditional_response(request, etag=etag, last_modified=subtitle.updated)
+    if response is None:
+        content = render_webvtt(subtitle.pk, etag)
+        response = media_response(request, content, 'text/vtt', etag=etag, last_modified=subtitle.updated)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@api.get('/{subtitle_id}/meta', response=SubtitleMetaSchema)
+def get_subtitle_meta(request, subtitle_id: int):
+    return get_object_or_404(Subtitle.objects.select_related('video').only(*META_COLUMNS), pk=subtitle_id)
 
 
 @api.get('/{subtitle_id}', response=SubtitleSchema)
 def get_subtitle(request, subtitle_id: int):
-    subtitle = get_object_or_404(Subtitle, pk=subtitle_id)
+    subtitle = get_object_or_404(
+        Subtitle.objects.select_related('video').only(*META_COLUMNS, 'content'), pk=subtitle_id
+    )
     return subtitle
 
 
 @api.put('/{subtitle_id}')
 def update_subtitle(request, subtitle_id: int, payload: SubtitleUpdateSchema):
     subtitle = get_object_or_404(Subtitle, pk=subtitle_id)
+    if subtitle.content != payload.content:
+        invalidate_burned_videos(subtitle.pk)
     subtitle.content = payload.content
     subtitle.save()
     return {"success": True}
 
 
+@api.patch('/{subtitle_id}')
+def patch_subtitle_cues(request, subtitle_id: int, payload: SubtitlePatchSchema):
+    """Apply cue-level edits instead of replacing the whole content."""
+    try:
+        subtitle = patch_subtitle(subtitle_id, payload.version, [op.dict() for op in payload.operations])
+    except SubtitleConflictError as e:
+        raise HttpError(409, str(e))
+    except SubtitleError as e:
+        raise HttpError(400, str(e))
+    return {"success": True, "version": subtitle_version(subtitle)}
+
+
 @api.post('/{subtitle_id}/translate')
-def translate_subtitle(request, subtitle_id: int, payload: TranslationRequest):
-    subtitle_service = SubtitleService()
-    return subtitle_service.translate_subtitle(subtitle_id, payload.target_language, payload.temperature)
+async def translate_subtitle(request, subtitle_id: int, payload: TranslationRequest):
+    subtitle_service = await sync_to_async(SubtitleService)()
+    return await subtitle_service.atranslate_subtitle(subtitle_id, payload.target_language, payload.temperature)
 
 
 @api.post('/{subtitle_id}/burn')
 def burn_subtitle(request, subtitle_id: int, payload: BurnRequest):
     subtitle_service = SubtitleService()
-    return subtitle_service.burn_subtitle(subtitle_id, payload.start_seconds, payload.end_seconds)
+    if payload.preview:
+        return subtitle_service.burn_preview(
+            subtitle_id, payload.at_seconds, payload.start_seconds, payload.end_seconds)
+    return subtitle_service.burn_subtitle(
+        subtitle_id, payload.start_seconds, payload.end_seconds,
+        preset=payload.preset, crf=payload.crf, threads=payload.threads, segments=payload.segments)
 
 @api.delete('/{subtitle_id}')
 def delete_subtitle(request, subtitle_id: int):
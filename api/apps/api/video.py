@@ -1,15 +1,14 @@
-import os
-from typing import Dict, Any
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-from django.core.exceptions import ValidationError
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
 from ninja import Router
+from ninja.errors import HttpError
 
-import openai
-
-from apps.models import YouTubeVideo, Subtitle, Settings
+from apps.models import YouTubeVideo
+from apps.services.subtitle_service import SubtitleService
 from apps.services.video_service import VideoService
-from .schemas import VideoDownloadRequest
+from .schemas import VideoDownloadRequest, VideoSchema, VideoPageSchema
 
 api = Router()
 
@@ -20,73 +19,88 @@ def download_video(request, payload: VideoDownloadRequest):
     return video_service.download_video(payload.url)
 
 
-def serialize_video(video: YouTubeVideo, include_urls: bool = False) -> Dict[str, Any]:
-    """Convert a video instance to a dictionary with common fields."""
-    data = {
-        'video_id': video.video_id,
-        'title': video.title,
-        'thumbnail_url': video.signed_thumbnail_url(),
-        'duration': video.duration.total_seconds(),
+# Response field -> model columns it needs
+VIDEO_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'video_id': ('video_id',),
+    'title': ('title',),
+    'thumbnail_url': ('thumbnail',),
+    'duration': ('duration',),
+    'video_url': ('original_video',),
+    'width': ('width',),
+    'height': ('height',),
+}
+SUMMARY_FIELDS = ('video_id', 'title', 'thumbnail_url', 'duration')
+DETAIL_FIELDS = tuple(VIDEO_FIELDS)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def serialize_video(video: YouTubeVideo, fields: Iterable[str] = DETAIL_FIELDS) -> Dict[str, Any]:
+    """Convert a video instance to a dictionary with the requested fields."""
+    getters = {
+        'video_id': lambda: video.video_id,
+        'title': lambda: video.title,
+        'thumbnail_url': video.signed_thumbnail_url,
+        'duration': lambda: video.duration.total_seconds(),
+        'video_url': video.signed_video_url,
+        'width': lambda: video.width,
+        'height': lambda: video.height,
+    }
+    return {field: getters[field]() for field in fields}
+
+
+def parse_fields(fields: Optional[str], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    if not fields:
+        return default
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in requested if field not in VIDEO_FIELDS]
+    if unknown:
+        raise HttpError(400, f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def list_video_page(fields: Tuple[str, ...], cursor: Optional[int], limit: int) -> Dict[str, Any]:
+    """
+    Keyset pagination on id (newest first): `cursor` is the id of the last video of the
+    previous page, so every page is an index range scan regardless of its depth.
+    Only the columns the requested fields need are loaded.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    columns = {'id'}.union(*(VIDEO_FIELDS[field] for field in fields))
+    videos = YouTubeVideo.objects.only(*columns).order_by('-id')
+    if cursor is not None:
+        videos = videos.filter(id__lt=cursor)
+
+    page = list(videos[:limit + 1])
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    return {
+        'items': [serialize_video(video, fields) for video in page[:limit]],
+        'next_cursor': next_cursor,
     }
-    
-    # Add optional fields for full video details
-    if include_urls:
-        data.update({
-            'video_url': video.signed_video_url(),
-            'width': video.width,
-            'height': video.height,
-        })
-    
-    return data
 
 
-@api.get('')
-def list_videos(request):
-    videos = YouTubeVideo.objects.all().order_by('-id')
-    return [serialize_video(video, include_urls=True) for video in videos]
+@api.get('', response=VideoPageSchema, exclude_unset=True)
+def list_videos(request, fields: Optional[str] = None, cursor: Optional[int] = None,
+                limit: int = DEFAULT_PAGE_SIZE):
+    return list_video_page(parse_fields(fields, DETAIL_FIELDS), cursor, limit)
 
 
-@api.get('/recent')
-def list_recent_videos(request):
-    videos = YouTubeVideo.objects.all().order_by('-id')
-    return [serialize_video(video) for video in videos]
+@api.get('/recent', response=VideoPageSchema, exclude_unset=True)
+def list_recent_videos(request, fields: Optional[str] = None, cursor: Optional[int] = None,
+                       limit: int = DEFAULT_PAGE_SIZE):
+    return list_video_page(parse_fields(fields, SUMMARY_FIELDS), cursor, limit)
 
 
-@api.get('/{video_id}')
+@api.get('/{video_id}', response=VideoSchema, exclude_unset=True)
 def get_video(request, video_id: str):
     video = get_object_or_404(YouTubeVideo, video_id=video_id)
-    return serialize_video(video, include_urls=True)
+    return serialize_video(video)
 
 
 @api.post('/{video_id}/transcribe')
-def transcribe_video(request, video_id: str):
-    settings = Settings.objects.first()
-    if not settings:
-        raise ValidationError('Settings not found')
-    if not settings.openai_api_key:
-        raise ValidationError('OpenAI API Key not set')
-
-    video = get_object_or_404(YouTubeVideo, video_id=video_id)
-    client = openai.OpenAI(api_key=settings.openai_api_key)
-
-    audio_path = f'{video_id}.m4a'
-    with open(audio_path, 'wb') as audio_file:
-        audio_file.write(video.audio.read())
-
-    with open(audio_path, 'rb') as audio_file:
-        srt_content = client.audio.transcriptions.create(
-            model='whisper-1',
-            file=audio_file,
-            response_format='srt')
-    os.remove(audio_path)
-
-    Subtitle.objects.create(
-        video=video,
-        language='English',  # FIXME: should be detected
-        is_transcribed=True,
-        content=srt_content)
-
-    return {'success': True}
+async def transcribe_video(request, video_id: str, chunked: bool = False):
+    subtitle_service = await sync_to_async(SubtitleService)()
+    return await subtitle_service.atranscribe_video(video_id, chunked=chunked)
 
 
 @api.delete('/{video_id}')
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+import anthropic
+import openai
+
+
+# API clients hold connection pools, so they are created once per key and reused.
+# A changed key in Settings simply maps to a new client.
+
+@lru_cache(maxsize=4)
+def openai_client(api_key: str) -> openai.OpenAI:
+    return openai.OpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=4)
+def anthropic_client(api_key: str) -> anthropic.Client:
+    return anthropic.Client(api_key=api_key)
+
+
+# The async clients serve every in-flight request of an ASGI process from one
+# connection pool, so a slow model call holds a socket instead of a worker thread.
+# Their connections belong to the event loop that opened them, and under WSGI every
+# async view runs on a loop of its own, so they are cached per running loop.
+
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Callable, str], Any]]' = \
+    weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def _loop_client(factory: Callable[..., Any], api_key: str):
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if (factory, api_key) not in clients:
+            clients[(factory, api_key)] = factory(api_key=api_key)
+        return clients[(factory, api_key)]
+
+
+def async_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    return _loop_client(openai.AsyncOpenAI, api_key)
+
+
+def async_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    return _loop_client(anthropic.AsyncAnthropic, api_key)
+
+
+def clear_clients():
+    openai_client.cache_clear()
+    anthropic_client.cache_clear()
+    with _async_clients_lock:
+        _async_clients.clear()
@@ -20,6 +20,53 @@ AUDIO_CODECS: Dict[str, Dict[str, str]] = {
     }
 }
 
-# File processing constants
-TRANSCRIPTION_CHUNK_SIZE: int = 1024 * 8
-MAX_ITERATIONS: int = 100
+# Downloaded audio codecs that can be stored as-is, and the container they are stored in
+COPYABLE_AUDIO_CODECS: Dict[str, str] = {
+    'mp4a': '.m4a',
+    'aac': '.m4a',
+    'opus': '.ogg',
+}
+
+# Scratch workspaces older than this are left over from killed processes
+SCRATCH_STALE_SECONDS: int = 24 * 60 * 60
+
+# Bulk ingestion: default and maximum number of concurrent downloads
+INGEST_CONCURRENCY: int = 3
+INGEST_MAX_CONCURRENCY: int = 8
+
+BURN_STYLE: str = 'FontName=BM Dohyeon,FontSize=22'
+BURN_URL_EXPIRE: int = 5 * 60
+BURN_MAX_SEGMENTS: int = 32
+
+# Preview burns: a short, downscaled window encoded as fast as possible
+BURN_PREVIEW_SECONDS: float = 10.0
+BURN_PREVIEW_HEIGHT: int = 360
+BURN_PREVIEW_PRESET: str = 'ultrafast'
+BURN_PREVIEW_CRF: int = 28
+
+WEBVTT_CACHE_TIMEOUT: int = 60 * 60
+
+# Seconds a process reuses its cached Settings before comparing the stamp in the database
+SETTINGS_RECHECK_SECONDS: float = 2.0
+
+# Lifetime of signed URLs handed to ffmpeg, long enough for the slowest burns
+MEDIA_SOURCE_URL_EXPIRE: int = 6 * 60 * 60
+
+# Chunked transcription constants
+TRANSCRIPTION_SEGMENT_SECONDS: int = 600
+TRANSCRIPTION_SILENCE_SEARCH_SECONDS: int = 60
+TRANSCRIPTION_MAX_WORKERS: int = 4
+SILENCE_NOISE_DB: int = -30
+SILENCE_MIN_DURATION: float = 0.5
+
+# Windowed translation constants
+TRANSLATION_MODEL: str = 'claude-3-5-sonnet-20241022'
+TRANSLATION_WINDOW_SIZE: int = 20
+TRANSLATION_CONTEXT_SIZE: int = 2
+TRANSLATION_MAX_WORKERS: int = 4
+# Retries of a single line whose reply stays malformed once its window was split down to it
+TRANSLATION_LINE_RETRIES: int = 1
+TRANSLATION_MEMORY_MAX_ENTRIES: int = 100_000
+# The translation memory is trimmed at most this often per process, this many rows per delete
+TRANSLATION_MEMORY_EVICT_INTERVAL: int = 5 * 60
+TRANSLATION_MEMORY_EVICT_BATCH: int = 1000
@@ -0,0 +1,170 @@
+import re
+from array import array
+from itertools import accumulate
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+# A timing line followed by the cue text: every non-blank line up to the next blank line
+CUE_PATTERN = re.compile(
+    r'^[ \t]*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})[ \t]*-->[ \t]*'
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})[^\n]*\n?((?:[ \t]*\S[^\n]*\n?)*)',
+    re.MULTILINE)
+
+# SRT as written by Whisper and `CueList.to_srt`: numbered blocks with fixed-width timing lines,
+# non-blank text lines and exactly one blank line between blocks
+CANONICAL_SRT_PATTERN = re.compile(
+    r'(?:\d+\n\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\n(?:[ \t]*\S[^\n]*\n)*(?:\n|\Z))*')
+
+
+class Cue(NamedTuple):
+    start: int  # milliseconds
+    end: int  # milliseconds
+    text: str
+
+
+def format_timestamp(millis: int, separator: str = ',') -> str:
+    seconds, millis = divmod(max(0, millis), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%02d:%02d:%02d%s%03d' % (hours, minutes, seconds, separator, millis)
+
+
+def canonical_srt_to_vtt(content: str) -> Optional[str]:
+    """
+    WebVTT conversion of canonical SRT (see CANONICAL_SRT_PATTERN) with string
+    slicing only, without parsing any timestamp; None for any other content,
+    which `CueList.parse` handles. The output equals `CueList.parse(content).to_vtt()`.
+    """
+    content = content.lstrip('\ufeff')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    content = content.strip('\n') + '\n'
+    if content == '\n' or not CANONICAL_SRT_PATTERN.fullmatch(content):
+        return None
+
+    # Drop the cue number and replace the two commas of the fixed-width timing line
+    return 'WEBVTT\n\n' + '\n\n'.join([
+        f'{block[start:start + 8]}.{block[start + 9:start + 25]}.{block[start + 26:]}'
+        for block in content.split('\n\n') for start in (block.index('\n') + 1,)])
+
+
+class CueList:
+    """
+    Compact, array-backed list of subtitle cues. Start and end times are kept in
+    integer arrays (milliseconds) and all cue texts share one string buffer
+    addressed by offsets, instead of one Python object per cue and field.
+    """
+
+    __slots__ = ('starts', 'ends', 'offsets', 'buffer')
+
+    def __init__(self, starts: array, ends: array, offsets: array, buffer: str):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.buffer = buffer
+
+    @classmethod
+    def parse(cls, content: str) -> 'CueList':
+        """
+        Parse SRT (or WebVTT) content with a single scan over the text. Handles
+        a leading BOM and CRLF/CR line endings; blocks without a valid timing
+        line are skipped.
+        """
+        content = content.lstrip('\ufeff')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        starts, ends, offsets = array('q'), array('q'), array('q', [0])
+        texts = []
+        position = 0
+        for h1, m1, s1, ms1, h2, m2, s2, ms2, text in CUE_PATTERN.findall(content):
+            starts.append(((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1.ljust(3, '0')))
+            ends.append(((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2.ljust(3, '0')))
+            text = text.rstrip('\n')
+            texts.append(text)
+            position += len(text)
+            offsets.append(position)
+
+        return cls(starts, ends, offsets, ''.join(texts))
+
+    @classmethod
+    def from_cues(cls, cues: Iterable[Cue]) -> 'CueList':
+        starts, ends, offsets = array('q'), array('q'), array('q', [0])
+        texts = []
+        position = 0
+        for cue in cues:
+            starts.append(cue.start)
+            ends.append(cue.end)
+            texts.append(cue.text)
+            position += len(cue.text)
+            offsets.append(position)
+        return cls(starts, ends, offsets, ''.join(texts))
+
+    @classmethod
+    def join(cls, cue_lists: Iterable['CueList']) -> 'CueList':
+        starts, ends, offsets = array('q'), array('q'), array('q', [0])
+        buffers = []
+        position = 0
+        for cues in cue_lists:
+            starts.extend(cues.starts)
+            ends.extend(cues.ends)
+            offsets.extend(position + offset for offset in cues.offsets[1:])
+            position += len(cues.buffer)
+            buffers.append(cues.buffer)
+        return cls(starts, ends, offsets, ''.join(buffers))
+
+    def with_texts(self, texts: List[str]) -> 'CueList':
+        """The same timings with new texts, e.g. translations."""
+        if len(texts) != len(self):
+            raise ValueError(f'Expected {len(self)} texts, got {len(texts)}')
+        return CueList(self.starts, self.ends, array('q', accumulate(map(len, texts), initial=0)), ''.join(texts))
+
+    def shifted(self, offset: int) -> 'CueList':
+        return CueList(array('q', (start + offset for start in self.starts)),
+                       array('q', (end + offset for end in self.ends)), self.offsets, self.buffer)
+
+    def slice(self, start: int, end: int) -> 'CueList':
+        """
+        The cues overlapping [start, end) milliseconds, clipped to that range and
+        shifted so that `start` becomes zero.
+        """
+        return CueList.from_cues(
+            Cue(max(cue_start, start) - start, min(cue_end, end) - start, self.text(index))
+            for index, (cue_start, cue_end) in enumerate(zip(self.starts, self.ends))
+            if cue_end > start and cue_start < end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Cue:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('cue index out of range')
+        return Cue(self.starts[index], self.ends[index], self.text(index))
+
+    def __iter__(self) -> Iterator[Cue]:
+        for index in range(len(self)):
+            yield Cue(self.starts[index], self.ends[index], self.text(index))
+
+    def text(self, index: int) -> str:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def texts(self) -> List[str]:
+        return [self.text(index) for index in range(len(self))]
+
+    def _blocks(self, separator: str, numbered: bool) -> List[str]:
+        starts, ends, offsets, buffer = self.starts, self.ends, self.offsets, self.buffer
+        blocks = []
+        for index in range(len(starts)):
+            text = buffer[offsets[index]:offsets[index + 1]]
+            block = '%s --> %s\n%s' % (format_timestamp(starts[index], separator),
+                                        format_timestamp(ends[index], separator),
+                                        text + '\n' if text else '')
+            blocks.append('%d\n%s' % (index + 1, block) if numbered else block)
+        return blocks
+
+    def to_srt(self) -> str:
+        return '\n'.join(self._blocks(',', numbered=True))
+
+    def to_vtt(self) -> str:
+        return 'WEBVTT\n\n' + '\n'.join(self._blocks('.', numbered=False))
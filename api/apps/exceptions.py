@@ -18,6 +18,21 @@ class SubtitleError(WandlungError):
     pass
 
 
+class SubtitleConflictError(SubtitleError):
+    """Raised when a subtitle edit is based on an outdated version"""
+    pass
+
+
 class SettingsError(WandlungError):
     """Raised when settings are invalid or missing"""
     pass
+
+
+class JobError(WandlungError):
+    """Raised when a background job cannot be scheduled or run"""
+    pass
+
+
+class WorkspaceError(WandlungError):
+    """Raised when a scratch workspace exceeds its quota or the scratch disk runs low"""
+    pass
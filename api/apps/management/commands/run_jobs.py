@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.constants import SCRATCH_STALE_SECONDS
+from apps.metrics import start_metrics_server
+from apps.services.job_service import JobService
+from apps.workspace import sweep_workspaces
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs (download, transcribe, translate, burn) with a bounded worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS,
+                            help='Maximum number of jobs to run concurrently')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help='Seconds to wait between polls for pending jobs')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once there are no pending jobs left')
+        parser.add_argument('--metrics-port', type=int, default=settings.JOB_METRICS_PORT,
+                            help='Serve Prometheus metrics on this port (0 disables)')
+
+    def handle(self, *args, **options):
+        removed = sweep_workspaces(SCRATCH_STALE_SECONDS)
+        if removed:
+            self.stdout.write(f"Removed {removed} stale scratch workspace(s)")
+        if options['metrics_port']:
+            start_metrics_server(options['metrics_port'])
+            self.stdout.write(f"Serving metrics on port {options['metrics_port']}")
+        self.stdout.write(f"Running jobs with {options['workers']} worker(s)")
+        JobService().run_worker(options['workers'], options['poll_interval'], once=options['once'])
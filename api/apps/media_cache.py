@@ -0,0 +1,269 @@
+import fcntl
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from django.conf import settings
+
+from apps.metrics import MEDIA_CACHE_REQUESTS, timed
+from apps.utils import media_source
+
+PART_SUFFIX = '.part'
+LOCK_SUFFIX = '.lock'
+
+
+class MediaCache:
+    """
+    On-disk cache of remote media objects for ffmpeg and the transcription uploads.
+
+    Entries are keyed by the object's content fingerprint (name, ETag and size), so
+    an object replaced in storage is never served stale. Fills are downloaded to a
+    temporary file and renamed into place, and the least recently used entries are
+    evicted once the cache outgrows `max_bytes`.
+
+    Every entry has a lock file next to it, so the cache can be shared by all
+    processes on a host: users hold a shared `flock` on it while they read the entry,
+    a fill holds it exclusively (concurrent requests wait for that one download) and
+    eviction skips entries it cannot lock exclusively, i.e. those in use. Eviction also
+    removes the lock files of uncached objects and the partial downloads of killed fills.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @contextmanager
+    def open(self, field_file, fill: bool = True) -> Iterator[Optional[str]]:
+        """
+        Local path of the stored file, downloaded first unless it is cached. With `fill`
+        false an uncached file is not downloaded and None is yielded instead.
+        """
+        with field_file.storage.open(field_file.name, 'rb') as remote:
+            key = self.key(field_file.name, getattr(getattr(remote, 'obj', None), 'e_tag', None), remote.size)
+            path = self.root / key[:2] / f'{key}{os.path.splitext(field_file.name)[1]}'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = self._acquire(path, field_file, remote, fill)
+        try:
+            yield str(path) if fd is not None else None
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    @staticmethod
+    def key(name: str, etag: Optional[str], size: int) -> str:
+        return hashlib.sha256(f'{name}\0{etag or ""}\0{size}'.encode('utf-8')).hexdigest()
+
+    def usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _acquire(self, path: Path, field_file, remote, fill: bool) -> Optional[int]:
+        """
+        Return the descriptor holding the shared lock of the filled entry, None when it is
+        not cached and `fill` is false. Closing the descriptor releases the entry.
+        """
+        lock_path = path.with_suffix(LOCK_SUFFIX)
+        filled = False
+        while True:
+            fd = _lock(lock_path, fcntl.LOCK_SH)
+            if path.exists():
+                # The modification time orders entries for eviction
+                os.utime(path)
+                if filled:
+                    # Make room only now that the new entry is held
+                    self._evict()
+                else:
+                    MEDIA_CACHE_REQUESTS.inc(result='hit')
+                return fd
+            os.close(fd)
+            if not fill:
+                self._discard_lock(lock_path, path)
+                return None
+
+            fd = _lock(lock_path, fcntl.LOCK_EX)
+            try:
+                # Another fill may have finished while this one waited for the lock
+                if not path.exists():
+                    MEDIA_CACHE_REQUESTS.inc(result='miss')
+                    self._fill(path, lock_path, field_file, remote)
+                    filled = True
+            finally:
+                os.close(fd)
+            # Take the shared lock and check again; eviction in another process may
+            # have removed the entry between the two locks, then it is filled anew
+
+    def _fill(self, path: Path, lock_path: Path, field_file, remote):
+        # The exclusive lock makes this the only fill of the entry, and the name ties
+        # the partial download to the entry's lock for the cleanup in `_evict`
+        part_path = str(path.with_name(path.name + PART_SUFFIX))
+        try:
+            with timed('media_cache_fill', name=field_file.name, bytes=remote.size):
+                self._download(field_file.storage, remote, part_path)
+            os.replace(part_path, path)
+        except BaseException:
+            Path(part_path).unlink(missing_ok=True)
+            lock_path.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _download(storage, remote, part_path: str):
+        obj = getattr(remote, 'obj', None)
+        if obj is not None:
+            # S3: ranged parallel download with the storage's transfer settings
+            obj.download_file(part_path, Config=getattr(storage, 'transfer_config', None))
+        else:
+            with open(part_path, 'wb') as f:
+                shutil.copyfileobj(remote, f, 1024 * 1024)
+
+    def _entries(self):
+        for path in self.root.glob('*/*'):
+            if not _is_entry(path):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        self._remove_leftovers()
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            lock_path = path.with_suffix(LOCK_SUFFIX)
+            fd = _lock(lock_path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if fd is None:
+                # In use by this or another process
+                continue
+            try:
+                path.unlink(missing_ok=True)
+                lock_path.unlink(missing_ok=True)
+            finally:
+                os.close(fd)
+            total -= size
+
+    def _remove_leftovers(self):
+        """
+        Remove the lock files of objects that are not cached (left by lookups without
+        `fill` and by evictions in killed processes) and the partial downloads of fills
+        whose process was killed. Both are recognised by their entry's lock being free.
+        """
+        for path in list(self.root.glob('*/*')):
+            if path.suffix == LOCK_SUFFIX:
+                lock_path = path
+            elif PART_SUFFIX in path.name:
+                # S3 downloads write to a temporary file named after the part
+                lock_path = path.with_name(path.name.split(PART_SUFFIX)[0]).with_suffix(LOCK_SUFFIX)
+            else:
+                continue
+            if not path.exists():
+                # Removed along with an earlier part
+                continue
+            fd = _lock(lock_path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if fd is None:
+                # Being filled or read
+                continue
+            try:
+                if path != lock_path:
+                    path.unlink(missing_ok=True)
+                if not any(_is_entry(entry) for entry in lock_path.parent.glob(f'{lock_path.stem}*')):
+                    lock_path.unlink(missing_ok=True)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _discard_lock(lock_path: Path, path: Path):
+        """Remove the lock file of an entry that is not cached, unless another process uses it."""
+        fd = _lock(lock_path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if fd is None:
+            return
+        try:
+            if not path.exists():
+                lock_path.unlink(missing_ok=True)
+        finally:
+            os.close(fd)
+
+
+def _is_entry(path: Path) -> bool:
+    return path.suffix != LOCK_SUFFIX and PART_SUFFIX not in path.name
+
+
+def _lock(lock_path: Path, operation: int) -> Optional[int]:
+    """
+    Open and `flock` an entry's lock file, None when a non-blocking `operation` finds it
+    held. Eviction removes lock files, so a lock taken on a file that was removed (or
+    replaced) meanwhile protects nothing and is taken again on the current file.
+    """
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        try:
+            if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def _media_cache(root: str, max_bytes: int) -> MediaCache:
+    return MediaCache(Path(root), max_bytes)
+
+
+def get_media_cache() -> Optional[MediaCache]:
+    """The process-wide cache for the configured root, None when MEDIA_CACHE_MAX_MB is 0."""
+    if not settings.MEDIA_CACHE_MAX_BYTES:
+        return None
+    return _media_cache(str(settings.MEDIA_CACHE_ROOT), settings.MEDIA_CACHE_MAX_BYTES)
+
+
+def _remote_cache(field_file) -> Optional[MediaCache]:
+    """The media cache for files of remote storages; local files are read in place."""
+    try:
+        field_file.path
+    except NotImplementedError:
+        return get_media_cache()
+    return None
+
+
+@contextmanager
+def local_media(field_file, fill: bool = True) -> Iterator[str]:
+    """
+    Like `media_source`, but remote files are read through the media cache so
+    repeated transcriptions and burns of a video download it once per host.
+    Without a cache, remote files are streamed from their signed URL. With `fill`
+    false, a file that is not cached yet is streamed instead of downloaded; for
+    reads of a small part, which ffmpeg fetches with ranged requests.
+    """
+    cache = _remote_cache(field_file)
+    if cache is None:
+        yield media_source(field_file)
+    else:
+        with cache.open(field_file, fill) as path:
+            yield path or media_source(field_file)
+
+
+@contextmanager
+def open_media(field_file) -> Iterator[IO[bytes]]:
+    """Open a stored file for reading, through the media cache for remote storages."""
+    cache = _remote_cache(field_file)
+    if cache is None:
+        with field_file.open('rb') as file:
+            yield file
+    else:
+        with cache.open(field_file) as path, open(path, 'rb') as file:
+            yield file
+
+
+def read_media(field_file) -> bytes:
+    with open_media(field_file) as file:
+        return file.read()
@@ -0,0 +1,204 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import orjson
+
+logger = logging.getLogger('wandlung.metrics')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count above the last bucket], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels)) or ([0], 0.0)
+        return sum(counts)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'wandlung_stage_duration_seconds', 'Wall-clock duration of pipeline stages.', ['stage', 'status'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+))
+BYTES_TRANSFERRED = REGISTRY.register(Counter(
+    'wandlung_bytes_transferred_total', 'Bytes downloaded, uploaded or produced by pipeline stages.', ['stage'],
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    'wandlung_llm_tokens_total', 'Model tokens used, by model and direction.', ['model', 'direction'],
+))
+TRANSLATION_WINDOW_TOKENS = REGISTRY.register(Histogram(
+    'wandlung_translation_window_tokens', 'Tokens per translation window request.', ['direction'],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+))
+MEDIA_CACHE_REQUESTS = REGISTRY.register(Counter(
+    'wandlung_media_cache_requests_total', 'Local media cache lookups, by hit or miss.', ['result'],
+))
+MEDIA_DEDUP = REGISTRY.register(Counter(
+    'wandlung_media_dedup_total', 'Ingested media files, by whether they were stored or shared.', ['result'],
+))
+FFMPEG_SPEED = REGISTRY.register(Histogram(
+    'wandlung_ffmpeg_speed_ratio', 'Media seconds processed per wall-clock second by ffmpeg stages.', ['stage'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+))
+
+
+@contextmanager
+def timed(stage: str, **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Time a pipeline stage. The yielded dict is logged with the timing; stages set
+    `bytes` to count transferred bytes and `media_seconds` to derive the ffmpeg
+    speed factor.
+    """
+    record: Dict[str, Any] = dict(fields)
+    status = 'ok'
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage=stage, status=status)
+        if status == 'ok':
+            if record.get('bytes'):
+                BYTES_TRANSFERRED.inc(record['bytes'], stage=stage)
+            if record.get('media_seconds') and seconds > 0:
+                record['speed'] = round(record['media_seconds'] / seconds, 3)
+                FFMPEG_SPEED.observe(record['speed'], stage=stage)
+        logger.info(orjson.dumps({
+            'event': 'stage', 'stage': stage, 'status': status, 'seconds': round(seconds, 3), **record,
+        }, default=str).decode())
+
+
+def record_translation_usage(model: str, usage: Any):
+    """Count the input/output tokens reported for one translation window request."""
+    for direction in ('input', 'output'):
+        tokens = getattr(usage, f'{direction}_tokens', None)
+        if isinstance(tokens, int):
+            LLM_TOKENS.inc(tokens, model=model, direction=direction)
+            TRANSLATION_WINDOW_TOKENS.observe(tokens, direction=direction)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = '') -> ThreadingHTTPServer:
+    """Serve the registry from a daemon thread, for processes without the web app (job workers)."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
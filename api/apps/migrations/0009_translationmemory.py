@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0008_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('source_text', models.TextField()),
+                ('target_language', models.CharField(max_length=32)),
+                ('model', models.CharField(max_length=64)),
+                ('translation', models.TextField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Translation Memory',
+                'verbose_name_plural': 'Translation Memory',
+                'unique_together': {('source_hash', 'target_language', 'model')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0009_translationmemory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('download', 'Download'), ('transcribe', 'Transcribe'), ('translate', 'Translate'), ('burn', 'Burn'), ('ingest', 'Ingest')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0010_alter_job_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='copy_audio_stream',
+            field=models.BooleanField(default=False),
+        ),
+    ]
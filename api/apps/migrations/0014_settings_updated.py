@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0013_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,8 +1,16 @@
+import time
+from functools import partial
+from typing import Iterable, Optional, Tuple
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 
-from apps.constants import VIDEO_HEIGHT_CHOICES
-from wandlung.storages import MediaStorage
+from apps.constants import SETTINGS_RECHECK_SECONDS, VIDEO_HEIGHT_CHOICES
+from wandlung.storages import signed_url
 
 
 class YouTubeVideo(models.Model):
@@ -26,13 +34,13 @@ class YouTubeVideo(models.Model):
         if not self.thumbnail:
             return None
 
-        return MediaStorage().url(self.thumbnail.name)
+        return signed_url(self.thumbnail.name)
 
     def signed_video_url(self):
         if not self.original_video:
             return None
 
-        return MediaStorage().url(self.original_video.name)
+        return signed_url(self.original_video.name)
 
 
 class Subtitle(models.Model):
@@ -57,8 +65,147 @@ class Settings(models.Model):
     anthropic_api_key = models.CharField(max_length=255, blank=True, null=True)
     max_video_height = models.IntegerField(default=720, choices=VIDEO_HEIGHT_CHOICES)
     use_he_aac_v2 = models.BooleanField(default=True)
+    copy_audio_stream = models.BooleanField(default=False)
+    # Version stamp compared by every process's cached copy (see `load`)
+    updated = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.pk and Settings.objects.exists():
             raise ValidationError('There can be only one Settings instance')
         super().save(*args, **kwargs)
+        Settings.invalidate()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Settings.invalidate()
+        return result
+
+    @classmethod
+    def load(cls) -> Optional['Settings']:
+        """
+        Return the singleton, cached per process. The cached row is reused for
+        SETTINGS_RECHECK_SECONDS; after that only its `updated` stamp is read, and the
+        row is reloaded when another process (an API worker, `run_jobs`) saved it.
+        Saving in this process drops the cached row at once.
+        The instance is shared, so treat it as read-only.
+        """
+        global _settings_cache
+        checked, settings = _settings_cache
+        now = time.monotonic()
+        if checked is not None:
+            if now - checked < SETTINGS_RECHECK_SECONDS:
+                return settings
+            if cls.objects.values_list('updated', flat=True).first() == (settings.updated if settings else None):
+                _settings_cache = (now, settings)
+                return settings
+
+        settings = cls.objects.first()
+        _settings_cache = (now, settings)
+        return settings
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the settings cached by this process."""
+        global _settings_cache
+        _settings_cache = (None, None)
+
+
+# Time of the last check against the database and the cached row
+_settings_cache: Tuple[Optional[float], Optional[Settings]] = (None, None)
+
+
+class Job(models.Model):
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+
+    class Kind(models.TextChoices):
+        DOWNLOAD = 'download', 'Download'
+        TRANSCRIBE = 'transcribe', 'Transcribe'
+        TRANSLATE = 'translate', 'Translate'
+        BURN = 'burn', 'Burn'
+        INGEST = 'ingest', 'Ingest'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    params = models.JSONField(default=dict)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    # Renewed by the worker running the job; an expired lease means the worker died
+    heartbeat = models.DateTimeField(blank=True, null=True)
+    # Times the job was claimed; bounds retries of a job whose worker keeps dying
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+    def set_progress(self, progress: int):
+        progress = max(0, min(100, int(progress)))
+        if progress != self.progress:
+            self.progress = progress
+            Job.objects.filter(pk=self.pk).update(progress=progress)
+
+
+class TranslationMemory(models.Model):
+    class Meta:
+        verbose_name = 'Translation Memory'
+        verbose_name_plural = 'Translation Memory'
+        unique_together = [('source_hash', 'target_language', 'model')]
+
+    source_hash = models.CharField(max_length=64)
+    source_text = models.TextField()
+    target_language = models.CharField(max_length=32)
+    model = models.CharField(max_length=64)
+    translation = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class MediaBlob(models.Model):
+    """
+    A stored media file, keyed by the SHA-256 of its content and shared by every
+    video with identical media. It is deleted from storage with its last reference.
+    """
+    class Meta:
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def release(cls, names: Iterable[str]):
+        """Drop one reference per name; unreferenced blobs are deleted from storage after the commit."""
+        with transaction.atomic():
+            for name in names:
+                # Files stored before deduplication have no blob and are left alone
+                blob = cls.objects.select_for_update().filter(name=name).first() if name else None
+                if blob is None:
+                    continue
+                if blob.refcount > 1:
+                    cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                else:
+                    blob.delete()
+                    transaction.on_commit(partial(default_storage.delete, blob.name))
+
+
+@receiver(post_delete, sender=YouTubeVideo)
+def release_video_media(sender, instance: YouTubeVideo, **kwargs):
+    MediaBlob.release([instance.thumbnail.name, instance.original_video.name, instance.audio.name])
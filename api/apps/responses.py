@@ -0,0 +1,128 @@
+import re
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range` header into an inclusive (start, end) byte range.
+    Returns None when the header is missing or not a single byte range, in which
+    case the full content is served.
+    """
+    match = RANGE_PATTERN.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _if_range_matches(request: HttpRequest, etag: Optional[str], last_modified: Optional[int]) -> bool:
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return etag is not None and if_range == etag and not etag.startswith('W/')
+    return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_range(file: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def conditional_response(request: HttpRequest, etag: Optional[str] = None,
+                         last_modified: Optional[datetime] = None) -> Optional[HttpResponse]:
+    """
+    Answer `If-None-Match`/`If-Modified-Since` (304) and `If-Match`/`If-Unmodified-Since`
+    (412) before the response body is loaded; returns None when the body must be sent.
+    """
+    etag = quote_etag(etag) if etag else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        _set_validators(response, etag, timestamp)
+    return response
+
+
+def _set_validators(response: HttpResponse, etag: Optional[str], timestamp: Optional[int]):
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+
+
+def media_response(request: HttpRequest, content: Union[bytes, BinaryIO], content_type: str,
+                   size: Optional[int] = None, etag: Optional[str] = None,
+                   last_modified: Optional[datetime] = None) -> HttpResponse:
+    """
+    Serve in-memory bytes or a binary file (streamed; `size` required) with
+    `Range` (206/416) and conditional request (`If-None-Match`,
+    `If-Modified-Since`, `If-Range`) support.
+    """
+    is_file = not isinstance(content, bytes)
+    size = size if is_file else len(content)
+    etag = quote_etag(etag) if etag else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    conditional = conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        if is_file:
+            content.close()
+        return conditional
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+        if not _if_range_matches(request, etag, timestamp):
+            byte_range = None
+    except RangeNotSatisfiable:
+        if is_file:
+            content.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    else:
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        status = 206 if byte_range else 200
+        if is_file:
+            response = StreamingHttpResponse(_iter_range(content, start, length),
+                                             content_type=content_type, status=status)
+        else:
+            response = HttpResponse(content[start:start + length], content_type=content_type, status=status)
+        response['Content-Length'] = str(length)
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    _set_validators(response, etag, timestamp)
+    return response
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.models import Job
+from apps.exceptions import JobError
+from apps.metrics import timed
+from apps.services.subtitle_service import SubtitleService
+from apps.services.video_service import VideoService
+
+
+def _progress(job: Job) -> Callable[[int, int], None]:
+    return lambda done, total: job.set_progress(done * 100 // total)
+
+
+def _download(job: Job) -> Dict[str, Any]:
+    return VideoService().download_video(job.params['url'], on_progress=_progress(job))
+
+
+def _transcribe(job: Job) -> Dict[str, Any]:
+    return SubtitleService().transcribe_video(
+        job.params['video_id'], chunked=job.params.get('chunked', False), on_progress=_progress(job))
+
+
+def _translate(job: Job) -> Dict[str, Any]:
+    return SubtitleService().translate_subtitle(
+        job.params['subtitle_id'], job.params['target_language'], job.params.get('temperature'),
+        on_progress=_progress(job))
+
+
+def _burn(job: Job) -> Dict[str, Any]:
+    if job.params.get('preview'):
+        return SubtitleService().burn_preview(
+            job.params['subtitle_id'], job.params.get('at_seconds'),
+            job.params.get('start_seconds'), job.params.get('end_seconds'))
+    return SubtitleService().burn_subtitle(
+        job.params['subtitle_id'], job.params.get('start_seconds'), job.params.get('end_seconds'),
+        preset=job.params.get('preset'), crf=job.params.get('crf'), threads=job.params.get('threads'),
+        segments=job.params.get('segments', 1), on_progress=_progress(job))
+
+
+def _ingest(job: Job) -> Dict[str, Any]:
+    return VideoService().ingest(
+        job.params.get('urls', []), job.params.get('video_ids', []), job.params['concurrency'],
+        on_progress=_progress(job))
+
+
+JOB_HANDLERS: Dict[str, Callable[[Job], Dict[str, Any]]] = {
+    Job.Kind.DOWNLOAD: _download,
+    Job.Kind.TRANSCRIBE: _transcribe,
+    Job.Kind.TRANSLATE: _translate,
+    Job.Kind.BURN: _burn,
+    Job.Kind.INGEST: _ingest,
+}
+
+
+class JobService:
+    """
+    DB-backed job queue. Requests enqueue jobs and return immediately;
+    workers (see the `run_jobs` management command) claim pending jobs
+    and run them in a bounded thread pool. Workers renew a heartbeat on
+    their running jobs, and a job whose lease (JOB_LEASE_SECONDS) expired
+    because its worker died is claimed again, up to JOB_MAX_ATTEMPTS claims.
+    """
+
+    def enqueue(self, kind: str, params: Dict[str, Any]) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise JobError(f"Unsupported job kind: {kind}")
+        return Job.objects.create(kind=kind, params=params)
+
+    def claim_next(self) -> Optional[Job]:
+        now = timezone.now()
+        expired = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        # A job without a heartbeat (claimed by an older worker) gets a full lease from its start
+        abandoned = Q(Q(heartbeat__lt=expired) | Q(heartbeat__isnull=True, started__lt=expired),
+                      status=Job.Status.RUNNING)
+        # A job that keeps killing its worker (e.g. OOM) would otherwise be retried forever,
+        # taking down the other jobs of every worker that claims it
+        Job.objects.filter(abandoned, attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+            status=Job.Status.FAILED, finished=now,
+            error=f'Gave up after {settings.JOB_MAX_ATTEMPTS} attempts; its worker stopped during each one')
+
+        claimable = Q(status=Job.Status.PENDING) | Q(abandoned, attempts__lt=settings.JOB_MAX_ATTEMPTS)
+        for job_id in Job.objects.filter(claimable).order_by('id').values_list('id', flat=True)[:10]:
+            # Conditional update so that concurrent workers never claim the same job twice
+            now = timezone.now()
+            claimed = Job.objects.filter(claimable, pk=job_id).update(
+                status=Job.Status.RUNNING, started=now, heartbeat=now, progress=0, attempts=F('attempts') + 1)
+            if claimed:
+                return Job.objects.get(pk=job_id)
+        return None
+
+    def heartbeat(self, job_ids):
+        """Renew the lease of jobs this worker is still running."""
+        Job.objects.filter(pk__in=job_ids, status=Job.Status.RUNNING).update(heartbeat=timezone.now())
+
+    def run_job(self, job: Job) -> Job:
+        try:
+            with timed(f'job_{job.kind}', job_id=job.pk):
+                result = JOB_HANDLERS[job.kind](job)
+        except Exception as e:
+            job.status = Job.Status.FAILED
+            job.error = str(e)
+        else:
+            job.status = Job.Status.SUCCEEDED
+            job.result = result
+            job.progress = 100
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'result', 'progress', 'finished'])
+        return job
+
+    def run_worker(self, max_workers: int, poll_interval: float, once: bool = False):
+        in_flight: Dict[Future, int] = {}
+        heartbeat_interval = settings.JOB_LEASE_SECONDS / 3
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                in_flight = {future: job_id for future, job_id in in_flight.items() if not future.done()}
+                if in_flight and time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    self.heartbeat(in_flight.values())
+                    last_heartbeat = time.monotonic()
+
+                while len(in_flight) < max_workers:
+                    job = self.claim_next()
+                    if not job:
+                        break
+                    in_flight[executor.submit(self._run_in_thread, job)] = job.pk
+
+                if once and not in_flight:
+                    return
+                time.sleep(poll_interval)
+
+    def _run_in_thread(self, job: Job) -> Job:
+        close_old_connections()
+        try:
+            return self.run_job(job)
+        finally:
+            close_old_connections()
@@ -0,0 +1,47 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+from apps.metrics import MEDIA_DEDUP, timed
+from apps.models import MediaBlob
+
+
+def hash_file(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def store_media(path: str, prefix: str) -> str:
+    """
+    Store a local file under its content address `<prefix><sha256><ext>` and take a
+    reference to it. Identical content that is already stored is shared instead of
+    uploaded again; release references with `MediaBlob.release`.
+    """
+    digest = hash_file(path)
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=digest).first()
+        if blob:
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            MEDIA_DEDUP.inc(result='shared')
+            return blob.name
+
+    # Upload outside the transaction; a concurrent ingest of the same content may win the row
+    size = os.path.getsize(path)
+    key = f'{prefix}{digest}{os.path.splitext(path)[1].lower()}'
+    with timed('upload', name=key, bytes=size), open(path, 'rb') as f:
+        name = default_storage.save(key, File(f, os.path.basename(key)))
+
+    with transaction.atomic():
+        blob, created = MediaBlob.objects.select_for_update().get_or_create(
+            sha256=digest, defaults={'name': name, 'size': size, 'refcount': 1})
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+    if blob.name != name:
+        default_storage.delete(name)
+
+    MEDIA_DEDUP.inc(result='stored' if created else 'shared')
+    return blob.name
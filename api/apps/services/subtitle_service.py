@@ -1,170 +1,620 @@
+import asyncio
+import glob
+import hashlib
 import os
-from typing import Optional
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import StreamingHttpResponse
-from django.shortcuts import get_object_or_404
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.shortcuts import aget_object_or_404, get_object_or_404
 import ffmpy
-import orjson
 import openai
-import anthropic
 
+from apps.clients import async_openai_client, openai_client
 from apps.models import Subtitle, Settings, YouTubeVideo
-from apps.exceptions import SubtitleError, TranscriptionError
-from apps.constants import TRANSCRIPTION_CHUNK_SIZE, MAX_ITERATIONS
+from apps.cues import Cue, CueList
+from apps.exceptions import SubtitleConflictError, SubtitleError, TranscriptionError
+from apps.media_cache import local_media, open_media
+from apps.metrics import timed
+from apps.constants import (
+    BURN_STYLE,
+    BURN_URL_EXPIRE,
+    BURN_PREVIEW_SECONDS,
+    BURN_PREVIEW_HEIGHT,
+    BURN_PREVIEW_PRESET,
+    BURN_PREVIEW_CRF,
+    WEBVTT_CACHE_TIMEOUT,
+    TRANSCRIPTION_SEGMENT_SECONDS,
+    TRANSCRIPTION_SILENCE_SEARCH_SECONDS,
+    TRANSCRIPTION_MAX_WORKERS,
+    SILENCE_NOISE_DB,
+    SILENCE_MIN_DURATION,
+)
+from apps.services.translation_service import TranslationService
+from apps.workspace import Workspace, check_size_limit, ffmpeg_size_limit, workspace
+from apps.utils import (
+    parse_srt,
+    format_srt,
+    slice_cues,
+    stitch_srt,
+    ffmpeg_input_options,
+    download_url,
+    srt_to_webvtt,
+    file_size,
+)
+
+SILENCE_PATTERN = re.compile(r'silence_(start|end): (-?[\d.]+)')
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def counting_progress(total: int, on_progress: Optional[ProgressCallback]) -> Callable[[], None]:
+    """Thread-safe step counter reporting `on_progress(done, total)` after every step."""
+    done = 0
+    lock = threading.Lock()
+
+    def step():
+        nonlocal done
+        with lock:
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+    return step
+
+
+def burned_video_name(subtitle: Subtitle, start_seconds: Optional[float], end_seconds: Optional[float],
+                      style: str = BURN_STYLE, encoding: str = '') -> str:
+    """
+    Storage name of a burned video, keyed by subtitle content, time range, style
+    and the encoder options that change the output (see `encoder_options`).
+    """
+    start = start_seconds or 0
+    end = end_seconds or subtitle.video.duration.total_seconds()
+    content_hash = hashlib.sha256(subtitle.content.encode('utf-8')).hexdigest()[:16]
+    style_hash = hashlib.sha256((style + encoding).encode('utf-8')).hexdigest()[:8]
+    return f'burns/{subtitle.pk}/{content_hash}-{start:g}-{end:g}-{style_hash}.mp4'
+
+
+def encoder_options(preset: Optional[str] = None, crf: Optional[int] = None, threads: Optional[int] = None) -> str:
+    """
+    libx264 options for a burn; unset values keep ffmpeg's defaults.
+    """
+    options = []
+    if preset:
+        options.append(f'-preset {preset}')
+    if crf is not None:
+        options.append(f'-crf {crf}')
+    if threads:
+        options.append(f'-threads {threads}')
+    return ' '.join(options)
+
+
+def subtitle_version(subtitle: Subtitle) -> str:
+    """
+    Strong validator for anything rendered from a subtitle's content.
+    """
+    return f'{subtitle.pk}-{int(subtitle.updated.timestamp() * 1_000_000):x}'
+
+
+def render_webvtt(subtitle_id: int, version: str) -> bytes:
+    """
+    WebVTT rendering of a subtitle, cached per content version.
+    """
+    key = f'subtitle-vtt:{version}'
+    content = cache.get(key)
+    if content is None:
+        srt_content = Subtitle.objects.values_list('content', flat=True).get(pk=subtitle_id)
+        content = srt_to_webvtt(srt_content).encode('utf-8')
+        cache.set(key, content, WEBVTT_CACHE_TIMEOUT)
+    return content
+
+
+def cue_text(text: str) -> str:
+    """
+    Normalize cue text for SRT: unify line endings and drop surrounding blank lines.
+    Text that would not read back as the same single cue, i.e. with a blank line
+    (a cue boundary) or a `-->` (timing) line, raises SubtitleError.
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n').strip('\n')
+    lines = text.split('\n') if text else []
+    if any(not line.strip() for line in lines):
+        raise SubtitleError("Cue text must not contain blank lines")
+    if any('-->' in line for line in lines):
+        raise SubtitleError("Cue text must not contain '-->'")
+    return text
+
+
+def apply_cue_operations(cues: Iterable[Cue], operations: List[Dict[str, Any]]) -> List[Cue]:
+    """
+    Apply insert/update/delete cue operations in order. Every index refers to the
+    cue list as left by the previous operations; times are in milliseconds.
+    """
+    cues = list(cues)
+    for operation in operations:
+        kind, index = operation['op'], operation['index']
+        if not 0 <= index < len(cues) + (kind == 'insert'):
+            raise SubtitleError(f"Cue index out of range: {index}")
+        if operation.get('text') is not None:
+            operation = {**operation, 'text': cue_text(operation['text'])}
+        if kind == 'insert':
+            cues.insert(index, Cue(operation['start'], operation['end'], operation['text']))
+        elif kind == 'update':
+            cues[index] = cues[index]._replace(**{
+                field: operation[field] for field in Cue._fields if operation.get(field) is not None})
+        elif kind == 'delete':
+            del cues[index]
+        else:
+            raise SubtitleError(f"Unknown cue operation: {kind}")
+
+    for index, cue in enumerate(cues):
+        if cue.start < 0 or cue.end < cue.start:
+            raise SubtitleError(f"Invalid timing for cue {index}")
+    return cues
+
+
+def patch_subtitle(subtitle_id: int, version: str, operations: List[Dict[str, Any]]) -> Subtitle:
+    """
+    Apply cue operations to a subtitle if it is still at `version` (see `subtitle_version`).
+    The row is locked while the edit is applied so concurrent patches cannot interleave.
+    """
+    with transaction.atomic():
+        subtitle = get_object_or_404(Subtitle.objects.select_for_update(), pk=subtitle_id)
+        if subtitle_version(subtitle) != version:
+            raise SubtitleConflictError(f"Subtitle has changed; current version is {subtitle_version(subtitle)}")
+
+        subtitle.content = format_srt(apply_cue_operations(parse_srt(subtitle.content), operations))
+        subtitle.save(update_fields=['content', 'updated'])
+
+    invalidate_burned_videos(subtitle.pk)
+    return subtitle
+
+
+def invalidate_burned_videos(subtitle_id: int):
+    """
+    Delete every cached burn of a subtitle, e.g. after its content changed.
+    """
+    directory = f'burns/{subtitle_id}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        default_storage.delete(f'{directory}/{name}')
+
+
+@receiver(post_delete, sender=Subtitle)
+def invalidate_deleted_subtitle_burns(sender, instance: Subtitle, **kwargs):
+    """Delete the cached burns of every deleted subtitle, including those deleted with their video."""
+    transaction.on_commit(partial(invalidate_burned_videos, instance.pk))
 
 
 class SubtitleService:
     def __init__(self):
-        self.settings = Settings.objects.first()
+        self.settings = Settings.load()
         if not self.settings:
             raise ValidationError('Settings not found')
 
-    def transcribe_video(self, video_id: str) -> dict:
+    def transcribe_video(self, video_id: str, chunked: bool = False,
+                         on_progress: Optional[ProgressCallback] = None) -> dict:
         if not self.settings.openai_api_key:
             raise ValidationError('OpenAI API Key not set')
 
-        audio_path = f'{video_id}.m4a'
+        video = get_object_or_404(YouTubeVideo, video_id=video_id)
         try:
-            video = get_object_or_404(YouTubeVideo, video_id=video_id)
-            client = openai.OpenAI(api_key=self.settings.openai_api_key)
+            client = openai_client(self.settings.openai_api_key)
 
-            with open(audio_path, 'wb') as audio_file:
-                audio_file.write(video.audio.read())
+            if chunked:
+                srt_content = self._transcribe_chunked(client, video, on_progress)
+            else:
+                srt_content = self._transcribe_stored_audio(client, video)
+
+            subtitle = Subtitle.objects.create(
+                video=video,
+                language='English',
+                is_transcribed=True,
+                content=srt_content)
+
+            return {'success': True, 'subtitle_id': subtitle.pk}
+
+        except Exception as e:
+            raise TranscriptionError(f"Failed to transcribe video: {str(e)}")
+
+    async def atranscribe_video(self, video_id: str, chunked: bool = False) -> dict:
+        """Asyncio counterpart of `transcribe_video`, awaiting a pooled AsyncOpenAI client."""
+        if not self.settings.openai_api_key:
+            raise ValidationError('OpenAI API Key not set')
 
-            with open(audio_path, 'rb') as audio_file:
-                srt_content = client.audio.transcriptions.create(
-                    model='whisper-1',
-                    file=audio_file,
-                    response_format='srt')
+        video = await aget_object_or_404(YouTubeVideo, video_id=video_id)
+        try:
+            client = async_openai_client(self.settings.openai_api_key)
+
+            if chunked:
+                srt_content = await self._atranscribe_chunked(client, video)
+            else:
+                srt_content = await self._atranscribe_stored_audio(client, video)
 
-            Subtitle.objects.create(
+            subtitle = await Subtitle.objects.acreate(
                 video=video,
                 language='English',
                 is_transcribed=True,
                 content=srt_content)
 
-            return {'success': True}
+            return {'success': True, 'subtitle_id': subtitle.pk}
 
         except Exception as e:
             raise TranscriptionError(f"Failed to transcribe video: {str(e)}")
-        finally:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
 
-    def translate_subtitle(self, subtitle_id: int, target_language: str, temperature: Optional[float]) -> dict:
+    def _transcribe_file(self, client: openai.OpenAI, filename: str, audio_file) -> str:
+        with timed('transcribe_request', filename=filename):
+            return client.audio.transcriptions.create(
+                model='whisper-1',
+                file=(filename, audio_file),
+                response_format='srt')
+
+    def _transcribe_stored_audio(self, client: openai.OpenAI, video: YouTubeVideo) -> str:
+        # Stream the stored (or cached) file to the API instead of writing a local copy first
+        with open_media(video.audio) as audio_file:
+            return self._transcribe_file(client, os.path.basename(video.audio.name), audio_file)
+
+    def _transcribe_segment(self, client: openai.OpenAI, segment_path: str) -> str:
+        with open(segment_path, 'rb') as audio_file:
+            return self._transcribe_file(client, os.path.basename(segment_path), audio_file)
+
+    def _transcribe_chunked(self, client: openai.OpenAI, video: YouTubeVideo,
+                            on_progress: Optional[ProgressCallback] = None) -> str:
+        """
+        Split the audio on silence boundaries, transcribe the segments concurrently
+        and stitch the resulting SRT back together with the segment offsets.
+        Progress is reported per transcribed segment.
+        """
+        with local_media(video.audio) as source:
+            split_points = self._choose_split_points(self._detect_silences(source), video.duration.total_seconds())
+            if not split_points:
+                return self._transcribe_stored_audio(client, video)
+
+            ext = os.path.splitext(video.audio.name)[1] or '.m4a'
+            with workspace(f'transcribe-{video.video_id}') as scratch:
+                # The segment muxer ignores -fs; the segments copy the source, so they take about its size
+                scratch.reserve(video.audio.size)
+                segments = self._split_audio(source, scratch.file('segment'), ext, split_points)
+                scratch.check()
+                step = counting_progress(len(segments), on_progress)
+
+                def transcribe_segment(segment_path: str) -> str:
+                    content = self._transcribe_segment(client, segment_path)
+                    step()
+                    return content
+
+                with ThreadPoolExecutor(max_workers=TRANSCRIPTION_MAX_WORKERS) as executor:
+                    contents = list(executor.map(lambda segment: transcribe_segment(segment[1]), segments))
+
+        return stitch_srt([(offset, content) for (offset, _), content in zip(segments, contents)])
+
+    async def _atranscribe_file(self, client: openai.AsyncOpenAI, filename: str, audio_file) -> str:
+        with timed('transcribe_request', filename=filename):
+            return await client.audio.transcriptions.create(
+                model='whisper-1',
+                file=(filename, audio_file),
+                response_format='srt')
+
+    async def _atranscribe_stored_audio(self, client: openai.AsyncOpenAI, video: YouTubeVideo) -> str:
+        # Streamed like the sync path; opening may fill the media cache, so it runs in a thread
+        with ExitStack() as stack:
+            audio_file = await asyncio.to_thread(stack.enter_context, open_media(video.audio))
+            return await self._atranscribe_file(client, os.path.basename(video.audio.name), audio_file)
+
+    async def _atranscribe_chunked(self, client: openai.AsyncOpenAI, video: YouTubeVideo) -> str:
+        """
+        Same splitting as `_transcribe_chunked`; ffmpeg and file reads run in threads while
+        the segment requests are awaited concurrently.
+        """
+        semaphore = asyncio.Semaphore(TRANSCRIPTION_MAX_WORKERS)
+
+        async def transcribe_segment(segment_path: str) -> str:
+            async with semaphore:
+                with open(segment_path, 'rb') as audio_file:
+                    return await self._atranscribe_file(client, os.path.basename(segment_path), audio_file)
+
+        with ExitStack() as stack:
+            # Filling the media cache blocks, so enter the cached source in a thread
+            source = await asyncio.to_thread(stack.enter_context, local_media(video.audio))
+            silences = await asyncio.to_thread(self._detect_silences, source)
+            split_points = self._choose_split_points(silences, video.duration.total_seconds())
+            if not split_points:
+                return await self._atranscribe_stored_audio(client, video)
+
+            ext = os.path.splitext(video.audio.name)[1] or '.m4a'
+            scratch = stack.enter_context(workspace(f'transcribe-{video.video_id}'))
+            # Reading the size is a HEAD request on S3, so it belongs in the thread as well
+            await asyncio.to_thread(lambda: scratch.reserve(video.audio.size))
+            segments = await asyncio.to_thread(self._split_audio, source, scratch.file('segment'), ext, split_points)
+            scratch.check()
+            contents = await asyncio.gather(*(transcribe_segment(segment_path) for _, segment_path in segments))
+
+        return stitch_srt([(offset, content) for (offset, _), content in zip(segments, contents)])
+
+    def _detect_silences(self, source: str) -> List[Tuple[float, float]]:
+        ff = ffmpy.FFmpeg(
+            inputs={source: ffmpeg_input_options(source)},
+            outputs={'-': f'-af silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_DURATION} -f null'},
+        )
+        with timed('detect_silences'):
+            _, stderr = ff.run(stderr=subprocess.PIPE)
+
+        silences = []
+        start = None
+        for kind, value in SILENCE_PATTERN.findall((stderr or b'').decode('utf-8', 'replace')):
+            if kind == 'start':
+                start = max(0.0, float(value))
+            elif start is not None:
+                silences.append((start, float(value)))
+                start = None
+        return silences
+
+    @staticmethod
+    def _choose_split_points(silences: List[Tuple[float, float]], duration: float) -> List[float]:
+        """
+        Pick a split point close to every TRANSCRIPTION_SEGMENT_SECONDS, preferring the middle
+        of the nearest silence within TRANSCRIPTION_SILENCE_SEARCH_SECONDS and falling back to
+        a hard cut when there is none.
+        """
+        midpoints = [(start + end) / 2 for start, end in silences]
+        split_points = []
+        previous = 0.0
+        target = TRANSCRIPTION_SEGMENT_SECONDS
+        while target < duration - TRANSCRIPTION_SILENCE_SEARCH_SECONDS:
+            candidates = [point for point in midpoints
+                          if abs(point - target) <= TRANSCRIPTION_SILENCE_SEARCH_SECONDS and point > previous]
+            point = min(candidates, key=lambda p: abs(p - target)) if candidates else float(target)
+            split_points.append(round(point, 3))
+            previous = point
+            target = point + TRANSCRIPTION_SEGMENT_SECONDS
+        return split_points
+
+    def _split_audio(self, source: str, output_prefix: str, ext: str,
+                     split_points: List[float]) -> List[Tuple[float, str]]:
+        ff = ffmpy.FFmpeg(
+            inputs={source: ffmpeg_input_options(source)},
+            outputs={f'{output_prefix}-%03d{ext}': '-y -c copy -f segment -reset_timestamps 1 '
+                                                   f'-segment_times {",".join(map(str, split_points))}'},
+        )
+        with timed('split_audio', segments=len(split_points) + 1):
+            ff.run()
+
+        segment_paths = sorted(glob.glob(f'{glob.escape(output_prefix)}-*{ext}'))
+        return list(zip([0.0] + split_points, segment_paths))
+
+    def translate_subtitle(self, subtitle_id: int, target_language: str, temperature: Optional[float],
+                           on_progress: Optional[ProgressCallback] = None) -> dict:
         try:
             source = get_object_or_404(Subtitle, id=subtitle_id)
-            translated = self._translate_subtitle_anthropic(source, target_language, temperature)
+            translated = self._translate_subtitle_anthropic(source, target_language, temperature, on_progress)
 
-            Subtitle.objects.create(
+            subtitle = Subtitle.objects.create(
                 video=source.video,
                 language=target_language,
                 is_transcribed=False,
                 content=translated,
             )
-            return {"success": True}
+            return {"success": True, "subtitle_id": subtitle.pk}
 
         except Exception as e:
             raise SubtitleError(f"Failed to translate subtitle: {str(e)}")
 
-    def _translate_subtitle_anthropic(self, source: Subtitle, target_language: str, temperature: Optional[float]) -> str:
-        settings = Settings.objects.first()
-        if not settings:
-            raise ValidationError('Settings not found')
-        if not settings.anthropic_api_key:
+    async def atranslate_subtitle(self, subtitle_id: int, target_language: str,
+                                  temperature: Optional[float]) -> dict:
+        """Asyncio counterpart of `translate_subtitle`, awaiting a pooled AsyncAnthropic client."""
+        try:
+            source = await aget_object_or_404(Subtitle.objects.select_related('video'), id=subtitle_id)
+            if not self.settings.anthropic_api_key:
+                raise ValidationError('Anthropic API Key not found')
+
+            translation_service = TranslationService(api_key=self.settings.anthropic_api_key)
+            translated = await translation_service.atranslate(source.content, target_language, temperature)
+
+            subtitle = await Subtitle.objects.acreate(
+                video=source.video,
+                language=target_language,
+                is_transcribed=False,
+                content=translated,
+            )
+            return {"success": True, "subtitle_id": subtitle.pk}
+
+        except Exception as e:
+            raise SubtitleError(f"Failed to translate subtitle: {str(e)}")
+
+    def _translate_subtitle_anthropic(self, source: Subtitle, target_language: str, temperature: Optional[float],
+                                      on_progress: Optional[ProgressCallback] = None) -> str:
+        if not self.settings.anthropic_api_key:
             raise ValidationError('Anthropic API Key not found')
 
-        system_prompt = (
-            f"Translate the following SRT subtitles into {target_language}. "
-            "Translate only 20 entries at a time and say 'NEXT'. "
-            "If I reply with 'CONTINUE', then continue with the next 20 entries. "
-            "If you've finished the job, then say 'END'. "
-            'Output should be in JSON format with keys: "text", "command". '
-            'Example: {"text": "Translated SRT (must escape newlines)", "command": "NEXT"}'
-        )
+        translation_service = TranslationService(api_key=self.settings.anthropic_api_key)
+        return translation_service.translate(source.content, target_language, temperature, on_progress=on_progress)
 
-        histories = [{"role": "user", "content": source.content}, ]
+    def burn_subtitle(self, subtitle_id: int, start_seconds: Optional[float], end_seconds: Optional[float],
+                      preset: Optional[str] = None, crf: Optional[int] = None, threads: Optional[int] = None,
+                      segments: int = 1, height: Optional[int] = None,
+                      on_progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        Burn the subtitle into its video, store the result and return a short-lived
+        signed download URL for it. Clients download from storage directly instead
+        of through the API. With `segments` > 1 the range is burned in that many
+        parallel ffmpeg processes, and progress is reported per burned part;
+        `height` downscales the output.
+        """
+        subtitle = get_object_or_404(Subtitle, pk=subtitle_id)
+        variant = encoder_options(preset, crf) + (f' -height {height}' if height else '')
+        name = burned_video_name(subtitle, start_seconds, end_seconds, encoding=variant)
+        video_id = subtitle.video.video_id
+        filename = f'{video_id}-with-{subtitle_id}.mp4'
+        if default_storage.exists(name):
+            return {'name': name, 'url': download_url(name, filename, BURN_URL_EXPIRE), 'video_id': video_id}
 
-        client = anthropic.Client(api_key=settings.anthropic_api_key)
+        try:
+            with workspace(f'burn-{subtitle_id}') as scratch:
+                output_path = scratch.file(filename)
+                if segments > 1:
+                    self._burn_parallel(subtitle, start_seconds, end_seconds, output_path, segments, preset, crf,
+                                        threads, height, on_progress, scratch)
+                else:
+                    self._burn(subtitle, start_seconds, end_seconds, output_path,
+                               encoder_options(preset, crf, threads), height, scratch.size_limit())
+                scratch.check()
+                self._save_burned_video(output_path, name)
+            return {'name': name, 'url': download_url(name, filename, BURN_URL_EXPIRE), 'video_id': video_id}
 
-        translated_chunks = []
-        iteration_count = 0
+        except Exception as e:
+            raise SubtitleError(f"Failed to burn subtitles: {str(e)}")
 
-        while iteration_count < MAX_ITERATIONS:
-            iteration_count += 1
+    def burn_preview(self, subtitle_id: int, at_seconds: Optional[float] = None,
+                     start_seconds: Optional[float] = None, end_seconds: Optional[float] = None) -> dict:
+        """
+        Quick low-resolution burn for checking subtitle placement: a short window around
+        `at_seconds` (unless a range is given), downscaled and encoded with the fastest
+        preset. Previews are cached like full burns, and their URL plays inline instead
+        of downloading.
+        """
+        if start_seconds is None and end_seconds is None:
+            subtitle = get_object_or_404(Subtitle.objects.select_related('video').only('video__duration'), pk=subtitle_id)
+            duration = subtitle.video.duration.total_seconds()
+            start_seconds = max(0.0, min((at_seconds or 0) - BURN_PREVIEW_SECONDS / 2, duration - BURN_PREVIEW_SECONDS))
+            end_seconds = min(duration, start_seconds + BURN_PREVIEW_SECONDS)
 
-            response = client.messages.create(
-                model='claude-3-5-sonnet-20241022',
-                system=system_prompt,
-                max_tokens=4096,
-                temperature=temperature,
-                messages=histories,
-            )
-            message = response.content[0].text
-            try:
-                data = orjson.loads(message)
-            except orjson.JSONDecodeError as e:
-                print(f"Failed to decode JSON: ##{message}##")
-                raise e
-
-            translated_chunks.append(data['text'].strip())
-            if data['command'] == 'NEXT':
-                histories.extend([
-                    {'role': 'assistant', 'content': message},
-                    {'role': 'user', 'content': 'CONTINUE'}])
-            elif data['command'] == 'END':
-                break
-            else:
-                raise ValueError(f"Unsupported command: {data['command']}")
-        return "\n\n".join(translated_chunks)
+        result = self.burn_subtitle(subtitle_id, start_seconds, end_seconds, preset=BURN_PREVIEW_PRESET,
+                                    crf=BURN_PREVIEW_CRF, height=BURN_PREVIEW_HEIGHT)
+        result['url'] = download_url(result['name'], f"{result['video_id']}-preview-{subtitle_id}.mp4",
+                                     BURN_URL_EXPIRE, inline=True)
+        return result
 
-    def burn_subtitle(self, subtitle_id: int, start_seconds: Optional[float], end_seconds: Optional[float]):
-        subtitle = get_object_or_404(Subtitle, pk=subtitle_id)
+    def _save_burned_video(self, output_path: str, name: str):
+        with timed('upload', name=name, bytes=file_size(output_path)), open(output_path, 'rb') as f:
+            default_storage.save(name, File(f))
 
-        video_path = f'{subtitle.video.video_id}.mp4'
-        subtitle_path = f'{subtitle.video.video_id}.srt'
-        output_path = f'{subtitle.video.video_id}-with-{subtitle_id}.mp4'
+    def _burn(self, subtitle: Subtitle, start_seconds: Optional[float], end_seconds: Optional[float],
+              output_path: str, encoding: str = '', height: Optional[int] = None, size_limit: Optional[int] = None):
+        start = start_seconds or 0
+        end = end_seconds or subtitle.video.duration.total_seconds()
+        with self._burn_source(subtitle, start, end) as source:
+            self._burn_range(source, parse_srt(subtitle.content), start, end, output_path,
+                             f'{os.path.splitext(output_path)[0]}.srt', encoding, height, size_limit)
 
-        try:
-            with open(video_path, 'wb') as f:
-                f.write(subtitle.video.original_video.read())
-
-            with open(subtitle_path, 'w') as f:
-                f.write(subtitle.content)
-
-            ff = ffmpy.FFmpeg(
-                inputs={video_path: None},
-                outputs={output_path: '-y -c:a copy -filter:v '
-                                      f' subtitles="{subtitle_path}:force_style=\'FontName=BM Dohyeon,FontSize=22\'" '
-                                      f' -ss {start_seconds or 0} '
-                                      f' -to {end_seconds or subtitle.video.duration.total_seconds()}'},
-            )
+    @staticmethod
+    def _burn_source(subtitle: Subtitle, start: float, end: float):
+        """
+        The original to burn [start, end] of. A whole video is read through the media cache;
+        for a range, previews included, ffmpeg seeks in the signed URL and fetches only that
+        part, unless the original is cached already.
+        """
+        whole = start <= 0 and end >= subtitle.video.duration.total_seconds()
+        return local_media(subtitle.video.original_video, fill=whole)
+
+    def _burn_range(self, source: str, cues: CueList, start: float, end: float, output_path: str,
+                    subtitle_path: str, encoding: str, height: Optional[int] = None,
+                    size_limit: Optional[int] = None):
+        # Seeking on the input resets timestamps to zero, so burn a slice of the
+        # subtitle shifted by the same amount
+        with open(subtitle_path, 'w') as f:
+            f.write(format_srt(slice_cues(cues, round(start * 1000), round(end * 1000))))
+
+        # Downscale before rendering the subtitles so they are drawn at the output size
+        scale = f'scale=-2:{height},' if height else ''
+        ff = ffmpy.FFmpeg(
+            inputs={source: f'{ffmpeg_input_options(source)} -ss {start}'},
+            outputs={output_path: f'-y -t {end - start} {encoding} {ffmpeg_size_limit(size_limit)} -c:a copy -filter:v '
+                                  f' {scale}subtitles="{subtitle_path}:force_style=\'{BURN_STYLE}\'" '},
+        )
+        with timed('burn', start=start, end=end, height=height, media_seconds=end - start) as record:
             ff.run()
+            record['bytes'] = file_size(output_path)
+        check_size_limit(output_path, size_limit)
 
-            return self._stream_video_response(output_path)
+    def _burn_parallel(self, subtitle: Subtitle, start_seconds: Optional[float], end_seconds: Optional[float],
+                       output_path: str, segments: int, preset: Optional[str], crf: Optional[int],
+                       threads: Optional[int], height: Optional[int] = None,
+                       on_progress: Optional[ProgressCallback] = None, scratch: Optional[Workspace] = None):
+        """
+        Split the range at keyframes, burn every part in its own ffmpeg process with its
+        time-shifted subtitle slice and join the parts with the concat demuxer. Unless
+        given, encoder threads are the cores divided among the parts. With a `scratch`
+        quota, every part may take an equal share of what is left.
+        """
+        start = start_seconds or 0
+        end = end_seconds or subtitle.video.duration.total_seconds()
+        cues = parse_srt(subtitle.content)
 
-        except Exception as e:
-            raise SubtitleError(f"Failed to burn subtitles: {str(e)}")
-        finally:
-            for path in [subtitle_path, video_path]:
-                if os.path.exists(path):
-                    os.remove(path)
-
-    def _stream_video_response(self, video_path: str):
-        def file_iterator(chunk_size=TRANSCRIPTION_CHUNK_SIZE):
-            try:
-                with open(video_path, 'rb') as f:
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
-            finally:
-                if os.path.exists(video_path):
-                    os.remove(video_path)
-
-        response = StreamingHttpResponse(file_iterator(), content_type='video/mp4')
-        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(video_path)}"'
-        if os.path.exists(video_path):
-            response['Content-Length'] = os.path.getsize(video_path)
-        return response
+        with self._burn_source(subtitle, start, end) as source:
+            keyframes = self._keyframes(source, start, end)
+            bounds = [start, *self._choose_burn_split_points(keyframes, start, end, segments), end]
+            encoding = encoder_options(preset, crf, threads or max(1, (os.cpu_count() or 1) // (len(bounds) - 1)))
+            prefix = os.path.splitext(output_path)[0]
+            parts = [(f'{prefix}-part{index:03d}.mp4', f'{prefix}-part{index:03d}.srt', part_start, part_end)
+                     for index, (part_start, part_end) in enumerate(zip(bounds, bounds[1:]))]
+            list_path = f'{prefix}-parts.txt'
+            step = counting_progress(len(parts), on_progress)
+            part_limit = scratch.size_limit(len(parts)) if scratch else None
+
+            def burn_part(part: Tuple[str, str, float, float]):
+                self._burn_range(source, cues, part[2], part[3], part[0], part[1], encoding, height, part_limit)
+                step()
+
+            # Parts, subtitle slices and the concat list are written next to the output
+            # and removed with its workspace
+            with (
+                timed('burn_parallel', parts=len(parts), media_seconds=end - start),
+                ThreadPoolExecutor(max_workers=len(parts)) as executor,
+            ):
+                list(executor.map(burn_part, parts))
+
+        with open(list_path, 'w') as f:
+            f.writelines(f"file '{os.path.abspath(part_path)}'\n" for part_path, *_ in parts)
+        concat_limit = scratch.size_limit() if scratch else None
+        ff = ffmpy.FFmpeg(
+            inputs={list_path: '-f concat -safe 0'},
+            outputs={output_path: f'-y -c copy -movflags +faststart {ffmpeg_size_limit(concat_limit)}'.rstrip()},
+        )
+        with timed('concat', parts=len(parts)):
+            ff.run()
+        check_size_limit(output_path, concat_limit)
+
+    def _keyframes(self, source: str, start: float, end: float) -> List[float]:
+        """Keyframe times of the first video stream within [start, end], read from packet flags."""
+        ff = ffmpy.FFprobe(
+            inputs={source: f'{ffmpeg_input_options(source)} -v error -select_streams v:0 '
+                            f'-read_intervals {start}%{end} -show_entries packet=pts_time,flags -of csv=p=0'},
+        )
+        stdout, _ = ff.run(stdout=subprocess.PIPE)
+
+        keyframes = []
+        for line in (stdout or b'').decode('utf-8', 'replace').splitlines():
+            pts_time, _, flags = line.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                keyframes.append(float(pts_time))
+        return keyframes
+
+    @staticmethod
+    def _choose_burn_split_points(keyframes: List[float], start: float, end: float, segments: int) -> List[float]:
+        """
+        Pick the keyframe nearest to each of the `segments - 1` evenly spaced boundaries,
+        keeping the points strictly increasing inside (start, end).
+        """
+        keyframes = sorted(keyframes)
+        points = []
+        for index in range(1, segments):
+            target = start + (end - start) * index / segments
+            previous = points[-1] if points else start
+            candidates = [time for time in keyframes if previous < time < end]
+            if not candidates:
+                break
+            points.append(min(candidates, key=lambda time: abs(time - target)))
+        return points
@@ -0,0 +1,126 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+
+from apps.models import TranslationMemory as TranslationMemoryEntry
+from apps.constants import (
+    TRANSLATION_MEMORY_MAX_ENTRIES,
+    TRANSLATION_MEMORY_EVICT_INTERVAL,
+    TRANSLATION_MEMORY_EVICT_BATCH,
+)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+_last_eviction: Optional[float] = None
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so that re-wrapped cue text maps to the same entry."""
+    return ' '.join(text.split())
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def translation_memory_stats() -> Dict[str, int]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['entries'] = TranslationMemoryEntry.objects.count()
+    return stats
+
+
+class TranslationMemory:
+    """
+    Persistent per-cue translation cache keyed by (normalized source text,
+    target language, model). Least recently used entries are evicted once
+    the table grows beyond `max_entries`, checked at most every
+    TRANSLATION_MEMORY_EVICT_INTERVAL seconds per process.
+    """
+
+    def __init__(self, target_language: str, model: str, max_entries: int = TRANSLATION_MEMORY_MAX_ENTRIES):
+        self.target_language = target_language
+        self.model = model
+        self.max_entries = max_entries
+
+    def lookup(self, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Return a mapping of source hash to cached translation for the given texts.
+        """
+        hashes = {hash_text(text) for text in texts if normalize_text(text)}
+        if not hashes:
+            return {}
+
+        entries = dict(TranslationMemoryEntry.objects.filter(
+            source_hash__in=hashes,
+            target_language=self.target_language,
+            model=self.model,
+        ).values_list('source_hash', 'translation'))
+
+        if entries:
+            TranslationMemoryEntry.objects.filter(
+                source_hash__in=entries.keys(),
+                target_language=self.target_language,
+                model=self.model,
+            ).update(hits=F('hits') + 1, last_used=timezone.now())
+
+        with _stats_lock:
+            _stats['hits'] += len(entries)
+            _stats['misses'] += len(hashes) - len(entries)
+        return entries
+
+    def store(self, pairs: List[Tuple[str, str]]):
+        """
+        Save (source text, translation) pairs and evict the least recently used entries when due.
+        """
+        now = timezone.now()
+        entries = {}
+        for source, translation in pairs:
+            if normalize_text(source):
+                entries[hash_text(source)] = TranslationMemoryEntry(
+                    source_hash=hash_text(source),
+                    source_text=normalize_text(source),
+                    target_language=self.target_language,
+                    model=self.model,
+                    translation=translation,
+                    last_used=now,
+                )
+        if not entries:
+            return
+
+        TranslationMemoryEntry.objects.bulk_create(
+            entries.values(),
+            update_conflicts=True,
+            unique_fields=['source_hash', 'target_language', 'model'],
+            update_fields=['translation', 'last_used'],
+        )
+        if self._eviction_due():
+            self.evict()
+
+    @staticmethod
+    def _eviction_due() -> bool:
+        global _last_eviction
+        now = time.monotonic()
+        with _stats_lock:
+            if _last_eviction is not None and now - _last_eviction < TRANSLATION_MEMORY_EVICT_INTERVAL:
+                return False
+            _last_eviction = now
+        return True
+
+    def evict(self) -> int:
+        """
+        Delete the least recently used entries beyond `max_entries`, by primary key and in
+        batches, so entries sharing the cutoff's timestamp within the limit are kept.
+        """
+        overflow = TranslationMemoryEntry.objects.count() - self.max_entries
+        if overflow <= 0:
+            return 0
+
+        stale = list(TranslationMemoryEntry.objects.order_by('last_used', 'pk').values_list('pk', flat=True)[:overflow])
+        for start in range(0, len(stale), TRANSLATION_MEMORY_EVICT_BATCH):
+            TranslationMemoryEntry.objects.filter(pk__in=stale[start:start + TRANSLATION_MEMORY_EVICT_BATCH]).delete()
+        return len(stale)
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+from asgiref.sync import sync_to_async
+
+from apps.clients import anthropic_client, async_anthropic_client
+from apps.exceptions import SubtitleError
+from apps.metrics import record_translation_usage, timed
+from apps.constants import (
+    TRANSLATION_MODEL,
+    TRANSLATION_WINDOW_SIZE,
+    TRANSLATION_CONTEXT_SIZE,
+    TRANSLATION_MAX_WORKERS,
+    TRANSLATION_LINE_RETRIES,
+)
+from apps.services.translation_memory import TranslationMemory, hash_text, normalize_text
+from apps.utils import parse_srt, format_srt
+
+
+def build_windows(indexes: List[int], size: int = TRANSLATION_WINDOW_SIZE) -> List[List[int]]:
+    """
+    Split sorted cue indexes into windows of at most `size` adjacent cues. A gap (cues
+    answered from the translation memory) always starts a new window, so the lines of
+    a window and its context are neighbours in the subtitle.
+    """
+    windows: List[List[int]] = []
+    for index in indexes:
+        window = windows[-1] if windows else None
+        if window and window[-1] + 1 == index and len(window) < size:
+            window.append(index)
+        else:
+            windows.append([index])
+    return windows
+
+
+class TranslationService:
+    """
+    Translates SRT subtitles window by window. Every window is an independent,
+    stateless request carrying a few neighbouring cues as context, so windows
+    can be translated concurrently and cost grows linearly with subtitle length.
+    Timings are taken from the source and never sent to the model, and cues
+    found in the translation memory are not sent at all.
+
+    `atranslate` is the asyncio counterpart used by the async API: windows are
+    awaited on one pooled AsyncAnthropic client instead of occupying threads.
+    """
+
+    def __init__(self, api_key: str, model: str = TRANSLATION_MODEL, use_memory: bool = True):
+        self.api_key = api_key
+        self.model = model
+        self.use_memory = use_memory
+
+    @property
+    def client(self):
+        return anthropic_client(self.api_key)
+
+    @property
+    def async_client(self):
+        return async_anthropic_client(self.api_key)
+
+    def translate(self, srt_content: str, target_language: str, temperature: Optional[float],
+                  on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """Translate in concurrent windows, reporting `on_progress(done, total)` per translated window."""
+        cues = parse_srt(srt_content)
+        if not cues:
+            raise SubtitleError('No subtitle cues to translate')
+
+        texts = cues.texts()
+        memory = TranslationMemory(target_language, self.model) if self.use_memory else None
+        translations = self._initial_translations(texts, memory.lookup(texts) if memory else {})
+        missing = [index for index, translation in enumerate(translations) if translation is None]
+        windows = build_windows(missing)
+        done = 0
+        lock = threading.Lock()
+
+        def translate_window(window: List[int]) -> List[str]:
+            nonlocal done
+            translated = self._translate_window(texts, window, target_language, temperature)
+            with lock:
+                done += 1
+                if on_progress:
+                    on_progress(done, len(windows))
+            return translated
+
+        with ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS) as executor:
+            translated_windows = list(executor.map(translate_window, windows))
+
+        self._fill(translations, windows, translated_windows)
+        if memory:
+            memory.store([(texts[index], translations[index]) for index in missing])
+
+        return format_srt(cues.with_texts(translations))
+
+    async def atranslate(self, srt_content: str, target_language: str, temperature: Optional[float]) -> str:
+        cues = parse_srt(srt_content)
+        if not cues:
+            raise SubtitleError('No subtitle cues to translate')
+
+        texts = cues.texts()
+        memory = TranslationMemory(target_language, self.model) if self.use_memory else None
+        cached = await sync_to_async(memory.lookup)(texts) if memory else {}
+        translations = self._initial_translations(texts, cached)
+        missing = [index for index, translation in enumerate(translations) if translation is None]
+        windows = build_windows(missing)
+
+        # Same per-subtitle fan-out as the threaded path, to stay within the API rate limits
+        semaphore = asyncio.Semaphore(TRANSLATION_MAX_WORKERS)
+
+        async def translate_window(window: List[int]) -> List[str]:
+            async with semaphore:
+                return await self._atranslate_window(texts, window, target_language, temperature)
+
+        translated_windows = await asyncio.gather(*map(translate_window, windows))
+
+        self._fill(translations, windows, translated_windows)
+        if memory:
+            await sync_to_async(memory.store)([(texts[index], translations[index]) for index in missing])
+
+        return format_srt(cues.with_texts(translations))
+
+    @staticmethod
+    def _initial_translations(texts: List[str], cached: Dict[str, str]) -> List[Optional[str]]:
+        """Translations known without asking the model; None marks the cues still to translate."""
+        return [cached.get(hash_text(text)) if normalize_text(text) else '' for text in texts]
+
+    @staticmethod
+    def _fill(translations: List[Optional[str]], windows: List[List[int]], translated_windows: List[List[str]]):
+        for window, translated in zip(windows, translated_windows):
+            for index, text in zip(window, translated):
+                translations[index] = text
+
+    def _translate_window(self, texts: List[str], window: List[int], target_language: str,
+                          temperature: Optional[float], retries: int = TRANSLATION_LINE_RETRIES) -> List[str]:
+        """
+        Translate one window. A malformed reply is retried as two half windows, down
+        to single lines, so one bad reply never discards the other windows' work.
+        """
+        try:
+            with timed('translate_window', model=self.model, lines=len(window)):
+                response = self.client.messages.create(
+                    **self._window_request(texts, window, target_language, temperature))
+            record_translation_usage(self.model, getattr(response, 'usage', None))
+            return self._parse_window_reply(response.content[0].text, len(window))
+        except SubtitleError:
+            if len(window) > 1:
+                middle = len(window) // 2
+                return (self._translate_window(texts, window[:middle], target_language, temperature)
+                        + self._translate_window(texts, window[middle:], target_language, temperature))
+            if retries:
+                return self._translate_window(texts, window, target_language, temperature, retries - 1)
+            raise
+
+    async def _atranslate_window(self, texts: List[str], window: List[int], target_language: str,
+                                 temperature: Optional[float], retries: int = TRANSLATION_LINE_RETRIES) -> List[str]:
+        """Asyncio counterpart of `_translate_window`."""
+        try:
+            with timed('translate_window', model=self.model, lines=len(window)):
+                response = await self.async_client.messages.create(
+                    **self._window_request(texts, window, target_language, temperature))
+            record_translation_usage(self.model, getattr(response, 'usage', None))
+            return self._parse_window_reply(response.content[0].text, len(window))
+        except SubtitleError:
+            if len(window) > 1:
+                middle = len(window) // 2
+                return (await self._atranslate_window(texts, window[:middle], target_language, temperature)
+                        + await self._atranslate_window(texts, window[middle:], target_language, temperature))
+            if retries:
+                return await self._atranslate_window(texts, window, target_language, temperature, retries - 1)
+            raise
+
+    def _window_request(self, texts: List[str], window: List[int], target_language: str,
+                        temperature: Optional[float]) -> Dict[str, Any]:
+        lines = [texts[index] for index in window]
+        start, end = window[0], window[-1] + 1
+        system_prompt = (
+            f"Translate subtitle lines into {target_language}. "
+            'The input is JSON with keys "before", "lines" and "after". '
+            'Only "lines" must be translated; "before" and "after" are neighbouring lines given as context. '
+            'Output JSON with the key "translations": a list with exactly one translated string per input line, '
+            'in the same order. Example: {"translations": ["First line", "Second line"]}'
+        )
+        message = orjson.dumps({
+            'before': texts[max(0, start - TRANSLATION_CONTEXT_SIZE):start],
+            'lines': lines,
+            'after': texts[end:end + TRANSLATION_CONTEXT_SIZE],
+        }).decode()
+
+        kwargs = {'temperature': temperature} if temperature is not None else {}
+        return dict(
+            model=self.model,
+            system=system_prompt,
+            max_tokens=4096,
+            messages=[{'role': 'user', 'content': message}],
+            **kwargs,
+        )
+
+    @staticmethod
+    def _parse_window_reply(reply: str, count: int) -> List[str]:
+        try:
+            translations = orjson.loads(reply)['translations']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            raise SubtitleError(f"Failed to decode translation: {reply}")
+
+        if len(translations) != count:
+            raise SubtitleError(f"Expected {count} translated lines, got {len(translations)}")
+        return [str(text).strip() for text in translations]
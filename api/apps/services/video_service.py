@@ -1,90 +1,235 @@
 import datetime
 import os
+import threading
 import urllib.request
-from tempfile import NamedTemporaryFile
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import yt_dlp
 from PIL import Image
 from django.core.exceptions import ValidationError
-from django.core.files import File
+from django.db import close_old_connections
 import ffmpy
 
-from apps.models import YouTubeVideo, Settings
+from apps.models import MediaBlob, YouTubeVideo, Settings
 from apps.exceptions import VideoProcessingError
-from apps.constants import AUDIO_CODECS
+from apps.metrics import timed
+from apps.services.media_store import store_media
+from apps.utils import file_size
+from apps.workspace import Workspace, check_size_limit, workspace
+from apps.constants import AUDIO_CODECS, COPYABLE_AUDIO_CODECS, INGEST_CONCURRENCY
+
+WATCH_URL = 'https://www.youtube.com/watch?v={}'
+
+
+def download_progress_hook(on_progress: Callable[[int, int], None]) -> Callable[[Dict[str, Any]], None]:
+    """
+    yt-dlp progress hook reporting the downloaded percentage of all streams. A
+    video-only or audio-only stream is one of the two streams merged into the video.
+    """
+    finished = set()
+
+    def hook(status: Dict[str, Any]):
+        info = status.get('info_dict') or {}
+        streams = 2 if 'none' in (info.get('vcodec'), info.get('acodec')) else 1
+        if status['status'] == 'finished':
+            finished.add(status.get('filename'))
+            fraction = 0.0
+        else:
+            total = status.get('total_bytes') or status.get('total_bytes_estimate')
+            fraction = min(1.0, status.get('downloaded_bytes', 0) / total) if total else 0.0
+        on_progress(int(min(streams, len(finished) + fraction) * 100), streams * 100)
+
+    return hook
 
 
 class VideoService:
     def __init__(self):
-        self.settings = Settings.objects.first()
+        self.settings = Settings.load()
         if not self.settings:
             raise ValidationError('Settings not found')
 
-    def download_video(self, url: str) -> Dict[str, Any]:
-        ydl_opts = {
-            'format': f"bestvideo[height<={self.settings.max_video_height}]+bestaudio/best[height<={self.settings.max_video_height}]/best",
-            'merge_output_format': 'mp4',
-            'outtmpl': '%(id)s.%(ext)s',
-        }
-
+    def download_video(self, url: str,
+                       on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                video_id = info.get("id", None)
-                video_path = ydl.prepare_filename(info)
+            with workspace('download') as scratch:
+                ydl_opts = {
+                    'format': f"bestvideo[height<={self.settings.max_video_height}]+bestaudio/best[height<={self.settings.max_video_height}]/best",
+                    'merge_output_format': 'mp4',
+                    'outtmpl': scratch.file('%(id)s.%(ext)s'),
+                    # Keep the separately downloaded streams so audio is taken from its own stream
+                    'keepvideo': True,
+                    'max_filesize': scratch.remaining(),
+                }
+                if on_progress:
+                    ydl_opts['progress_hooks'] = [download_progress_hook(on_progress)]
+
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    with timed('download', url=url) as record:
+                        info = ydl.extract_info(url, download=True)
+                        video_id = info.get("id", None)
+                        video_path = ydl.prepare_filename(info)
+                        # No media_seconds: the speed histogram is for ffmpeg stages, and the
+                        # download's throughput is in its bytes
+                        record.update(video_id=video_id, bytes=file_size(video_path))
+                    scratch.check()
 
-                video = self._process_video(video_id, info, video_path)
-                return {'video_id': video.video_id}
+                    video = self._process_video(scratch, video_id, info, video_path)
+                    return {'video_id': video.video_id}
 
         except Exception as e:
             raise VideoProcessingError(f"Failed to download video: {str(e)}")
 
-    def _process_video(self, video_id: str, info: Dict[str, Any], video_path: str) -> YouTubeVideo:
-        thumbnail_path = self._download_thumbnail(video_id, info.get('thumbnail'))
-        audio_path = self._extract_audio(video_id, video_path)
+    def ingest(self, urls: List[str], video_ids: List[str], concurrency: int = INGEST_CONCURRENCY,
+               on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Download every video behind `urls` (videos, playlists or channels) and `video_ids`,
+        at most `concurrency` at a time. URLs are expanded without downloading anything,
+        videos that are already stored are skipped, and one failing item never stops
+        the others; the status of every item is returned.
+        """
+        items: List[Dict[str, Any]] = []
+        pending: Dict[str, None] = dict.fromkeys(video_ids)
+
+        with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist', 'quiet': True}) as ydl:
+            for url in urls:
+                try:
+                    pending.update(dict.fromkeys(self._collect_video_ids(ydl, ydl.extract_info(url, download=False))))
+                except Exception as e:
+                    items.append({'url': url, 'status': 'failed', 'error': f"Failed to expand URL: {str(e)}"})
+
+        existing = set(YouTubeVideo.objects.filter(video_id__in=pending).values_list('video_id', flat=True))
+        items.extend({'video_id': video_id, 'status': 'skipped'} for video_id in pending if video_id in existing)
+        to_download = [video_id for video_id in pending if video_id not in existing]
+
+        done = 0
+        lock = threading.Lock()
 
+        def download(video_id: str) -> Dict[str, Any]:
+            nonlocal done
+            close_old_connections()
+            try:
+                self.download_video(WATCH_URL.format(video_id))
+                item = {'video_id': video_id, 'status': 'downloaded'}
+            except Exception as e:
+                item = {'video_id': video_id, 'status': 'failed', 'error': str(e)}
+            finally:
+                close_old_connections()
+            with lock:
+                done += 1
+                if on_progress:
+                    on_progress(done, len(to_download))
+            return item
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            items.extend(executor.map(download, to_download))
+
+        return {
+            'items': items,
+            **{status: sum(item['status'] == status for item in items)
+               for status in ('downloaded', 'skipped', 'failed')},
+        }
+
+    def _collect_video_ids(self, ydl: yt_dlp.YoutubeDL, info: Dict[str, Any], depth: int = 0) -> List[str]:
+        """
+        Video ids of a flat `extract_info` result. Channel pages list their tabs as
+        unresolved URL entries, which are resolved one level further.
+        """
+        if info.get('entries') is not None:
+            return [video_id for entry in info['entries'] if entry
+                    for video_id in self._collect_video_ids(ydl, entry, depth + 1)]
+        if info.get('_type') == 'url' and info.get('ie_key') != 'Youtube':
+            if depth > 2:
+                return []
+            return self._collect_video_ids(ydl, ydl.extract_info(info['url'], download=False), depth + 1)
+        return [info['id']]
+
+    def _process_video(self, scratch: Workspace, video_id: str, info: Dict[str, Any],
+                       video_path: str) -> YouTubeVideo:
+        # Files stay in the workspace and are removed with it
+        thumbnail_path = self._download_thumbnail(scratch, video_id, info.get('thumbnail'))
+        audio_stream = self._audio_stream(info, self._stream_paths(info, video_path))
+        if audio_stream:
+            audio_path = self._extract_audio(scratch, video_id, *audio_stream, media_seconds=info.get('duration'))
+        else:
+            audio_path = self._extract_audio(scratch, video_id, video_path, media_seconds=info.get('duration'))
+        scratch.check()
+
+        # Media is stored under content addresses, so re-imported files are not uploaded again
+        names = []
         try:
-            with (
-                open(video_path, 'rb') as video_file,
-                open(thumbnail_path, 'rb') as thumb_file,
-                open(audio_path, 'rb') as audio_file
-            ):
-                video = YouTubeVideo.objects.create(
-                    video_id=video_id,
-                    thumbnail=File(thumb_file),
-                    duration=datetime.timedelta(seconds=info.get('duration', 0)),
-                    width=info.get('width', None),
-                    height=info.get('height', None),
-                    title=info.get('title', None),
-                    original_video=File(video_file),
-                    audio=File(audio_file),
-                )
-        finally:
-            # Clean up temporary files
-            for path in [thumbnail_path, audio_path, video_path]:
-                if os.path.exists(path):
-                    os.remove(path)
-
-        return video
-
-    def _download_thumbnail(self, video_id: str, thumbnail_url: str) -> str:
-        thumbnail_path = f'{video_id}.jpg'
-        with NamedTemporaryFile(delete=False) as temp_file:
-            with urllib.request.urlopen(thumbnail_url) as response:
-                temp_file.write(response.read())
-            temp_file.flush()
-            with Image.open(temp_file.name) as img:
+            for field, path in (('thumbnail', thumbnail_path), ('original_video', video_path), ('audio', audio_path)):
+                names.append(store_media(path, YouTubeVideo._meta.get_field(field).upload_to))
+            thumbnail, original_video, audio = names
+            return YouTubeVideo.objects.create(
+                video_id=video_id,
+                thumbnail=thumbnail,
+                duration=datetime.timedelta(seconds=info.get('duration', 0)),
+                width=info.get('width', None),
+                height=info.get('height', None),
+                title=info.get('title', None),
+                original_video=original_video,
+                audio=audio,
+            )
+        except Exception:
+            MediaBlob.release(names)
+            raise
+
+    @staticmethod
+    def _stream_paths(info: Dict[str, Any], video_path: str) -> List[str]:
+        """
+        Files of the separately downloaded streams that yt-dlp merged into `video_path`,
+        named `<name>.f<format_id>.<ext>` by yt-dlp.
+        """
+        base = os.path.splitext(video_path)[0]
+        return [fmt.get('filepath') or f"{base}.f{fmt['format_id']}.{fmt['ext']}"
+                for fmt in info.get('requested_formats') or []]
+
+    @staticmethod
+    def _audio_stream(info: Dict[str, Any], stream_paths: List[str]) -> Optional[Tuple[str, str]]:
+        """Path and codec of the downloaded audio-only stream, if there is one on disk."""
+        for fmt, path in zip(info.get('requested_formats') or [], stream_paths):
+            if fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none') and os.path.exists(path):
+                return path, fmt['acodec']
+        return None
+
+    def _download_thumbnail(self, scratch: Workspace, video_id: str, thumbnail_url: str) -> str:
+        download_path = scratch.file(f'{video_id}.thumbnail')
+        thumbnail_path = scratch.file(f'{video_id}.jpg')
+        with timed('thumbnail', video_id=video_id):
+            with urllib.request.urlopen(thumbnail_url) as response, open(download_path, 'wb') as f:
+                f.write(response.read())
+            with Image.open(download_path) as img:
                 img.save(thumbnail_path)
         return thumbnail_path
 
-    def _extract_audio(self, video_id: str, video_path: str) -> str:
-        audio_path = f'{video_id}.m4a'
-        audio_codec = AUDIO_CODECS['AAC_HE_V2'] if self.settings.use_he_aac_v2 else AUDIO_CODECS['AAC']
+    def _extract_audio(self, scratch: Workspace, video_id: str, source_path: str,
+                       source_codec: Optional[str] = None, media_seconds: Optional[float] = None) -> str:
+        """
+        Write the audio rendition from `source_path`, normally the downloaded audio-only stream
+        so the merged video is never read again. With `copy_audio_stream` enabled, AAC and Opus
+        streams are stored as they are instead of being re-encoded.
+        """
+        codec = (source_codec or '').split('.')[0]
+        if self.settings.copy_audio_stream and codec in COPYABLE_AUDIO_CODECS:
+            audio_path = scratch.file(f'{video_id}{COPYABLE_AUDIO_CODECS[codec]}')
+            options = '-y -c:a copy -vn'
+        else:
+            audio_path = scratch.file(f'{video_id}.m4a')
+            audio_codec = AUDIO_CODECS['AAC_HE_V2'] if self.settings.use_he_aac_v2 else AUDIO_CODECS['AAC']
+            options = f'-y -c:a {audio_codec["codec"]} -b:a {audio_codec["bitrate"]} -vn'
+
+        limit = scratch.size_limit()
+        if limit is not None:
+            options += f' -fs {limit}'
 
         ff = ffmpy.FFmpeg(
-            inputs={video_path: None},
-            outputs={audio_path: f'-y -c:a {audio_codec["codec"]} -b:a {audio_codec["bitrate"]} -vn'}
+            inputs={source_path: None},
+            outputs={audio_path: options}
         )
-        ff.run()
+        with timed('extract_audio', video_id=video_id, codec=source_codec, copy='copy' in options,
+                   media_seconds=media_seconds) as record:
+            ff.run()
+            record['bytes'] = file_size(audio_path)
+        check_size_limit(audio_path, limit)
         return audio_path
@@ -1,30 +1,84 @@
+import os
+from typing import Iterable, List, Tuple, Union
+
+from django.core.files.storage import default_storage
+from storages.backends.s3 import S3Storage
+
+from apps.constants import MEDIA_SOURCE_URL_EXPIRE
+from apps.cues import Cue, CueList, canonical_srt_to_vtt
+
+
 def srt_to_webvtt(srt_content: str) -> str:
     """
     Convert the given SRT content to WebVTT format and return as a string.
+    Canonical SRT is converted by string slicing alone, anything else is parsed.
+    """
+    return canonical_srt_to_vtt(srt_content) or CueList.parse(srt_content).to_vtt()
+
+
+def parse_srt(srt_content: str) -> CueList:
+    """
+    Parse SRT content into a compact cue list, skipping blocks without a valid time range.
+    """
+    return CueList.parse(srt_content)
+
+
+def format_srt(cues: Union[CueList, Iterable[Cue]]) -> str:
+    """
+    Serialize cues as SRT content, numbering them from 1.
+    """
+    return (cues if isinstance(cues, CueList) else CueList.from_cues(cues)).to_srt()
+
+
+def slice_cues(cues: CueList, start: int, end: int) -> CueList:
+    """
+    Return the cues overlapping [start, end) milliseconds, clipped to that range
+    and shifted so that `start` becomes zero.
     """
-    blocks = srt_content.strip().split('\n\n')
-    vtt_lines = ['WEBVTT', '']  # Start with WEBVTT header and a blank line
+    return cues.slice(start, end)
+
+
+def media_source(field_file) -> str:
+    """
+    Return something ffmpeg can read a stored file from without copying it first:
+    the local path for filesystem storages, or a signed URL for remote ones.
+    """
+    try:
+        return field_file.path
+    except NotImplementedError:
+        return field_file.storage.url(field_file.name, expire=MEDIA_SOURCE_URL_EXPIRE)
+
 
-    for block in blocks:
-        lines = block.split('\n')
+def file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
 
-        # SRT block typically has:
-        #   1                 (subtitle number)
-        #   00:00:01,000 --> 00:00:04,000
-        #   Subtitle text line 1
-        #   Subtitle text line 2 (optional)
-        if len(lines) < 2:
-            continue  # skip if block doesn't have enough lines
 
-        # The second line is the time range, convert commas to periods
-        time_line = lines[1].replace(',', '.')
+def ffmpeg_input_options(source: str) -> str:
+    """
+    Input options for `media_source` results; remote inputs reconnect on dropped connections.
+    """
+    return '-reconnect 1 -reconnect_delay_max 5' if source.startswith(('http://', 'https://')) else ''
 
-        # The rest of the lines are subtitle text
-        text_lines = lines[2:]
 
-        vtt_lines.append(time_line)
-        vtt_lines.extend(text_lines)
-        vtt_lines.append('')  # blank line between cues in VTT
+def download_url(name: str, filename: str, expire: int, inline: bool = False) -> str:
+    """
+    Signed URL that downloads a stored file as `filename`, or with `inline` lets the
+    browser play it in place. Storages without signing (local development) just
+    return their regular URL.
+    """
+    if isinstance(default_storage, S3Storage):
+        disposition = 'inline' if inline else 'attachment'
+        return default_storage.url(name, parameters={
+            'ResponseContentDisposition': f'{disposition}; filename="{filename}"',
+        }, expire=expire)
+    return default_storage.url(name)
 
-    # Join everything with newlines
-    return '\n'.join(vtt_lines)
+
+def stitch_srt(segments: List[Tuple[float, str]]) -> str:
+    """
+    Concatenate SRT documents transcribed from consecutive audio segments.
+    Each item is (offset in seconds, SRT content); cue times are shifted by
+    the offset and cues are renumbered from 1.
+    """
+    return format_srt(CueList.join(
+        parse_srt(srt_content).shifted(round(offset_seconds * 1000)) for offset_seconds, srt_content in segments))
@@ -1,3 +1,26 @@
-from django.shortcuts import render
+import mimetypes
 
-# Create your views here.
+from django.core.files.storage import default_storage, FileSystemStorage
+from django.http import Http404, HttpResponse
+
+from apps.metrics import CONTENT_TYPE, REGISTRY
+from apps.responses import media_response
+
+
+def serve_media(request, path: str):
+    """
+    Serve files of a local filesystem storage (development only; S3 serves its own media).
+    """
+    if not isinstance(default_storage, FileSystemStorage) or not default_storage.exists(path):
+        raise Http404()
+
+    size = default_storage.size(path)
+    modified = default_storage.get_modified_time(path)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    return media_response(request, default_storage.open(path, 'rb'), content_type, size=size,
+                          etag=f'{size:x}-{int(modified.timestamp()):x}', last_modified=modified)
+
+
+def metrics(request):
+    """Stage timings, transferred bytes and token usage of this process in the Prometheus text format."""
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+from apps.exceptions import WorkspaceError
+
+UNSAFE_NAME_PATTERN = re.compile(r'[^\w.-]+')
+
+
+class Workspace:
+    """
+    A private scratch directory under SCRATCH_ROOT. Concurrent jobs, even on the
+    same video, never share file names, and everything is removed when the
+    `workspace` block exits.
+    """
+
+    def __init__(self, path: Path, quota: int = 0, min_free: int = 0):
+        self.path = Path(path)
+        self.quota = quota
+        self.min_free = min_free
+
+    def file(self, name: str) -> str:
+        return str(self.path / name)
+
+    def usage(self) -> int:
+        return sum(entry.stat().st_size for entry in self.path.rglob('*') if entry.is_file())
+
+    def remaining(self) -> Optional[int]:
+        """Bytes left before the quota is exceeded, None without a quota."""
+        return max(0, self.quota - self.usage()) if self.quota else None
+
+    def size_limit(self, share: int = 1) -> Optional[int]:
+        """
+        Bytes each of `share` outputs written side by side may take, None without a quota.
+        Passed to ffmpeg as `-fs` so the quota holds while it writes, not only afterwards.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        if remaining // share < 1:
+            raise WorkspaceError(f"Workspace {self.path.name} has used up its quota of {self.quota}")
+        return remaining // share
+
+    def reserve(self, size: int):
+        """Raise WorkspaceError before writing `size` bytes that do not fit into the quota."""
+        remaining = self.remaining()
+        if remaining is not None and size > remaining:
+            raise WorkspaceError(f"Workspace {self.path.name} has {remaining} bytes left of its quota of "
+                                 f"{self.quota}, {size} required")
+
+    def check(self):
+        """Raise WorkspaceError once the quota is exceeded or the scratch disk runs low."""
+        if self.quota and (used := self.usage()) > self.quota:
+            raise WorkspaceError(f"Workspace {self.path.name} uses {used} bytes, over its quota of {self.quota}")
+        if self.min_free and (free := shutil.disk_usage(self.path).free) < self.min_free:
+            raise WorkspaceError(f"Only {free} bytes left on the scratch disk, {self.min_free} required")
+
+
+def ffmpeg_size_limit(limit: Optional[int]) -> str:
+    """ffmpeg output option for a `Workspace.size_limit`."""
+    return f'-fs {limit}' if limit is not None else ''
+
+
+def check_size_limit(path: str, limit: Optional[int]):
+    """ffmpeg stops at its `-fs` limit without failing, so an output that reached it was cut off."""
+    if limit is not None and os.path.exists(path) and os.path.getsize(path) >= limit:
+        raise WorkspaceError(f"{os.path.basename(path)} was cut off at the {limit} bytes left of its workspace quota")
+
+
+@contextmanager
+def workspace(name: str) -> Iterator[Workspace]:
+    """Create a unique directory for one job under SCRATCH_ROOT and remove it afterwards."""
+    root = Path(settings.SCRATCH_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    path = Path(tempfile.mkdtemp(prefix=f"{UNSAFE_NAME_PATTERN.sub('_', name)}-", dir=root))
+    try:
+        scratch = Workspace(path, settings.SCRATCH_QUOTA, settings.SCRATCH_MIN_FREE)
+        scratch.check()
+        yield scratch
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def sweep_workspaces(max_age: float) -> int:
+    """Remove workspaces older than `max_age` seconds, left behind by killed processes."""
+    root = Path(settings.SCRATCH_ROOT)
+    if not root.is_dir():
+        return 0
+
+    removed = 0
+    cutoff = time.time() - max_age
+    for path in root.iterdir():
+        if path.is_dir() and path.stat().st_mtime < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
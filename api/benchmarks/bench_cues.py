@@ -0,0 +1,93 @@
+"""
+Compare the array-backed cue parser with the previous split-based SRT handling.
+
+    uv run python -m benchmarks.bench_cues --cues 10000 --output cues.json
+"""
+import argparse
+import re
+import sys
+import timeit
+
+from apps.cues import CueList, canonical_srt_to_vtt, format_timestamp
+from benchmarks.harness import Report
+
+SRT_TIMESTAMP_PATTERN = re.compile(r'(\d+):(\d{2}):(\d{2})[,.](\d{3})')
+
+
+def make_srt(count: int) -> str:
+    return '\n\n'.join(
+        f'{i + 1}\n{format_timestamp(i * 2000)} --> {format_timestamp(i * 2000 + 1500)}\n'
+        f'Subtitle line number {i}\nwith a second line'
+        for i in range(count)) + '\n'
+
+
+def legacy_srt_to_webvtt(srt_content: str) -> str:
+    """The split-based conversion CueList replaced."""
+    blocks = srt_content.strip().split('\n\n')
+    vtt_lines = ['WEBVTT', '']
+    for block in blocks:
+        lines = block.split('\n')
+        if len(lines) < 2:
+            continue
+        vtt_lines.append(lines[1].replace(',', '.'))
+        vtt_lines.extend(lines[2:])
+        vtt_lines.append('')
+    return '\n'.join(vtt_lines)
+
+
+def legacy_parse(srt_content: str) -> list:
+    """Split-based parsing into (start, end, text) tuples with per-timestamp regex parsing."""
+    cues = []
+    for block in srt_content.strip().split('\n\n'):
+        lines = block.split('\n')
+        if len(lines) >= 2 and '-->' in lines[1]:
+            start, end = (
+                (lambda h, m, s, ms: ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(ms))(
+                    *SRT_TIMESTAMP_PATTERN.search(value).groups())
+                for value in lines[1].split('-->'))
+            cues.append((start, end, '\n'.join(lines[2:])))
+    return cues
+
+
+def measure(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cues', type=int, default=10_000)
+    parser.add_argument('--number', type=int, default=10)
+    parser.add_argument('--output', help='Write the JSON report to this file, - for stdout')
+    args = parser.parse_args(argv)
+
+    content = make_srt(args.cues)
+    cues = CueList.parse(content)
+    results = {
+        'legacy parse': measure(lambda: legacy_parse(content), args.number),
+        'CueList.parse': measure(lambda: CueList.parse(content), args.number),
+        'legacy srt_to_webvtt': measure(lambda: legacy_srt_to_webvtt(content), args.number),
+        'CueList.parse + to_vtt': measure(lambda: CueList.parse(content).to_vtt(), args.number),
+        'canonical_srt_to_vtt': measure(lambda: canonical_srt_to_vtt(content), args.number),
+        'CueList.to_srt': measure(cues.to_srt, args.number),
+    }
+
+    print(f'{args.cues} cues, {len(content) / 1024:.0f} KiB')
+    for name, millis in results.items():
+        print(f'{name:<24} {millis:8.2f} ms')
+
+    legacy = legacy_parse(content)
+    legacy_size = sys.getsizeof(legacy) + sum(sys.getsizeof(cue) + sum(map(sys.getsizeof, cue)) for cue in legacy)
+    compact_size = sum(sys.getsizeof(part) for part in (cues.starts, cues.ends, cues.offsets, cues.buffer))
+    print(f'{"legacy cues size":<24} {legacy_size / 1024:8.0f} KiB')
+    print(f'{"CueList size":<24} {compact_size / 1024:8.0f} KiB')
+
+    report = Report('cues', {'cues': args.cues, 'number': args.number})
+    report.results = [{'name': name, 'min_ms': round(millis, 4), 'runs': args.number * 5}
+                      for name, millis in results.items()]
+    report.results += [{'name': 'legacy cues size', 'kib': round(legacy_size / 1024)},
+                       {'name': 'CueList size', 'kib': round(compact_size / 1024)}]
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
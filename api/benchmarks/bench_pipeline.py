@@ -0,0 +1,261 @@
+"""
+Benchmark the pipeline offline against a local media directory and fake model backends.
+
+    uv run python -m benchmarks.bench_pipeline --rows 10000 --output results.json
+
+A local directory stands in for the S3 bucket unless `--s3-endpoint` names an S3-compatible
+server (e.g. `moto_server -p 5000` or MinIO); only then are uploads, media cache downloads
+and ffmpeg reading signed URLs part of the timings. Reports record the storage in `params`.
+
+Suites: webvtt (srt_to_webvtt on large files), translation (window fan-out and
+reassembly with a fake Anthropic client), transcription (a fake Whisper client),
+listing (GET /api/videos and /api/subtitles over `--rows` rows) and burn (short
+synthetic ffmpeg burns; skipped when ffmpeg is not installed).
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+
+from benchmarks.fakes import (
+    FakeAnthropic,
+    FakeAsyncAnthropic,
+    FakeAsyncOpenAI,
+    FakeOpenAI,
+    local_storages,
+    make_srt,
+    s3_storages,
+)
+from benchmarks.harness import Report, measure
+
+SUITES = ('webvtt', 'translation', 'transcription', 'listing', 'burn')
+
+
+def setup_django(workdir: Path, s3_endpoint: Optional[str] = None):
+    """
+    Configure the project against a fresh SQLite database in `workdir`, and media in a
+    directory there or in a new bucket of the `s3_endpoint` server.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wandlung.settings')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_STORAGE_BUCKET_NAME'):
+        os.environ.setdefault(name, 'benchmark')
+
+    import django
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.DATABASES['default']['NAME'] = workdir / 'db.sqlite3'
+    if s3_endpoint:
+        settings.STORAGES = s3_storages(settings.STORAGES, s3_endpoint, f'wandlung-benchmark-{uuid.uuid4().hex[:12]}')
+    else:
+        settings.STORAGES = local_storages(settings.STORAGES, workdir / 'media')
+    settings.SCRATCH_ROOT = workdir / 'scratch'
+    # Every run starts with a cold media cache
+    settings.MEDIA_CACHE_ROOT = workdir / 'media-cache'
+    settings.LOGGING['loggers']['wandlung']['level'] = 'WARNING'
+    django.setup()
+
+    from django.core.management import call_command
+    from apps.models import Settings
+
+    call_command('migrate', verbosity=0)
+    Settings.objects.create(openai_api_key='benchmark', anthropic_api_key='benchmark')
+    if s3_endpoint:
+        from django.core.files.storage import default_storage
+        default_storage.bucket.create()
+
+
+def teardown_django(s3_endpoint: Optional[str] = None):
+    """Remove the benchmark bucket with everything stored in it."""
+    if s3_endpoint:
+        from django.core.files.storage import default_storage
+        default_storage.bucket.objects.all().delete()
+        default_storage.bucket.delete()
+
+
+def create_video(video_id: str, duration: float = 300.0, **files):
+    from django.core.files.base import ContentFile
+    from apps.models import YouTubeVideo
+
+    video = YouTubeVideo.objects.create(video_id=video_id, title=f'Video {video_id}',
+                                        duration=timedelta(seconds=duration), width=1280, height=720)
+    video.thumbnail.save(f'{video_id}.jpg', ContentFile(b'thumbnail'), save=False)
+    video.original_video.save(f'{video_id}.mp4', files.get('video', ContentFile(b'video')), save=False)
+    video.audio.save(f'{video_id}.m4a', files.get('audio', ContentFile(b'audio' * 200_000)), save=False)
+    video.save()
+    return video
+
+
+def bench_webvtt(report: Report, args):
+    from apps.utils import srt_to_webvtt
+
+    for cues in (1_000, args.cues):
+        content = make_srt(cues)
+        report.add(f'webvtt.srt_to_webvtt[{cues}]', measure(lambda: srt_to_webvtt(content), number=5),
+                   cues=cues, kib=round(len(content) / 1024))
+
+
+def bench_translation(report: Report, args):
+    from apps.services.translation_service import TranslationService
+
+    content = make_srt(args.translation_cues)
+    params = {'cues': args.translation_cues, 'latency_ms': args.latency * 1000}
+    with (
+        mock.patch('apps.services.translation_service.anthropic_client', return_value=FakeAnthropic(args.latency)),
+        mock.patch('apps.services.translation_service.async_anthropic_client',
+                   return_value=FakeAsyncAnthropic(args.latency)),
+    ):
+        service = TranslationService(api_key='benchmark', use_memory=False)
+        report.add('translation.translate', measure(lambda: service.translate(content, 'German', None), repeat=3),
+                   **params)
+        report.add('translation.atranslate',
+                   measure(lambda: asyncio.run(service.atranslate(content, 'German', None)), repeat=3), **params)
+
+        # Every cue is answered from the translation memory after the first run
+        memory_service = TranslationService(api_key='benchmark')
+        memory_service.translate(content, 'French', None)
+        report.add('translation.translate[memory]',
+                   measure(lambda: memory_service.translate(content, 'French', None), repeat=3), **params)
+
+
+def bench_transcription(report: Report, args):
+    from apps.services.subtitle_service import SubtitleService
+
+    create_video('transcribe')
+    params = {'latency_ms': args.latency * 1000}
+    with (
+        mock.patch('apps.services.subtitle_service.openai_client', return_value=FakeOpenAI(args.latency)),
+        mock.patch('apps.services.subtitle_service.async_openai_client', return_value=FakeAsyncOpenAI(args.latency)),
+    ):
+        service = SubtitleService()
+        report.add('transcription.transcribe_video', measure(lambda: service.transcribe_video('transcribe'), repeat=3),
+                   **params)
+        report.add('transcription.atranscribe_video',
+                   measure(lambda: asyncio.run(service.atranscribe_video('transcribe')), repeat=3), **params)
+
+
+def bench_listing(report: Report, args):
+    from django.test import Client
+    from apps.models import Subtitle, YouTubeVideo
+    from wandlung.storages import signed_url_cache
+
+    content = make_srt(args.listing_cues)
+    videos = YouTubeVideo.objects.bulk_create(
+        YouTubeVideo(video_id=f'v{i:08d}', title=f'Video {i}', duration=timedelta(minutes=5), width=1280, height=720,
+                     thumbnail=f'thumbnails/v{i:08d}.jpg', original_video=f'videos/v{i:08d}.mp4',
+                     audio=f'audios/v{i:08d}.m4a')
+        for i in range(args.rows))
+    Subtitle.objects.bulk_create(Subtitle(video=video, language='English', content=content) for video in videos)
+
+    client = Client()
+    last_page = -(-Subtitle.objects.count() // 100)
+    requests = {
+        'listing.videos': '/api/videos',
+        'listing.videos[limit=200]': '/api/videos?limit=200',
+        'listing.videos[fields=video_id,title]': '/api/videos?fields=video_id,title&limit=200',
+        'listing.subtitles': '/api/subtitles',
+        'listing.subtitles[last page]': f'/api/subtitles?page={last_page}',
+    }
+    for name, url in requests.items():
+        assert client.get(url).status_code == 200, url
+        report.add(name, measure(lambda: client.get(url), number=5), rows=args.rows)
+
+    def unsigned():
+        signed_url_cache.clear()
+        client.get('/api/videos?limit=200')
+
+    report.add('listing.videos[limit=200, cold signing]', measure(unsigned, number=5), rows=args.rows)
+
+
+def make_source_video(path: Path, seconds: float):
+    import ffmpy
+
+    ffmpy.FFmpeg(
+        global_options='-v error',
+        inputs={'testsrc=size=1280x720:rate=30': '-f lavfi', 'sine=frequency=440': '-f lavfi'},
+        outputs={str(path): f'-y -t {seconds} -c:v libx264 -preset ultrafast -g 60 -c:a aac -shortest'},
+    ).run()
+
+
+def bench_burn(report: Report, args):
+    if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+        for name in ('burn.burn_subtitle', 'burn.burn_subtitle[segments=4]', 'burn.burn_preview'):
+            report.skip(name, 'ffmpeg not installed')
+        return
+
+    from django.core.files import File
+    from django.core.files.storage import default_storage
+    from apps.models import Subtitle
+    from apps.services.subtitle_service import SubtitleService
+
+    source = Path('burn-source.mp4')
+    make_source_video(source, args.burn_seconds)
+    with source.open('rb') as f:
+        video = create_video('burn', duration=args.burn_seconds, video=File(f))
+    source.unlink()
+    subtitle = Subtitle.objects.create(video=video, language='English',
+                                       content=make_srt(int(args.burn_seconds // 2)))
+    service = SubtitleService()
+    params = {'media_seconds': args.burn_seconds}
+
+    def burn(**kwargs):
+        # Remove the stored result so every run encodes instead of returning the cached burn
+        default_storage.delete(service.burn_subtitle(subtitle.pk, **kwargs)['name'])
+
+    report.add('burn.burn_subtitle', measure(lambda: burn(start_seconds=None, end_seconds=None, preset='veryfast'),
+                                             repeat=3), **params)
+    report.add('burn.burn_subtitle[segments=4]',
+               measure(lambda: burn(start_seconds=None, end_seconds=None, preset='veryfast', segments=4), repeat=3),
+               **params)
+    report.add('burn.burn_preview',
+               measure(lambda: default_storage.delete(service.burn_preview(subtitle.pk, 5.0)['name']), repeat=3),
+               **params)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help='Suite to run, may be repeated (default: all)')
+    parser.add_argument('--output', help='Write the JSON report to this file, - for stdout')
+    parser.add_argument('--rows', type=int, default=10_000, help='Videos and subtitles for the listing suite')
+    parser.add_argument('--cues', type=int, default=20_000, help='Cues of the large WebVTT conversion')
+    parser.add_argument('--translation-cues', type=int, default=600)
+    parser.add_argument('--listing-cues', type=int, default=50, help='Cues per subtitle in the listing suite')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every fake model request takes')
+    parser.add_argument('--burn-seconds', type=float, default=10.0, help='Length of the synthetic burn source')
+    parser.add_argument('--s3-endpoint', help='S3-compatible server to store media in (default: a local directory)')
+    args = parser.parse_args(argv)
+
+    suites = args.suite or SUITES
+    storage = 's3' if args.s3_endpoint else 'filesystem'
+    report = Report('pipeline', {name: value for name, value in vars(args).items() if name not in ('suite', 'output')}
+                    | {'suites': list(suites), 'storage': storage})
+    if storage == 'filesystem':
+        print('Media is stored in a local directory, so S3 transfers are not measured; '
+              'pass --s3-endpoint to include them', file=sys.stderr)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='wandlung-bench-') as workdir:
+        # The synthetic burn source is generated in the working directory
+        os.chdir(workdir)
+        try:
+            setup_django(Path(workdir), args.s3_endpoint)
+            try:
+                for suite in suites:
+                    globals()[f'bench_{suite}'](report, args)
+            finally:
+                teardown_django(args.s3_endpoint)
+        finally:
+            os.chdir(cwd)
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare two benchmark reports, e.g. of the previous and the current release.
+
+    uv run python -m benchmarks.compare baseline.json current.json --threshold 10
+"""
+import argparse
+import sys
+
+import orjson
+
+
+def load(path: str) -> dict:
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def timings(report: dict) -> dict:
+    return {result['name']: result for result in report['results'] if 'min_ms' in result}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Percent slowdown of the best time reported as a regression')
+    args = parser.parse_args(argv)
+
+    baseline_report, current_report = load(args.baseline), load(args.current)
+    # Reports of local-directory and S3 runs time different code paths
+    storages = [report['params'].get('storage') for report in (baseline_report, current_report)]
+    if storages[0] != storages[1]:
+        print(f'Warning: the reports used different media storages ({storages[0]} and {storages[1]})', file=sys.stderr)
+
+    baseline, current = timings(baseline_report), timings(current_report)
+    regressions = 0
+    for name, result in current.items():
+        if name not in baseline:
+            print(f'{name:<40} {result["min_ms"]:10.2f} ms  (new)')
+            continue
+        change = (result['min_ms'] / baseline[name]['min_ms'] - 1) * 100 if baseline[name]['min_ms'] else 0.0
+        regressed = change > args.threshold
+        regressions += regressed
+        print(f'{name:<40} {baseline[name]["min_ms"]:10.2f} -> {result["min_ms"]:10.2f} ms  '
+              f'{change:+7.1f}%{"  REGRESSION" if regressed else ""}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
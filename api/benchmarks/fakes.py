@@ -0,0 +1,103 @@
+"""
+Deterministic stand-ins for the external services, so the benchmarks run offline.
+
+- `FakeAnthropic`/`FakeAsyncAnthropic` answer translation window requests by prefixing
+  every line with the target language, after a fixed `latency`.
+- `FakeOpenAI`/`FakeAsyncOpenAI` answer Whisper requests with a fixed SRT document.
+- `local_storages` replaces the S3 media bucket by a directory. Uploads, downloads into the
+  media cache and ffmpeg reading signed URLs are then not measured; `s3_storages` keeps
+  `MediaStorage` and points it at an S3-compatible endpoint (e.g. `moto_server` or MinIO).
+"""
+import asyncio
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import orjson
+
+from apps.cues import format_timestamp
+
+TARGET_LANGUAGE_PATTERN = re.compile(r'into (.+?)\. ')
+
+
+def _translation_reply(kwargs: Dict[str, Any]) -> SimpleNamespace:
+    language = TARGET_LANGUAGE_PATTERN.search(kwargs['system']).group(1)
+    message = kwargs['messages'][0]['content']
+    lines = orjson.loads(message)['lines']
+    text = orjson.dumps({'translations': [f'[{language}] {line}' for line in lines]}).decode()
+    return SimpleNamespace(
+        content=[SimpleNamespace(text=text)],
+        # Roughly four characters per token
+        usage=SimpleNamespace(input_tokens=(len(kwargs['system']) + len(message)) // 4, output_tokens=len(text) // 4),
+    )
+
+
+class FakeAnthropic:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return _translation_reply(kwargs)
+
+
+class FakeAsyncAnthropic:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return _translation_reply(kwargs)
+
+
+def make_srt(count: int, text: str = 'Subtitle line number {}\nwith a second line') -> str:
+    return '\n\n'.join(
+        f'{i + 1}\n{format_timestamp(i * 2000)} --> {format_timestamp(i * 2000 + 1500)}\n{text.format(i)}'
+        for i in range(count)) + '\n'
+
+
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.0, cues: int = 150):
+        self.latency = latency
+        self.transcript = make_srt(cues, 'Transcribed line {}')
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create))
+
+    def _read(self, file) -> int:
+        _, content = file
+        return len(content if isinstance(content, bytes) else content.read())
+
+    def _create(self, model: str, file, response_format: str) -> str:
+        self._read(file)
+        time.sleep(self.latency)
+        return self.transcript
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    async def _create(self, model: str, file, response_format: str) -> str:
+        self._read(file)
+        await asyncio.sleep(self.latency)
+        return self.transcript
+
+
+def local_storages(storages: Dict[str, Any], root: Path) -> Dict[str, Any]:
+    return {
+        **storages,
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': root, 'base_url': '/media/'},
+        },
+    }
+
+
+def s3_storages(storages: Dict[str, Any], endpoint_url: str, bucket_name: str) -> Dict[str, Any]:
+    return {
+        **storages,
+        'default': {
+            'BACKEND': 'wandlung.storages.MediaStorage',
+            'OPTIONS': {'endpoint_url': endpoint_url, 'bucket_name': bucket_name},
+        },
+    }
@@ -0,0 +1,85 @@
+"""
+Timing and machine-readable reports shared by the benchmarks.
+
+A report is one JSON document per run:
+
+    {"suite": ..., "environment": {...}, "params": {...},
+     "results": [{"name": ..., "min_ms": ..., "median_ms": ..., ...}, ...]}
+
+Reports of two releases are compared with `python -m benchmarks.compare`.
+"""
+import datetime
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+
+def measure(func: Callable[[], Any], number: int = 1, repeat: int = 5) -> Dict[str, Any]:
+    """Run `func` `number` times per round for `repeat` rounds; times are per call in milliseconds."""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number * 1000)
+    return {
+        'min_ms': round(min(rounds), 4),
+        'median_ms': round(statistics.median(rounds), 4),
+        'max_ms': round(max(rounds), 4),
+        'runs': number * repeat,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+class Report:
+    def __init__(self, suite: str, params: Dict[str, Any]):
+        self.suite = suite
+        self.params = params
+        self.results: List[Dict[str, Any]] = []
+
+    def add(self, name: str, timing: Dict[str, Any], **extra) -> Dict[str, Any]:
+        result = {'name': name, **timing, **extra}
+        self.results.append(result)
+        print(f'{name:<40} {timing["min_ms"]:10.2f} ms  (median {timing["median_ms"]:.2f})', file=sys.stderr)
+        return result
+
+    def skip(self, name: str, reason: str):
+        self.results.append({'name': name, 'skipped': reason})
+        print(f'{name:<40} skipped: {reason}', file=sys.stderr)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'suite': self.suite, 'environment': environment(), 'params': self.params, 'results': self.results}
+
+    def write(self, path: Optional[str]):
+        """Write the JSON report to `path`, or to stdout for `-`; nothing when no path is given."""
+        if not path:
+            return
+        data = orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2)
+        if path == '-':
+            sys.stdout.write(data.decode() + '\n')
+        else:
+            with open(path, 'wb') as f:
+                f.write(data)
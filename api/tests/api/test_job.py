@@ -0,0 +1,74 @@
+import pytest
+
+from apps.models import Job, Settings
+
+
+@pytest.mark.django_db
+class TestJobAPI:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        Settings.objects.create(
+            openai_api_key="test-key",
+            anthropic_api_key="test-key"
+        )
+
+    def test_enqueue_download(self, client):
+        response = client.post(
+            "/api/jobs/download",
+            {"url": "https://youtube.com/watch?v=test123"},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert response.json()["kind"] == "download"
+        assert response.json()["status"] == "pending"
+        assert Job.objects.filter(pk=response.json()["id"]).exists()
+
+    def test_enqueue_ingest(self, client):
+        response = client.post(
+            "/api/jobs/ingest",
+            {"urls": ["https://youtube.com/playlist?list=PL1"], "video_ids": ["abc"], "concurrency": 4},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert response.json()["kind"] == "ingest"
+        job = Job.objects.get(pk=response.json()["id"])
+        assert job.params == {"urls": ["https://youtube.com/playlist?list=PL1"], "video_ids": ["abc"], "concurrency": 4}
+
+    def test_enqueue_ingest_invalid(self, client):
+        response = client.post("/api/jobs/ingest", {}, content_type="application/json")
+        assert response.status_code == 400
+
+        response = client.post("/api/jobs/ingest", {"video_ids": ["abc"], "concurrency": 100},
+                               content_type="application/json")
+        assert response.status_code == 422
+        assert not Job.objects.exists()
+
+    def test_enqueue_transcribe_unknown_video(self, client):
+        response = client.post(
+            "/api/jobs/transcribe",
+            {"video_id": "missing"},
+            content_type="application/json"
+        )
+        assert response.status_code == 404
+        assert not Job.objects.exists()
+
+    def test_enqueue_burn(self, client, subtitle):
+        response = client.post(
+            "/api/jobs/burn",
+            {"subtitle_id": subtitle.id, "start_seconds": 0, "end_seconds": 10},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        job = Job.objects.get(pk=response.json()["id"])
+        assert job.kind == Job.Kind.BURN
+        assert job.params == {"subtitle_id": subtitle.id, "start_seconds": 0, "end_seconds": 10,
+                              "preset": None, "crf": None, "threads": None, "segments": 1,
+                              "preview": False, "at_seconds": None}
+
+    def test_get_job(self, client):
+        job = Job.objects.create(kind=Job.Kind.TRANSLATE, status=Job.Status.SUCCEEDED,
+                                 progress=100, result={"success": True})
+        response = client.get(f"/api/jobs/{job.id}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"] == {"success": True}
@@ -1,8 +1,13 @@
 import pytest
 from unittest.mock import patch
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.models import Settings
-from apps.services.subtitle_service import SubtitleService
+from apps.utils import parse_srt
+from apps.services.subtitle_service import SubtitleService, burned_video_name
 
 
 @pytest.mark.django_db
@@ -22,11 +27,64 @@ class TestSubtitleAPI:
         assert data["items"][0]["id"] == subtitle.id
         assert data["items"][0]["language"] == "English"
 
+    def test_list_subtitles_defers_content(self, client, subtitle):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/subtitles")
+        assert response.status_code == 200
+        selects = [q["sql"] for q in queries.captured_queries if "apps_subtitle" in q["sql"]]
+        assert len(selects) == 2  # count + page, no per-row loads
+        assert all('"content"' not in sql and '"original_video"' not in sql for sql in selects)
+
+    def test_get_subtitle_meta(self, client, subtitle):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f"/api/subtitles/{subtitle.id}/meta")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == subtitle.id
+        assert data["video_id"] == subtitle.video.video_id
+        assert "content" not in data
+        assert len(queries.captured_queries) == 1
+        assert '"content"' not in queries.captured_queries[0]["sql"]
+
     def test_get_subtitle_as_webvtt(self, client, subtitle):
         response = client.get(f"/api/subtitles/{subtitle.id}.vtt")
         assert response.status_code == 200
         assert response.content.startswith(b"WEBVTT\n\n")
 
+    def test_get_subtitle_as_webvtt_conditional(self, client, subtitle):
+        etag = client.get(f"/api/subtitles/{subtitle.id}.vtt")["ETag"]
+
+        response = client.get(f"/api/subtitles/{subtitle.id}.vtt", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = client.get(f"/api/subtitles/{subtitle.id}.vtt", headers={"Range": "bytes=0-5"})
+        assert response.status_code == 206
+        assert response.content == b"WEBVTT"
+
+    def test_get_subtitle_as_webvtt_cached(self, client, subtitle):
+        response = client.get(f"/api/subtitles/{subtitle.id}.vtt")
+        assert response["Cache-Control"] == "no-cache"
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = client.get(f"/api/subtitles/{subtitle.id}.vtt",
+                                      headers={"If-None-Match": response["ETag"]})
+            cached = client.get(f"/api/subtitles/{subtitle.id}.vtt")
+        assert not_modified.status_code == 304
+        assert cached.content == response.content
+        # Neither request reads the subtitle body from the database
+        assert all('"content"' not in query["sql"] for query in queries.captured_queries)
+
+    def test_get_subtitle_as_webvtt_after_update(self, client, subtitle):
+        etag = client.get(f"/api/subtitles/{subtitle.id}.vtt")["ETag"]
+        client.put(f"/api/subtitles/{subtitle.id}",
+                   {"content": "1\n00:00:00,000 --> 00:00:01,000\nChanged"},
+                   content_type="application/json")
+
+        response = client.get(f"/api/subtitles/{subtitle.id}.vtt", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert response.content.endswith(b"Changed\n")
+
     def test_get_subtitle(self, client, subtitle):
         response = client.get(f"/api/subtitles/{subtitle.id}")
         assert response.status_code == 200
@@ -44,7 +102,88 @@ class TestSubtitleAPI:
         subtitle.refresh_from_db()
         assert subtitle.content == new_content
 
-    @patch.object(SubtitleService, 'translate_subtitle')
+    def test_update_subtitle_invalidates_burned_videos(self, client, subtitle):
+        name = default_storage.save(burned_video_name(subtitle, 0, 10), ContentFile(b'burned'))
+        response = client.put(
+            f"/api/subtitles/{subtitle.id}",
+            {"content": "Updated content"},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert not default_storage.exists(name)
+
+    def test_patch_subtitle_cues(self, client, subtitle):
+        version = client.get(f"/api/subtitles/{subtitle.id}/meta").json()["version"]
+        response = client.patch(
+            f"/api/subtitles/{subtitle.id}",
+            {"version": version, "operations": [
+                {"op": "insert", "index": 1, "start": 6000, "end": 8000, "text": "Second"},
+                {"op": "update", "index": 0, "text": "First"},
+            ]},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        assert response.json()["version"] != version
+        subtitle.refresh_from_db()
+        assert subtitle.content == (
+            "1\n00:00:00,000 --> 00:00:05,000\nFirst\n\n"
+            "2\n00:00:06,000 --> 00:00:08,000\nSecond\n"
+        )
+
+    def test_patched_cue_text_reads_back_unchanged(self, client, subtitle):
+        version = client.get(f"/api/subtitles/{subtitle.id}/meta").json()["version"]
+        response = client.patch(
+            f"/api/subtitles/{subtitle.id}",
+            {"version": version, "operations": [{"op": "update", "index": 0, "text": "Hello\n  - World"}]},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        subtitle.refresh_from_db()
+        assert [cue.text for cue in parse_srt(subtitle.content)] == ["Hello\n  - World"]
+
+        # A blank line or a timing line would split the cue in the stored SRT
+        version = response.json()["version"]
+        for text in ("Hello\n\nWorld", "3\n00:00:09,000 --> 00:00:10,000"):
+            response = client.patch(
+                f"/api/subtitles/{subtitle.id}",
+                {"version": version, "operations": [{"op": "update", "index": 0, "text": text}]},
+                content_type="application/json"
+            )
+            assert response.status_code == 400
+        subtitle.refresh_from_db()
+        assert [cue.text for cue in parse_srt(subtitle.content)] == ["Hello\n  - World"]
+
+    def test_patch_subtitle_cues_conflict(self, client, subtitle):
+        version = client.get(f"/api/subtitles/{subtitle.id}/meta").json()["version"]
+        client.put(f"/api/subtitles/{subtitle.id}", {"content": subtitle.content + "\n"},
+                   content_type="application/json")
+
+        response = client.patch(
+            f"/api/subtitles/{subtitle.id}",
+            {"version": version, "operations": [{"op": "delete", "index": 0}]},
+            content_type="application/json"
+        )
+        assert response.status_code == 409
+        subtitle.refresh_from_db()
+        assert "Test subtitle content" in subtitle.content
+
+    def test_patch_subtitle_cues_invalid(self, client, subtitle):
+        version = client.get(f"/api/subtitles/{subtitle.id}/meta").json()["version"]
+        response = client.patch(
+            f"/api/subtitles/{subtitle.id}",
+            {"version": version, "operations": [{"op": "delete", "index": 3}]},
+            content_type="application/json"
+        )
+        assert response.status_code == 400
+
+        response = client.patch(
+            f"/api/subtitles/{subtitle.id}",
+            {"version": version, "operations": [{"op": "insert", "index": 0, "text": "No timing"}]},
+            content_type="application/json"
+        )
+        assert response.status_code == 422
+
+    @patch.object(SubtitleService, 'atranslate_subtitle')
     def test_translate_subtitle(self, mock_translate, client, subtitle):
         mock_translate.return_value = {"success": True}
         response = client.post(
@@ -55,9 +194,12 @@ class TestSubtitleAPI:
         assert response.status_code == 200
         assert response.json() == {"success": True}
 
-    def test_delete_subtitle(self, client, subtitle):
-        response = client.delete(f"/api/subtitles/{subtitle.id}")
+    def test_delete_subtitle(self, client, subtitle, django_capture_on_commit_callbacks):
+        name = default_storage.save(f"burns/{subtitle.id}/cached.mp4", ContentFile(b"burned"))
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.delete(f"/api/subtitles/{subtitle.id}")
         assert response.status_code == 200
+        assert not default_storage.exists(name)
         assert response.json() == {"success": True}
         # Verify subtitle was actually deleted
         response = client.get(f"/api/subtitles/{subtitle.id}")
@@ -73,3 +215,37 @@ class TestSubtitleAPI:
         )
         assert response.status_code == 200
         assert response.json() == {"success": True}
+
+    @patch.object(SubtitleService, 'burn_subtitle')
+    def test_burn_subtitle_encoder_options(self, mock_burn, client, subtitle):
+        mock_burn.return_value = {"success": True}
+        response = client.post(
+            f"/api/subtitles/{subtitle.id}/burn",
+            {"preset": "veryfast", "crf": 20, "threads": 4, "segments": 8},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        mock_burn.assert_called_once_with(subtitle.id, None, None, preset="veryfast", crf=20, threads=4, segments=8)
+
+        response = client.post(
+            f"/api/subtitles/{subtitle.id}/burn",
+            {"preset": "instant"},
+            content_type="application/json"
+        )
+        assert response.status_code == 422
+
+    @patch.object(SubtitleService, 'burn_preview')
+    def test_burn_subtitle_preview(self, mock_preview, client, subtitle):
+        mock_preview.return_value = {"name": "preview", "url": "url"}
+        response = client.post(
+            f"/api/subtitles/{subtitle.id}/burn",
+            {"preview": True, "at_seconds": 42},
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        mock_preview.assert_called_once_with(subtitle.id, 42, None, None)
+
+    def test_get_translation_memory_stats(self, client):
+        response = client.get("/api/subtitles/translation-memory")
+        assert response.status_code == 200
+        assert set(response.json()) == {"hits", "misses", "entries"}
@@ -1,5 +1,8 @@
 import pytest
-from unittest.mock import patch, Mock
+from datetime import timedelta
+from unittest.mock import patch, AsyncMock
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from apps.models import YouTubeVideo, Settings
 from apps.services.video_service import VideoService
 
@@ -27,8 +30,33 @@ class TestVideoAPI:
     def test_list_videos(self, client, video):
         response = client.get("/api/videos")
         assert response.status_code == 200
-        assert len(response.json()) == 1
-        assert response.json()[0]["video_id"] == "test123"
+        assert len(response.json()["items"]) == 1
+        assert response.json()["items"][0]["video_id"] == "test123"
+        assert response.json()["items"][0]["height"] == 1080
+        assert response.json()["next_cursor"] is None
+
+    def test_list_videos_paginates(self, client):
+        for i in range(5):
+            YouTubeVideo.objects.create(video_id=f"v{i}", title=f"Video {i}", duration=timedelta(minutes=1),
+                                        width=640, height=360)
+
+        first = client.get("/api/videos/recent", {"limit": 2}).json()
+        assert [v["video_id"] for v in first["items"]] == ["v4", "v3"]
+
+        second = client.get("/api/videos/recent", {"limit": 2, "cursor": first["next_cursor"]}).json()
+        assert [v["video_id"] for v in second["items"]] == ["v2", "v1"]
+
+        last = client.get("/api/videos/recent", {"limit": 2, "cursor": second["next_cursor"]}).json()
+        assert [v["video_id"] for v in last["items"]] == ["v0"]
+        assert last["next_cursor"] is None
+
+    def test_list_videos_fields(self, client, video):
+        response = client.get("/api/videos", {"fields": "video_id,title"})
+        assert response.status_code == 200
+        assert response.json()["items"] == [{"video_id": "test123", "title": "Test Video"}]
+
+        response = client.get("/api/videos", {"fields": "video_id,audio"})
+        assert response.status_code == 400
 
     def test_get_video(self, client, video):
         response = client.get(f"/api/videos/{video.video_id}")
@@ -36,24 +64,34 @@ class TestVideoAPI:
         assert response.json()["video_id"] == "test123"
         assert response.json()["title"] == "Test Video"
 
-    @patch('openai.OpenAI')
-    def test_transcribe_video(self, MockOpenAI, client, video, settings):
-        # Create mock instance and response
-        mock_instance = Mock()
-        mock_audio = Mock()
-        mock_transcriptions = Mock()
+    @patch('openai.AsyncOpenAI')
+    def test_transcribe_video(self, MockAsyncOpenAI, client, video, settings):
+        # The endpoint is async and awaits the async client
+        uploads = []
 
-        # Set up the chain of mocks to match the actual API structure
-        MockOpenAI.return_value = mock_instance
-        mock_instance.audio = mock_audio
-        mock_audio.transcriptions = mock_transcriptions
-        mock_transcriptions.create.return_value = "1\n00:00:00,000 --> 00:00:05,000\nTest transcription"
+        async def create(file, **kwargs):
+            # The audio is streamed from the open file rather than read into memory first
+            uploads.append((file[0], file[1].read()))
+            return "1\n00:00:00,000 --> 00:00:05,000\nTest transcription"
+
+        MockAsyncOpenAI.return_value.audio.transcriptions.create = AsyncMock(side_effect=create)
 
         response = client.post(f"/api/videos/{video.video_id}/transcribe")
         assert response.status_code == 200
-        assert response.json() == {"success": True}
+        assert response.json() == {"success": True, "subtitle_id": video.subtitles.get().pk}
+        assert uploads == [("audio.m4a", b"dummy")]
+        assert video.subtitles.get().content.endswith("Test transcription")
 
     def test_delete_video(self, client, video):
         response = client.delete(f"/api/videos/{video.video_id}")
         assert response.status_code == 200
         assert not YouTubeVideo.objects.filter(video_id=video.video_id).exists()
+
+    def test_delete_video_invalidates_burned_videos(self, client, subtitle, django_capture_on_commit_callbacks):
+        name = default_storage.save(f"burns/{subtitle.id}/cached.mp4", ContentFile(b"burned"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.delete(f"/api/videos/{subtitle.video.video_id}")
+
+        assert response.status_code == 200
+        assert not default_storage.exists(name)
@@ -1,8 +1,57 @@
 import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
+from django.test import override_settings
 from datetime import timedelta
 
+from apps.clients import clear_clients
 from apps.models import Settings, YouTubeVideo, Subtitle
+from wandlung.storages import signed_url_cache
+
+
+@pytest.fixture(autouse=True)
+def media_storage(tmp_path):
+    """Keep files saved to the default storage isolated per test."""
+    storages = {
+        **django_settings.STORAGES,
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {
+                'location': tmp_path / 'media',
+                'base_url': '/media/',
+            },
+        },
+    }
+    with override_settings(STORAGES=storages):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def scratch_root(tmp_path):
+    """Create job workspaces inside the test's temporary directory."""
+    with override_settings(SCRATCH_ROOT=tmp_path / 'scratch', SCRATCH_QUOTA=0, SCRATCH_MIN_FREE=0):
+        yield tmp_path / 'scratch'
+
+
+@pytest.fixture(autouse=True)
+def media_cache_root(tmp_path):
+    """Keep the local media cache inside the test's temporary directory."""
+    with override_settings(MEDIA_CACHE_ROOT=tmp_path / 'media-cache'):
+        yield tmp_path / 'media-cache'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    signed_url_cache.clear()
+    clear_clients()
+    Settings.invalidate()
+    yield
+    cache.clear()
+    signed_url_cache.clear()
+    clear_clients()
+    Settings.invalidate()
 
 
 @pytest.fixture
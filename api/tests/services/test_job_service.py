@@ -0,0 +1,139 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import ANY, patch
+from django.test import override_settings
+from django.utils import timezone
+from apps.models import Job
+from apps.services.job_service import JobService
+from apps.services.video_service import VideoService
+from apps.services.subtitle_service import SubtitleService
+from apps.exceptions import JobError
+
+
+@pytest.mark.django_db
+class TestJobService:
+    def test_enqueue(self):
+        job = JobService().enqueue(Job.Kind.DOWNLOAD, {'url': 'https://youtube.com/watch?v=test123'})
+
+        assert job.status == Job.Status.PENDING
+        assert job.progress == 0
+        assert job.params == {'url': 'https://youtube.com/watch?v=test123'}
+
+    def test_enqueue_unsupported_kind(self):
+        with pytest.raises(JobError, match='Unsupported job kind'):
+            JobService().enqueue('unknown', {})
+
+    def test_claim_next(self):
+        service = JobService()
+        first = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'a'})
+        second = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'b'})
+
+        assert service.claim_next().id == first.id
+        assert service.claim_next().id == second.id
+        assert service.claim_next() is None
+        assert Job.objects.filter(status=Job.Status.RUNNING).count() == 2
+
+    def test_claim_next_reclaims_expired_lease(self, settings):
+        settings.JOB_LEASE_SECONDS = 60
+        service = JobService()
+        alive = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'a'})
+        dead = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'b'})
+        Job.objects.filter(pk=alive.pk).update(status=Job.Status.RUNNING, heartbeat=timezone.now())
+        Job.objects.filter(pk=dead.pk).update(status=Job.Status.RUNNING, progress=40,
+                                              heartbeat=timezone.now() - timedelta(seconds=61))
+
+        job = service.claim_next()
+
+        assert job.id == dead.id
+        assert job.progress == 0
+        assert job.heartbeat > timezone.now() - timedelta(seconds=5)
+        assert service.claim_next() is None
+
+    @override_settings(JOB_LEASE_SECONDS=60, JOB_MAX_ATTEMPTS=2)
+    def test_claim_next_fails_jobs_out_of_attempts(self):
+        service = JobService()
+        job = service.enqueue(Job.Kind.BURN, {'subtitle_id': 1})
+        expired = timezone.now() - timedelta(seconds=61)
+
+        assert service.claim_next().attempts == 1
+        # The worker died twice, e.g. killed for running out of memory
+        Job.objects.filter(pk=job.pk).update(heartbeat=expired)
+        assert service.claim_next().attempts == 2
+        Job.objects.filter(pk=job.pk).update(heartbeat=expired)
+        assert service.claim_next() is None
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert '2 attempts' in job.error
+        assert job.finished is not None
+
+    @override_settings(JOB_LEASE_SECONDS=60)
+    def test_claim_next_leases_jobs_without_heartbeat_from_their_start(self):
+        service = JobService()
+        recent = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'a'})
+        old = service.enqueue(Job.Kind.DOWNLOAD, {'url': 'b'})
+        # Claimed by workers that did not renew heartbeats yet, e.g. during a rolling deploy
+        Job.objects.filter(pk=recent.pk).update(status=Job.Status.RUNNING, started=timezone.now())
+        Job.objects.filter(pk=old.pk).update(status=Job.Status.RUNNING,
+                                             started=timezone.now() - timedelta(seconds=61))
+
+        assert service.claim_next().id == old.id
+        assert service.claim_next() is None
+
+    def test_heartbeat(self):
+        service = JobService()
+        service.enqueue(Job.Kind.DOWNLOAD, {'url': 'a'})
+        job = service.claim_next()
+        Job.objects.filter(pk=job.pk).update(heartbeat=timezone.now() - timedelta(minutes=5))
+
+        service.heartbeat([job.pk])
+
+        job.refresh_from_db()
+        assert job.heartbeat > timezone.now() - timedelta(seconds=5)
+
+    @patch.object(VideoService, 'download_video')
+    def test_run_job_success(self, mock_download, settings):
+        mock_download.return_value = {'video_id': 'test123'}
+        service = JobService()
+        service.enqueue(Job.Kind.DOWNLOAD, {'url': 'https://youtube.com/watch?v=test123'})
+
+        job = service.run_job(service.claim_next())
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.progress == 100
+        assert job.result == {'video_id': 'test123'}
+        assert job.finished is not None
+        mock_download.assert_called_once_with('https://youtube.com/watch?v=test123', on_progress=ANY)
+
+    @patch.object(SubtitleService, 'burn_subtitle')
+    def test_run_job_failure(self, mock_burn, settings, subtitle):
+        mock_burn.side_effect = Exception("FFmpeg Error")
+        service = JobService()
+        service.enqueue(Job.Kind.BURN, {'subtitle_id': subtitle.id, 'start_seconds': 0, 'end_seconds': 10})
+
+        job = service.run_job(service.claim_next())
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.error == "FFmpeg Error"
+        mock_burn.assert_called_once_with(subtitle.id, 0, 10, preset=None, crf=None, threads=None, segments=1,
+                                          on_progress=ANY)
+
+    @patch.object(SubtitleService, 'translate_subtitle')
+    def test_run_job_reports_progress(self, mock_translate, settings, subtitle):
+        progress = []
+
+        def translate(subtitle_id, target_language, temperature, on_progress):
+            on_progress(1, 4)
+            progress.append(Job.objects.get().progress)
+            return {'success': True, 'subtitle_id': 42}
+
+        mock_translate.side_effect = translate
+        service = JobService()
+        service.enqueue(Job.Kind.TRANSLATE, {'subtitle_id': subtitle.id, 'target_language': 'German'})
+
+        job = service.run_job(service.claim_next())
+
+        assert progress == [25]
+        assert job.result == {'success': True, 'subtitle_id': 42}
@@ -0,0 +1,75 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from apps.models import MediaBlob
+from apps.services.media_store import hash_file, store_media
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / 'test123.MP4'
+    path.write_bytes(b'video')
+    return str(path)
+
+
+@pytest.mark.django_db
+class TestMediaStore:
+    def test_hash_file(self, media_file):
+        assert hash_file(media_file) == hashlib.sha256(b'video').hexdigest()
+
+    def test_store_media(self, media_file):
+        name = store_media(media_file, 'videos/')
+
+        assert name == f"videos/{hashlib.sha256(b'video').hexdigest()}.mp4"
+        assert default_storage.open(name).read() == b'video'
+        blob = MediaBlob.objects.get()
+        assert (blob.name, blob.size, blob.refcount) == (name, 5, 1)
+
+    def test_store_media_shares_identical_content(self, media_file):
+        name = store_media(media_file, 'videos/')
+
+        with patch.object(default_storage, 'save') as save:
+            assert store_media(media_file, 'videos/') == name
+        save.assert_not_called()
+        assert MediaBlob.objects.get().refcount == 2
+
+    def test_store_media_concurrent_ingest(self, media_file):
+        digest = hash_file(media_file)
+        existing = default_storage.save(f'videos/{digest}.mp4', ContentFile(b'video'))
+        save = default_storage.save
+
+        def save_after_concurrent_ingest(name, content, **kwargs):
+            # Another ingest stored the same content while this one was uploading
+            MediaBlob.objects.create(sha256=digest, name=existing, size=5, refcount=1)
+            return save(name, content, **kwargs)
+
+        with patch.object(default_storage, 'save', side_effect=save_after_concurrent_ingest):
+            assert store_media(media_file, 'videos/') == existing
+
+        assert MediaBlob.objects.get().refcount == 2
+        # The upload under an alternative name is removed again
+        assert default_storage.listdir('videos')[1] == [existing.split('/')[-1]]
+
+    def test_release(self, media_file, django_capture_on_commit_callbacks):
+        name = store_media(media_file, 'videos/')
+        store_media(media_file, 'videos/')
+
+        MediaBlob.release([name])
+        assert MediaBlob.objects.get().refcount == 1
+        assert default_storage.exists(name)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            MediaBlob.release([name])
+        assert not MediaBlob.objects.exists()
+        assert not default_storage.exists(name)
+
+    def test_release_legacy_files(self, video, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            video.delete()
+
+        # Files stored before content addressing are not reference counted
+        assert default_storage.exists(video.original_video.name)
@@ -1,8 +1,19 @@
+import re
+
 import pytest
-from unittest.mock import Mock, patch, mock_open
+from asgiref.sync import async_to_sync
+from unittest.mock import AsyncMock, Mock, call, patch, mock_open
 from django.core.exceptions import ValidationError
-from django.http import StreamingHttpResponse
-from apps.services.subtitle_service import SubtitleService
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from apps.cues import Cue
+from apps.services.subtitle_service import (
+    SubtitleService,
+    apply_cue_operations,
+    burned_video_name,
+    invalidate_burned_videos,
+)
 from apps.exceptions import SubtitleError, TranscriptionError
 
 
@@ -30,8 +41,8 @@ class TestSubtitleService:
         with patch('builtins.open', mock_open()):
             result = service.transcribe_video(video.video_id)
 
-        assert result == {'success': True}
-        assert video.subtitles.filter(language='English', is_transcribed=True).exists()
+        assert result == {'success': True,
+                          'subtitle_id': video.subtitles.get(language='English', is_transcribed=True).pk}
 
     @patch('openai.OpenAI')
     def test_transcribe_video_failure(self, mock_openai, settings, video):
@@ -45,15 +56,16 @@ class TestSubtitleService:
     def test_translate_subtitle_success(self, mock_anthropic, settings, subtitle):
         mock_client = Mock()
         mock_response = Mock()
-        mock_response.content = [Mock(text='{"text": "Translated text", "command": "END"}')]
+        mock_response.content = [Mock(text='{"translations": ["Texto traducido"]}')]
         mock_client.messages.create.return_value = mock_response
         mock_anthropic.return_value = mock_client
 
         service = SubtitleService()
         result = service.translate_subtitle(subtitle.id, "Spanish", temperature=None)
 
-        assert result == {'success': True}
-        assert subtitle.video.subtitles.filter(language='Spanish', is_transcribed=False).exists()
+        translated = subtitle.video.subtitles.get(language='Spanish', is_transcribed=False)
+        assert result == {'success': True, 'subtitle_id': translated.pk}
+        assert translated.content == "1\n00:00:00,000 --> 00:00:05,000\nTexto traducido\n"
 
     def test_translate_subtitle_without_api_key(self, settings, subtitle):
         settings.anthropic_api_key = None
@@ -70,10 +82,12 @@ class TestSubtitleService:
 
         service = SubtitleService()
         with patch('builtins.open', mock_open()):
-            response = service.burn_subtitle(subtitle.id, 0, 10)
+            result = service.burn_subtitle(subtitle.id, 0, 10)
 
-        assert isinstance(response, StreamingHttpResponse)
-        assert response['Content-Type'] == 'video/mp4'
+        assert result['name'] == burned_video_name(subtitle, 0, 10)
+        assert default_storage.exists(result['name'])
+        assert result['url'] == default_storage.url(result['name'])
+        assert result['video_id'] == subtitle.video.video_id
         mock_ffmpeg_instance.run.assert_called_once()
 
     @patch('ffmpy.FFmpeg')
@@ -83,3 +97,251 @@ class TestSubtitleService:
         service = SubtitleService()
         with pytest.raises(SubtitleError):
             service.burn_subtitle(subtitle.id, 0, 10)
+
+    @patch('ffmpy.FFmpeg')
+    def test_burn_subtitle_parallel(self, mock_ffmpeg, settings, subtitle, scratch_root):
+        def run_ffmpeg(inputs, outputs):
+            # Every ffmpeg run writes its output file
+            output_path = next(iter(outputs))
+            return Mock(run=lambda: open(output_path, 'wb').write(b'video'))
+
+        mock_ffmpeg.side_effect = run_ffmpeg
+        service = SubtitleService()
+        with patch.object(service, '_keyframes', return_value=[0.0, 2.0, 4.0, 6.0, 8.0]):
+            result = service.burn_subtitle(subtitle.id, 0, 10, preset='veryfast', crf=20, segments=3)
+
+        assert default_storage.exists(result['name'])
+        assert result['name'] != burned_video_name(subtitle, 0, 10)
+        parts = [call for call in mock_ffmpeg.call_args_list if '-part' in next(iter(call.kwargs['outputs']))]
+        # Parts are burned concurrently, so their calls come in any order
+        assert sorted(float(next(iter(call.kwargs['inputs'].values())).split()[-1]) for call in parts) == [0, 4, 6]
+        assert all('-preset veryfast -crf 20 -threads' in next(iter(call.kwargs['outputs'].values()))
+                   for call in parts)
+        concat = mock_ffmpeg.call_args_list[-1]
+        assert next(iter(concat.kwargs['inputs'].values())) == '-f concat -safe 0'
+        # Parts, subtitle slices and the concat list are written to the burn's workspace and removed with it
+        assert next(iter(concat.kwargs['outputs'])).startswith(str(scratch_root / f'burn-{subtitle.id}-'))
+        assert list(scratch_root.iterdir()) == []
+
+    @patch('ffmpy.FFmpeg')
+    def test_burn_subtitle_parallel_within_quota(self, mock_ffmpeg, settings, subtitle):
+        def run_ffmpeg(inputs, outputs):
+            output_path = next(iter(outputs))
+            return Mock(run=lambda: open(output_path, 'wb').write(b'video'))
+
+        mock_ffmpeg.side_effect = run_ffmpeg
+        service = SubtitleService()
+        with (
+            override_settings(SCRATCH_QUOTA=10_000),
+            patch.object(service, '_keyframes', return_value=[0.0, 2.0, 4.0, 6.0, 8.0]),
+        ):
+            service.burn_subtitle(subtitle.id, 0, 10, segments=3)
+
+        # The parts burned side by side share the quota, the concat gets what is left after them
+        *parts, concat = [next(iter(call.kwargs['outputs'].values())) for call in mock_ffmpeg.call_args_list]
+        part_limits = {int(re.search(r'-fs (\d+)', options).group(1)) for options in parts}
+        assert len(part_limits) == 1 and part_limits.pop() <= 10_000 // 3
+        assert int(re.search(r'-fs (\d+)', concat).group(1)) < 10_000
+
+    @patch.object(SubtitleService, 'burn_subtitle')
+    def test_burn_preview(self, mock_burn, settings, subtitle):
+        mock_burn.side_effect = lambda *args, **kwargs: {'name': 'preview', 'url': 'url', 'video_id': 'test123'}
+        service = SubtitleService()
+
+        # A short window centred on the requested time, clamped to the video (300s)
+        with patch('apps.services.subtitle_service.download_url', return_value='inline-url') as mock_url:
+            assert service.burn_preview(subtitle.id, at_seconds=100)['url'] == 'inline-url'
+        assert mock_burn.call_args.args == (subtitle.id, 95.0, 105.0)
+        assert mock_burn.call_args.kwargs == {'preset': 'ultrafast', 'crf': 28, 'height': 360}
+        # Previews play in the browser instead of downloading
+        assert mock_url.call_args.kwargs == {'inline': True}
+
+        service.burn_preview(subtitle.id, at_seconds=299)
+        assert mock_burn.call_args.args == (subtitle.id, 290.0, 300.0)
+
+        service.burn_preview(subtitle.id, start_seconds=10, end_seconds=40)
+        assert mock_burn.call_args.args == (subtitle.id, 10, 40)
+
+    @patch('ffmpy.FFmpeg')
+    def test_burn_subtitle_downscaled(self, mock_ffmpeg, settings, subtitle):
+        service = SubtitleService()
+        with patch('builtins.open', mock_open()):
+            result = service.burn_subtitle(subtitle.id, 0, 10, preset='ultrafast', height=360)
+
+        outputs = mock_ffmpeg.call_args.kwargs['outputs']
+        assert ' scale=-2:360,subtitles=' in next(iter(outputs.values()))
+        # Cached separately from the full-resolution burn
+        assert result['name'] != burned_video_name(subtitle, 0, 10, encoding='-preset ultrafast')
+
+    def test_choose_burn_split_points(self):
+        keyframes = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+        assert SubtitleService._choose_burn_split_points(keyframes, 0, 10, 3) == [4.0, 6.0]
+        assert SubtitleService._choose_burn_split_points(keyframes, 0, 10, 1) == []
+        # Never more parts than keyframes inside the range
+        assert SubtitleService._choose_burn_split_points(keyframes, 5, 10, 4) == [6.0, 8.0]
+
+    @patch('openai.OpenAI')
+    def test_transcribe_video_chunked(self, mock_openai, settings, video):
+        mock_client = Mock()
+        mock_client.audio.transcriptions.create.return_value = "1\n00:00:01,000 --> 00:00:02,000\nHello"
+        mock_openai.return_value = mock_client
+
+        service = SubtitleService()
+        with (
+            patch('builtins.open', mock_open()),
+            patch.object(service, '_detect_silences', return_value=[]),
+            patch.object(service, '_choose_split_points', return_value=[600.0]),
+            patch.object(service, '_split_audio', return_value=[(0.0, 'a.m4a'), (600.0, 'b.m4a')]),
+        ):
+            progress = Mock()
+            result = service.transcribe_video(video.video_id, chunked=True, on_progress=progress)
+
+        assert result == {'success': True, 'subtitle_id': video.subtitles.get().pk}
+        assert mock_client.audio.transcriptions.create.call_count == 2
+        progress.assert_has_calls([call(1, 2), call(2, 2)])
+        content = video.subtitles.get().content
+        assert "1\n00:00:01,000 --> 00:00:02,000\nHello" in content
+        assert "2\n00:10:01,000 --> 00:10:02,000\nHello" in content
+
+    @patch('openai.AsyncOpenAI')
+    def test_atranscribe_video_chunked(self, mock_async_openai, settings, video, scratch_root):
+        mock_create = AsyncMock(return_value="1\n00:00:01,000 --> 00:00:02,000\nHello")
+        mock_async_openai.return_value.audio.transcriptions.create = mock_create
+
+        def split_audio(source, output_prefix, ext, split_points):
+            segments = [(0.0, f'{output_prefix}-000{ext}'), (600.0, f'{output_prefix}-001{ext}')]
+            for _, path in segments:
+                with open(path, 'wb') as f:
+                    f.write(b'segment')
+            return segments
+
+        service = SubtitleService()
+        with (
+            patch.object(service, '_detect_silences', return_value=[]),
+            patch.object(service, '_choose_split_points', return_value=[600.0]),
+            patch.object(service, '_split_audio', side_effect=split_audio),
+        ):
+            result = async_to_sync(service.atranscribe_video)(video.video_id, chunked=True)
+
+        assert result == {'success': True, 'subtitle_id': video.subtitles.get().pk}
+        assert mock_create.await_count == 2
+        # Segments are written to a workspace of the transcription and removed with it
+        assert list(scratch_root.iterdir()) == []
+        content = video.subtitles.get().content
+        assert "2\n00:10:01,000 --> 00:10:02,000\nHello" in content
+
+    def test_choose_split_points(self):
+        silences = [(590.0, 592.0), (1250.0, 1251.0), (3000.0, 3001.0)]
+
+        points = SubtitleService._choose_split_points(silences, duration=1900)
+
+        # Snaps to the silence nearest to every segment boundary
+        assert points == [591.0, 1250.5]
+
+    def test_choose_split_points_short_audio(self):
+        assert SubtitleService._choose_split_points([(10.0, 11.0)], duration=300) == []
+
+    @patch('ffmpy.FFmpeg')
+    def test_detect_silences(self, mock_ffmpeg, settings):
+        mock_ffmpeg.return_value.run.return_value = (None, (
+            b"[silencedetect @ 0x1] silence_start: -0.01\n"
+            b"[silencedetect @ 0x1] silence_end: 1.5 | silence_duration: 1.51\n"
+            b"[silencedetect @ 0x1] silence_start: 600.25\n"
+            b"[silencedetect @ 0x1] silence_end: 601.75 | silence_duration: 1.5\n"
+        ))
+
+        service = SubtitleService()
+        assert service._detect_silences('test123.m4a') == [(0.0, 1.5), (600.25, 601.75)]
+
+    @patch('ffmpy.FFmpeg')
+    def test_burn_subtitle_cache_hit(self, mock_ffmpeg, settings, subtitle):
+        default_storage.save(burned_video_name(subtitle, 0, 10), ContentFile(b'burned'))
+
+        service = SubtitleService()
+        result = service.burn_subtitle(subtitle.id, 0, 10)
+
+        assert result['name'] == burned_video_name(subtitle, 0, 10)
+        mock_ffmpeg.assert_not_called()
+
+    def test_burned_video_name(self, subtitle):
+        name = burned_video_name(subtitle, None, None)
+
+        assert name.startswith(f'burns/{subtitle.id}/')
+        assert '-0-300-' in name
+        assert burned_video_name(subtitle, 0, 10) != burned_video_name(subtitle, 0, 20)
+        assert burned_video_name(subtitle, 0, 10) != burned_video_name(subtitle, 0, 10, style='FontSize=30')
+
+        subtitle.content = "Changed"
+        assert burned_video_name(subtitle, None, None) != name
+
+    def test_invalidate_burned_videos(self, subtitle):
+        name = default_storage.save(burned_video_name(subtitle, 0, 10), ContentFile(b'burned'))
+
+        invalidate_burned_videos(subtitle.id)
+        invalidate_burned_videos(subtitle.id + 1)
+
+        assert not default_storage.exists(name)
+
+    @patch('ffmpy.FFmpeg')
+    @patch('apps.services.subtitle_service.local_media')
+    def test_burn_streams_ranges(self, mock_local_media, mock_ffmpeg, settings, subtitle):
+        service = SubtitleService()
+        with patch('builtins.open', mock_open()):
+            service._burn(subtitle, None, None, 'output.mp4')
+            # Ranges and previews seek in the signed URL instead of downloading the whole original
+            service._burn(subtitle, 58, 70, 'output.mp4')
+
+        assert [call.kwargs for call in mock_local_media.call_args_list] == [{'fill': True}, {'fill': False}]
+
+    @patch('ffmpy.FFmpeg')
+    def test_burn_seeks_input(self, mock_ffmpeg, settings, subtitle):
+        subtitle.content = ("1\n00:00:00,000 --> 00:00:05,000\nFirst\n\n"
+                            "2\n00:01:00,000 --> 00:01:05,000\nSecond\n")
+        written = mock_open()
+
+        service = SubtitleService()
+        with patch('builtins.open', written):
+            service._burn(subtitle, 58, 70, 'output.mp4')
+
+        inputs = mock_ffmpeg.call_args.kwargs['inputs']
+        outputs = mock_ffmpeg.call_args.kwargs['outputs']
+        assert list(inputs) == [subtitle.video.original_video.path]
+        assert inputs[subtitle.video.original_video.path].strip() == '-ss 58'
+        assert '-t 12' in outputs['output.mp4']
+        written().write.assert_called_once_with("1\n00:00:02,000 --> 00:00:07,000\nSecond\n")
+
+
+def test_apply_cue_operations():
+    cues = [Cue(0, 1000, 'a'), Cue(1000, 2000, 'b'), Cue(2000, 3000, 'c')]
+
+    patched = apply_cue_operations(cues, [
+        {'op': 'delete', 'index': 1},
+        {'op': 'update', 'index': 1, 'start': 2500, 'text': 'C'},
+        {'op': 'insert', 'index': 2, 'start': 4000, 'end': 5000, 'text': 'd'},
+    ])
+
+    assert patched == [Cue(0, 1000, 'a'), Cue(2500, 3000, 'C'), Cue(4000, 5000, 'd')]
+    assert len(cues) == 3
+
+
+def test_apply_cue_operations_invalid():
+    cues = [Cue(0, 1000, 'a')]
+
+    with pytest.raises(SubtitleError, match='out of range'):
+        apply_cue_operations(cues, [{'op': 'update', 'index': 1, 'text': 'b'}])
+    with pytest.raises(SubtitleError, match='Invalid timing'):
+        apply_cue_operations(cues, [{'op': 'update', 'index': 0, 'end': 0, 'start': 500}])
+
+
+def test_apply_cue_operations_text():
+    cues = [Cue(0, 1000, 'a')]
+
+    assert apply_cue_operations(cues, [{'op': 'update', 'index': 0, 'text': 'Two\r\nlines\n'}]) == [
+        Cue(0, 1000, 'Two\nlines')]
+    # A blank line would end the cue and a timing line would start a new one in the stored SRT
+    with pytest.raises(SubtitleError, match='blank lines'):
+        apply_cue_operations(cues, [{'op': 'update', 'index': 0, 'text': 'Hello\n\nWorld'}])
+    with pytest.raises(SubtitleError, match='-->'):
+        apply_cue_operations(cues, [{'op': 'insert', 'index': 1, 'start': 1000, 'end': 2000,
+                                     'text': '3\n00:00:09,000 --> 00:00:10,000'}])
@@ -0,0 +1,192 @@
+import asyncio
+import orjson
+import pytest
+from asgiref.sync import async_to_sync
+from unittest.mock import AsyncMock, Mock, patch
+from apps.models import TranslationMemory as TranslationMemoryEntry
+from apps.services.translation_service import TranslationService, build_windows
+from apps.services.translation_memory import TranslationMemory, translation_memory_stats
+from apps.exceptions import SubtitleError
+
+
+def make_srt(count):
+    return "\n\n".join(
+        f"{i + 1}\n00:00:{i:02d},000 --> 00:00:{i:02d},500\nLine {i}" for i in range(count))
+
+
+def echo_translation(**kwargs):
+    """Fake model reply translating every line to upper case."""
+    payload = orjson.loads(kwargs['messages'][0]['content'])
+    reply = orjson.dumps({'translations': [line.upper() for line in payload['lines']]}).decode()
+    return Mock(content=[Mock(text=reply)])
+
+
+def test_build_windows():
+    assert build_windows(list(range(45)), size=20) == [list(range(20)), list(range(20, 40)), list(range(40, 45))]
+    assert build_windows([], size=20) == []
+    assert build_windows([0, 1, 2, 5, 6, 9], size=2) == [[0, 1], [2], [5, 6], [9]]
+
+
+@pytest.mark.django_db
+class TestTranslationService:
+    @patch('anthropic.Client')
+    def test_translate_windows_independently(self, mock_anthropic):
+        mock_client = mock_anthropic.return_value
+        mock_client.messages.create.side_effect = echo_translation
+
+        service = TranslationService(api_key='test-key')
+        translated = service.translate(make_srt(45), 'German', temperature=None)
+
+        assert translated == make_srt(45).replace('Line', 'LINE') + "\n"
+        assert mock_client.messages.create.call_count == 3
+        for call in mock_client.messages.create.call_args_list:
+            # Every request is stateless and carries a single user message
+            assert len(call.kwargs['messages']) == 1
+            assert 'temperature' not in call.kwargs
+
+    @patch('anthropic.Client')
+    def test_translate_window_includes_context(self, mock_anthropic):
+        mock_client = mock_anthropic.return_value
+        mock_client.messages.create.side_effect = echo_translation
+
+        service = TranslationService(api_key='test-key')
+        texts = [f'Line {i}' for i in range(45)]
+        service._translate_window(texts, list(range(20, 40)), 'German', temperature=0.5)
+
+        payload = orjson.loads(mock_client.messages.create.call_args.kwargs['messages'][0]['content'])
+        assert payload['before'] == ['Line 18', 'Line 19']
+        assert payload['lines'] == texts[20:40]
+        assert payload['after'] == ['Line 40', 'Line 41']
+        assert mock_client.messages.create.call_args.kwargs['temperature'] == 0.5
+
+    @patch('anthropic.Client')
+    def test_translate_uses_translation_memory(self, mock_anthropic):
+        mock_client = mock_anthropic.return_value
+        mock_client.messages.create.side_effect = echo_translation
+        TranslationMemory('German', 'claude-3-5-sonnet-20241022').store([('Line  1', 'Zeile 1')])
+
+        service = TranslationService(api_key='test-key')
+        translated = service.translate(make_srt(3), 'German', temperature=None)
+
+        assert '\nZeile 1\n' in translated
+        # The cached line splits the rest into two windows, and is context of both
+        payloads = [orjson.loads(call.kwargs['messages'][0]['content'])
+                    for call in mock_client.messages.create.call_args_list]
+        assert sorted((payload['before'], payload['lines'], payload['after']) for payload in payloads) == [
+            ([], ['Line 0'], ['Line 1', 'Line 2']),
+            (['Line 0', 'Line 1'], ['Line 2'], []),
+        ]
+        # Misses are stored, so a second run needs no model call at all
+        service.translate(make_srt(3), 'German', temperature=None)
+        assert mock_client.messages.create.call_count == 2
+
+    @patch('anthropic.AsyncAnthropic')
+    def test_atranslate_awaits_windows_concurrently(self, mock_async_anthropic):
+        in_flight = {'now': 0, 'max': 0}
+
+        async def create(**kwargs):
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            await asyncio.sleep(0.01)
+            in_flight['now'] -= 1
+            return echo_translation(**kwargs)
+
+        mock_async_anthropic.return_value.messages.create = AsyncMock(side_effect=create)
+
+        service = TranslationService(api_key='test-key')
+        translated = async_to_sync(service.atranslate)(make_srt(45), 'German', temperature=None)
+
+        assert translated == make_srt(45).replace('Line', 'LINE') + "\n"
+        assert mock_async_anthropic.return_value.messages.create.await_count == 3
+        # All three windows were in flight at once
+        assert in_flight['max'] == 3
+        assert TranslationMemoryEntry.objects.count() == 45
+
+    @patch('anthropic.Client')
+    def test_translate_retries_malformed_window_in_halves(self, mock_anthropic):
+        def create(**kwargs):
+            # The full window is answered with too few lines, its halves correctly
+            if len(orjson.loads(kwargs['messages'][0]['content'])['lines']) == 20:
+                return Mock(content=[Mock(text='{"translations": ["only one"]}')])
+            return echo_translation(**kwargs)
+
+        mock_anthropic.return_value.messages.create.side_effect = create
+
+        service = TranslationService(api_key='test-key')
+        translated = service.translate(make_srt(25), 'German', temperature=None)
+
+        assert translated == make_srt(25).replace('Line', 'LINE') + "\n"
+        # One failed window, its two halves and the second window
+        assert mock_anthropic.return_value.messages.create.call_count == 4
+
+    @patch('anthropic.Client')
+    def test_translate_line_count_mismatch(self, mock_anthropic):
+        mock_anthropic.return_value.messages.create.return_value = Mock(
+            content=[Mock(text='{"translations": ["one", "two", "three"]}')])
+
+        service = TranslationService(api_key='test-key')
+        with pytest.raises(SubtitleError, match='Expected 1 translated lines'):
+            service.translate(make_srt(2), 'German', temperature=None)
+
+    @patch('anthropic.Client')
+    def test_translate_invalid_json(self, mock_anthropic):
+        mock_anthropic.return_value.messages.create.return_value = Mock(content=[Mock(text='not json')])
+
+        service = TranslationService(api_key='test-key')
+        with pytest.raises(SubtitleError, match='Failed to decode translation'):
+            service.translate(make_srt(1), 'German', temperature=None)
+        # The single line is retried once before giving up
+        assert mock_anthropic.return_value.messages.create.call_count == 2
+
+    def test_translate_empty_subtitle(self):
+        service = TranslationService(api_key='test-key')
+        with pytest.raises(SubtitleError, match='No subtitle cues'):
+            service.translate('', 'German', temperature=None)
+
+
+@pytest.mark.django_db
+class TestTranslationMemory:
+    def test_lookup_normalizes_text(self):
+        memory = TranslationMemory('German', 'model')
+        memory.store([('Hello\nworld', 'Hallo Welt')])
+
+        before = translation_memory_stats()
+        cached = memory.lookup(['Hello   world', 'Unknown'])
+
+        assert list(cached.values()) == ['Hallo Welt']
+        after = translation_memory_stats()
+        assert after['hits'] - before['hits'] == 1
+        assert after['misses'] - before['misses'] == 1
+        assert TranslationMemoryEntry.objects.get().hits == 1
+
+    def test_lookup_is_scoped_by_language_and_model(self):
+        TranslationMemory('German', 'model').store([('Hello', 'Hallo')])
+
+        assert TranslationMemory('Korean', 'model').lookup(['Hello']) == {}
+        assert TranslationMemory('German', 'other-model').lookup(['Hello']) == {}
+
+    def test_evicts_least_recently_used(self):
+        memory = TranslationMemory('German', 'model', max_entries=2)
+        memory.store([('One', 'Eins')])
+        memory.store([('Two', 'Zwei')])
+        memory.lookup(['One'])
+        memory.store([('Three', 'Drei')])
+
+        assert memory.evict() == 1
+        assert set(TranslationMemoryEntry.objects.values_list('source_text', flat=True)) == {'One', 'Three'}
+
+    def test_evict_keeps_entries_sharing_the_cutoff_time(self):
+        memory = TranslationMemory('German', 'model', max_entries=2)
+        memory.store([('One', 'Eins'), ('Two', 'Zwei'), ('Three', 'Drei')])
+
+        assert memory.evict() == 1
+        assert TranslationMemoryEntry.objects.count() == 2
+
+    def test_store_evicts_at_most_once_per_interval(self):
+        memory = TranslationMemory('German', 'model', max_entries=1)
+        with patch('apps.services.translation_memory._last_eviction', None):
+            memory.store([('One', 'Eins')])
+            memory.store([('Two', 'Zwei')])
+
+        # The first store evicted (nothing), the second one was within the interval
+        assert TranslationMemoryEntry.objects.count() == 2
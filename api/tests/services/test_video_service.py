@@ -1,8 +1,14 @@
+import hashlib
+from pathlib import Path
+
 import pytest
 from unittest.mock import Mock, patch, mock_open
 from django.core.exceptions import ValidationError
-from apps.services.video_service import VideoService
-from apps.exceptions import VideoProcessingError
+from django.core.files.storage import default_storage
+from apps.models import MediaBlob, YouTubeVideo
+from apps.services.video_service import VideoService, download_progress_hook
+from apps.exceptions import VideoProcessingError, WorkspaceError
+from apps.workspace import Workspace
 
 
 @pytest.mark.django_db
@@ -14,37 +20,67 @@ class TestVideoService:
     @patch('yt_dlp.YoutubeDL')
     @patch('PIL.Image.open')
     @patch('ffmpy.FFmpeg')
-    def test_download_video_success(self, mock_ffmpeg, mock_pil, mock_ydl, settings):
-        # Mock YoutubeDL
-        mock_ydl_instance = Mock()
-        mock_info = {
-            'id': 'test123',
+    def test_download_video_success(self, mock_ffmpeg, mock_pil, mock_ydl, settings, scratch_root):
+        self._mock_download(mock_ydl, mock_pil, mock_ffmpeg, 'test123')
+
+        service = VideoService()
+        with patch('urllib.request.urlopen') as mock_urlopen:
+            mock_urlopen.return_value.__enter__.return_value.read.return_value = b'dummy'
+            result = service.download_video('https://youtube.com/watch?v=test123')
+
+        assert result == {'video_id': 'test123'}
+        mock_ffmpeg.assert_called_once()
+        # yt-dlp writes into a workspace of its own, which is removed afterwards
+        assert mock_ydl.call_args.args[0]['outtmpl'].startswith(str(scratch_root / 'download-'))
+        assert list(scratch_root.iterdir()) == []
+
+        video = YouTubeVideo.objects.get(video_id='test123')
+        assert video.original_video.name == f"videos/{hashlib.sha256(b'video').hexdigest()}.mp4"
+        assert video.audio.read() == b'audio'
+        assert MediaBlob.objects.count() == 3
+
+    @patch('yt_dlp.YoutubeDL')
+    @patch('PIL.Image.open')
+    @patch('ffmpy.FFmpeg')
+    def test_download_video_shares_identical_media(self, mock_ffmpeg, mock_pil, mock_ydl, settings):
+        service = VideoService()
+        with patch('urllib.request.urlopen') as mock_urlopen:
+            mock_urlopen.return_value.__enter__.return_value.read.return_value = b'dummy'
+            for video_id in ('test123', 'test456'):
+                self._mock_download(mock_ydl, mock_pil, mock_ffmpeg, video_id)
+                service.download_video(f'https://youtube.com/watch?v={video_id}')
+
+        first, second = YouTubeVideo.objects.order_by('id')
+        assert (first.original_video.name, first.audio.name) == (second.original_video.name, second.audio.name)
+        assert sorted(MediaBlob.objects.values_list('refcount', flat=True)) == [2, 2, 2]
+
+        first.delete()
+        assert sorted(MediaBlob.objects.values_list('refcount', flat=True)) == [1, 1, 1]
+        assert default_storage.exists(second.original_video.name)
+
+    @staticmethod
+    def _mock_download(mock_ydl, mock_pil, mock_ffmpeg, video_id):
+        """Make the mocked yt-dlp, Pillow and ffmpeg write their files like the real ones."""
+        ydl = Mock()
+        ydl.extract_info.side_effect = lambda url, download: {
+            'id': video_id,
             'duration': 300,
             'width': 1920,
             'height': 1080,
             'title': 'Test Video',
-            'thumbnail': 'http://example.com/thumb.jpg'
+            'thumbnail': 'http://example.com/thumb.jpg',
         }
-        mock_ydl_instance.extract_info.return_value = mock_info
-        mock_ydl_instance.prepare_filename.return_value = 'test123.mp4'
-        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
-
-        # Mock PIL Image
-        mock_image = Mock()
-        mock_pil.return_value.__enter__.return_value = mock_image
-
-        # Mock FFmpeg
-        mock_ffmpeg_instance = Mock()
-        mock_ffmpeg.return_value = mock_ffmpeg_instance
 
-        service = VideoService()
-        with patch('builtins.open', mock_open()):
-            with patch('urllib.request.urlopen') as mock_urlopen:
-                mock_urlopen.return_value.__enter__.return_value.read.return_value = b'dummy'
-                result = service.download_video('https://youtube.com/watch?v=test123')
+        def prepare_filename(info):
+            path = mock_ydl.call_args.args[0]['outtmpl'].replace('%(id)s', video_id).replace('%(ext)s', 'mp4')
+            Path(path).write_bytes(b'video')
+            return path
 
-        assert result == {'video_id': 'test123'}
-        mock_ffmpeg_instance.run.assert_called_once()
+        ydl.prepare_filename.side_effect = prepare_filename
+        mock_ydl.return_value.__enter__.return_value = ydl
+        mock_pil.return_value.__enter__.return_value.save.side_effect = lambda path: Path(path).write_bytes(b'jpeg')
+        mock_ffmpeg.side_effect = lambda inputs, outputs: Mock(
+            run=lambda: Path(next(iter(outputs))).write_bytes(b'audio'))
 
     @patch('yt_dlp.YoutubeDL')
     def test_download_video_failure(self, mock_ydl, settings):
@@ -56,7 +92,7 @@ class TestVideoService:
 
     @patch('urllib.request.urlopen')
     @patch('PIL.Image.open')
-    def test_download_thumbnail(self, mock_pil, mock_urlopen, settings):
+    def test_download_thumbnail(self, mock_pil, mock_urlopen, settings, tmp_path):
         # Mock PIL Image
         mock_image = Mock()
         mock_pil.return_value.__enter__.return_value = mock_image
@@ -68,18 +104,120 @@ class TestVideoService:
 
         service = VideoService()
         with patch('builtins.open', mock_open()):
-            result = service._download_thumbnail('test123', 'http://example.com/thumb.jpg')
+            result = service._download_thumbnail(Workspace(tmp_path), 'test123', 'http://example.com/thumb.jpg')
 
-        assert result == 'test123.jpg'
+        assert result == str(tmp_path / 'test123.jpg')
         mock_image.save.assert_called_once()
 
     @patch('ffmpy.FFmpeg')
-    def test_extract_audio(self, mock_ffmpeg, settings):
+    def test_extract_audio(self, mock_ffmpeg, settings, tmp_path):
         mock_ffmpeg_instance = Mock()
         mock_ffmpeg.return_value = mock_ffmpeg_instance
 
         service = VideoService()
-        result = service._extract_audio('test123', 'test123.mp4')
+        result = service._extract_audio(Workspace(tmp_path), 'test123', 'test123.mp4')
 
-        assert result == 'test123.m4a'
+        assert result == str(tmp_path / 'test123.m4a')
         mock_ffmpeg_instance.run.assert_called_once()
+
+    @patch('ffmpy.FFmpeg')
+    def test_extract_audio_copies_stream(self, mock_ffmpeg, settings, tmp_path):
+        settings.copy_audio_stream = True
+        settings.save()
+
+        service = VideoService()
+        scratch = Workspace(tmp_path)
+        ogg, m4a = str(tmp_path / 'test123.ogg'), str(tmp_path / 'test123.m4a')
+        assert service._extract_audio(scratch, 'test123', 'test123.f251.webm', 'opus') == ogg
+        mock_ffmpeg.assert_called_with(inputs={'test123.f251.webm': None},
+                                       outputs={ogg: '-y -c:a copy -vn'})
+
+        # Codecs that cannot be stored as-is are still transcoded
+        assert service._extract_audio(scratch, 'test123', 'test123.f600.webm', 'vorbis') == m4a
+        assert '-c:a copy' not in mock_ffmpeg.call_args.kwargs['outputs'][m4a]
+
+    @patch('ffmpy.FFmpeg')
+    def test_extract_audio_within_quota(self, mock_ffmpeg, settings, tmp_path):
+        (tmp_path / 'test123.mp4').write_bytes(b'x' * 40)
+        scratch = Workspace(tmp_path, quota=100)
+        m4a = str(tmp_path / 'test123.m4a')
+
+        # ffmpeg stops writing at the remaining quota instead of filling the disk first
+        mock_ffmpeg.return_value.run.side_effect = lambda: Path(m4a).write_bytes(b'a' * 10)
+        VideoService()._extract_audio(scratch, 'test123', 'test123.mp4')
+        assert mock_ffmpeg.call_args.kwargs['outputs'][m4a].endswith(' -fs 60')
+
+        # An output that reached the limit was cut off
+        mock_ffmpeg.return_value.run.side_effect = lambda: Path(m4a).write_bytes(b'a' * 50)
+        with pytest.raises(WorkspaceError, match='cut off'):
+            VideoService()._extract_audio(scratch, 'test123', 'test123.mp4')
+
+    def test_audio_stream(self, settings, tmp_path):
+        info = {'requested_formats': [
+            {'format_id': '137', 'ext': 'mp4', 'vcodec': 'avc1.640028', 'acodec': 'none'},
+            {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2'},
+        ]}
+        video_path = str(tmp_path / 'test123.mp4')
+
+        stream_paths = VideoService._stream_paths(info, video_path)
+        assert stream_paths == [str(tmp_path / 'test123.f137.mp4'), str(tmp_path / 'test123.f140.m4a')]
+        assert VideoService._audio_stream(info, stream_paths) is None
+
+        (tmp_path / 'test123.f140.m4a').write_bytes(b'audio')
+        assert VideoService._audio_stream(info, stream_paths) == (stream_paths[1], 'mp4a.40.2')
+
+    @patch.object(VideoService, 'download_video')
+    @patch('yt_dlp.YoutubeDL')
+    def test_ingest(self, mock_ydl, mock_download, settings, video):
+        def extract_info(url, download):
+            assert download is False
+            if url == 'https://youtube.com/@channel':
+                # Channel pages list their tabs as unresolved URL entries
+                return {'_type': 'playlist', 'entries': [
+                    {'_type': 'url', 'ie_key': 'YoutubeTab', 'url': 'https://youtube.com/@channel/videos'},
+                ]}
+            if url == 'https://youtube.com/@channel/videos':
+                return {'_type': 'playlist', 'entries': [
+                    {'_type': 'url', 'ie_key': 'Youtube', 'id': 'a'},
+                    {'_type': 'url', 'ie_key': 'Youtube', 'id': 'test123'},
+                    None,
+                ]}
+            raise Exception('Unsupported URL')
+
+        def download_video(url):
+            if url.endswith('=b'):
+                raise Exception('Private video')
+            return {'video_id': url[-1]}
+
+        mock_ydl.return_value.__enter__.return_value.extract_info.side_effect = extract_info
+        mock_download.side_effect = download_video
+        progress = []
+
+        service = VideoService()
+        result = service.ingest(['https://youtube.com/@channel', 'https://example.com/bad'], ['b', 'a'],
+                                concurrency=2, on_progress=lambda done, total: progress.append((done, total)))
+
+        items = {item.get('video_id') or item['url']: item for item in result['items']}
+        assert items['a']['status'] == 'downloaded'
+        assert items['b'] == {'video_id': 'b', 'status': 'failed', 'error': 'Private video'}
+        assert items['test123']['status'] == 'skipped'
+        assert items['https://example.com/bad']['status'] == 'failed'
+        assert (result['downloaded'], result['skipped'], result['failed']) == (1, 1, 2)
+        # Each video is downloaded once even when listed twice, and existing ones are not downloaded
+        assert sorted(call.args[0] for call in mock_download.call_args_list) == [
+            'https://www.youtube.com/watch?v=a', 'https://www.youtube.com/watch?v=b']
+        assert sorted(progress) == [(1, 2), (2, 2)]
+
+
+def test_download_progress_hook():
+    progress = []
+    hook = download_progress_hook(lambda done, total: progress.append(done * 100 // total))
+    video = {'vcodec': 'avc1', 'acodec': 'none'}
+    audio = {'vcodec': 'none', 'acodec': 'mp4a.40.2'}
+
+    hook({'status': 'downloading', 'info_dict': video, 'downloaded_bytes': 50, 'total_bytes': 100})
+    hook({'status': 'finished', 'info_dict': video, 'filename': 'a.f137.mp4'})
+    hook({'status': 'downloading', 'info_dict': audio, 'downloaded_bytes': 10, 'total_bytes_estimate': 20})
+    hook({'status': 'finished', 'info_dict': audio, 'filename': 'a.f140.m4a'})
+
+    assert progress == [25, 50, 75, 100]
@@ -0,0 +1,20 @@
+import asyncio
+
+from apps.clients import async_anthropic_client, async_openai_client, openai_client
+
+
+def test_sync_clients_are_shared_per_key():
+    assert openai_client('key_1') is openai_client('key_1')
+    assert openai_client('key_1') is not openai_client('key_2')
+
+
+def test_async_clients_are_cached_per_event_loop():
+    async def clients():
+        return async_openai_client('key'), async_openai_client('key'), async_anthropic_client('key')
+
+    # Every asyncio.run is a fresh loop, like an async view served under WSGI
+    first, second = asyncio.run(clients()), asyncio.run(clients())
+
+    assert first[0] is first[1]
+    assert first[0] is not second[0]
+    assert first[2] is not second[2]
@@ -0,0 +1,72 @@
+import pytest
+
+from apps.cues import Cue, CueList, canonical_srt_to_vtt
+
+SRT = (
+    "1\n00:00:01,000 --> 00:00:02,500\nHello\nworld\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\nSecond\n"
+)
+
+
+def test_parse():
+    cues = CueList.parse(SRT)
+
+    assert len(cues) == 2
+    assert list(cues) == [Cue(1000, 2500, "Hello\nworld"), Cue(3000, 4000, "Second")]
+    assert cues[-1].text == "Second"
+    assert cues.texts() == ["Hello\nworld", "Second"]
+
+
+def test_parse_crlf_and_bom():
+    cues = CueList.parse("\ufeff" + SRT.replace("\n", "\r\n"))
+
+    assert list(cues) == list(CueList.parse(SRT))
+
+
+def test_parse_skips_malformed_blocks():
+    content = (
+        "1\nnot a timing line\nGarbage\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nKept\n\n"
+        "\n\n\n"
+        "3\n00:00:05.5 --> 00:00:06.25\nShort millis"
+    )
+
+    assert list(CueList.parse(content)) == [Cue(3000, 4000, "Kept"), Cue(5500, 6250, "Short millis")]
+
+
+def test_to_srt_round_trip():
+    assert CueList.parse(SRT).to_srt() == SRT
+
+
+def test_to_vtt():
+    assert CueList.parse(SRT).to_vtt() == (
+        "WEBVTT\n\n"
+        "00:00:01.000 --> 00:00:02.500\nHello\nworld\n\n"
+        "00:00:03.000 --> 00:00:04.000\nSecond\n"
+    )
+    assert CueList.parse("").to_vtt() == "WEBVTT\n\n"
+
+
+def test_from_cues():
+    cues = CueList.from_cues([Cue(0, 1000, "a"), Cue(1000, 2000, "")])
+
+    assert cues.to_srt() == "1\n00:00:00,000 --> 00:00:01,000\na\n\n2\n00:00:01,000 --> 00:00:02,000\n"
+    with pytest.raises(IndexError):
+        cues[2]
+
+
+def test_join_shifted_and_with_texts():
+    first = CueList.parse(SRT)
+    second = CueList.parse("1\n00:00:00,500 --> 00:00:01,000\nThird\n").shifted(10000)
+
+    joined = CueList.join([first, second])
+
+    assert list(joined) == [Cue(1000, 2500, "Hello\nworld"), Cue(3000, 4000, "Second"), Cue(10500, 11000, "Third")]
+    assert joined.with_texts(["a", "", "c"]).texts() == ["a", "", "c"]
+    with pytest.raises(ValueError):
+        joined.with_texts(["a"])
+
+
+def test_canonical_srt_to_vtt():
+    assert canonical_srt_to_vtt(SRT) == CueList.parse(SRT).to_vtt()
+    assert canonical_srt_to_vtt("1\n00:00:01.000 --> 00:00:02.000\nDots\n") is None
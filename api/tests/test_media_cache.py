@@ -0,0 +1,275 @@
+import fcntl
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db.models.fields.files import FieldFile
+from django.test import override_settings
+
+from apps.media_cache import MediaCache, _lock, local_media, open_media, read_media
+
+
+class RemoteStorage(Storage):
+    """A storage without local paths, like S3, backed by a directory."""
+
+    def __init__(self, location):
+        self.local = FileSystemStorage(location=location, base_url='https://bucket.example.com/')
+
+    def _open(self, name, mode='rb'):
+        return self.local.open(name, mode)
+
+    def _save(self, name, content):
+        return self.local.save(name, content)
+
+    def delete(self, name):
+        self.local.delete(name)
+
+    def exists(self, name):
+        return self.local.exists(name)
+
+    def size(self, name):
+        return self.local.size(name)
+
+    def url(self, name, expire=None):
+        return self.local.url(name)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    storage = RemoteStorage(tmp_path / 'remote')
+
+    def store(name, content):
+        storage.delete(name)
+        storage.save(name, ContentFile(content))
+        return FieldFile(None, Mock(storage=storage), name)
+
+    return store
+
+
+def cached_files(root: Path):
+    return sorted(path for path in root.glob('*/*') if path.suffix not in ('.part', '.lock'))
+
+
+def test_fill_and_hit(remote, media_cache_root):
+    field_file = remote('videos/a.mp4', b'video')
+    cache = MediaCache(media_cache_root, 1024)
+
+    with patch.object(MediaCache, '_download', wraps=MediaCache._download) as download:
+        with cache.open(field_file) as first:
+            assert Path(first).read_bytes() == b'video'
+            assert first.endswith('.mp4')
+        with cache.open(field_file) as second:
+            assert second == first
+
+    download.assert_called_once()
+    assert cache.usage() == 5
+
+
+def test_changed_object_is_refetched(remote, media_cache_root):
+    cache = MediaCache(media_cache_root, 1024)
+    with cache.open(remote('videos/a.mp4', b'old')) as old:
+        pass
+
+    with cache.open(remote('videos/a.mp4', b'replaced')) as new:
+        assert new != old
+        assert Path(new).read_bytes() == b'replaced'
+
+
+def test_evicts_least_recently_used(remote, media_cache_root):
+    cache = MediaCache(media_cache_root, 10)
+    first, second, third = (remote(f'audios/{name}.m4a', b'12345') for name in 'abc')
+
+    with cache.open(first):
+        pass
+    with cache.open(second) as second_path:
+        pass
+    # Touch the first entry so the second is the least recently used one
+    time.sleep(0.01)
+    with cache.open(first) as first_path:
+        pass
+    time.sleep(0.01)
+    with cache.open(third) as third_path:
+        pass
+
+    assert cached_files(media_cache_root) == sorted([Path(first_path), Path(third_path)])
+    assert not Path(second_path).exists()
+
+
+def test_pinned_entries_are_not_evicted(remote, media_cache_root):
+    cache = MediaCache(media_cache_root, 5)
+
+    with cache.open(remote('audios/a.m4a', b'12345')) as pinned:
+        with cache.open(remote('audios/b.m4a', b'67890')) as newer:
+            assert Path(pinned).exists()
+            assert Path(newer).exists()
+
+
+def test_entries_in_use_by_another_process_are_not_evicted(remote, media_cache_root):
+    pinned = remote('audios/a.m4a', b'12345')
+    context = multiprocessing.get_context('fork')
+    ready, release = context.Event(), context.Event()
+
+    def use_in_child():
+        with MediaCache(media_cache_root, 5).open(pinned):
+            ready.set()
+            release.wait(5)
+
+    child = context.Process(target=use_in_child)
+    child.start()
+    try:
+        assert ready.wait(5)
+        # This process's cache knows nothing of the child's use but must not evict the entry
+        with MediaCache(media_cache_root, 5).open(remote('audios/b.m4a', b'67890')):
+            pass
+        assert len(cached_files(media_cache_root)) == 2
+    finally:
+        release.set()
+        child.join(5)
+
+    # Released, the older entry is evicted by the next fill
+    with MediaCache(media_cache_root, 5).open(remote('audios/c.m4a', b'abcde')) as newest:
+        pass
+    assert cached_files(media_cache_root) == [Path(newest)]
+
+
+def test_open_without_fill(remote, media_cache_root):
+    field_file = remote('videos/a.mp4', b'video')
+    cache = MediaCache(media_cache_root, 1024)
+
+    with cache.open(field_file, fill=False) as path:
+        assert path is None
+    assert cached_files(media_cache_root) == []
+
+    with cache.open(field_file) as filled, cache.open(field_file, fill=False) as path:
+        assert path == filled
+
+
+def test_open_without_fill_leaves_no_lock_file(remote, media_cache_root):
+    with MediaCache(media_cache_root, 1024).open(remote('videos/a.mp4', b'video'), fill=False):
+        pass
+
+    assert list(media_cache_root.glob('*/*')) == []
+
+
+def test_eviction_removes_leftovers_of_killed_processes(remote, media_cache_root):
+    cache = MediaCache(media_cache_root, 1024)
+    shard = media_cache_root / 'ab'
+    shard.mkdir(parents=True)
+    orphan_lock = shard / ('ab' * 32 + '.lock')
+    stale_part = shard / ('cd' * 32 + '.m4a.part')
+    stale_s3_part = shard / ('ef' * 32 + '.m4a.part.1a2b3c4d')
+    filling_part = shard / ('01' * 32 + '.m4a.part')
+    for path in (orphan_lock, stale_part, stale_s3_part, filling_part):
+        path.write_bytes(b'')
+
+    # A fill in progress holds its entry's lock
+    filling_lock = shard / ('01' * 32 + '.lock')
+    fd = _lock(filling_lock, fcntl.LOCK_EX)
+    try:
+        with cache.open(remote('videos/a.mp4', b'video')) as path:
+            pass
+    finally:
+        os.close(fd)
+
+    remaining = sorted(media_cache_root.glob('*/*'))
+    assert remaining == sorted([Path(path), Path(path).with_suffix('.lock'), filling_part, filling_lock])
+
+
+def test_single_flight(remote, media_cache_root):
+    field_file = remote('videos/a.mp4', b'video')
+    cache = MediaCache(media_cache_root, 1024)
+    started = threading.Event()
+    release = threading.Event()
+    downloads = []
+
+    def slow_download(storage, source, part_path):
+        downloads.append(part_path)
+        started.set()
+        release.wait(5)
+        Path(part_path).write_bytes(source.read())
+
+    paths = []
+
+    def use():
+        with cache.open(field_file) as path:
+            paths.append(Path(path).read_bytes())
+
+    with patch.object(MediaCache, '_download', side_effect=slow_download):
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+    assert len(downloads) == 1
+    assert paths == [b'video'] * 4
+
+
+def test_failed_fill_leaves_nothing(remote, media_cache_root):
+    cache = MediaCache(media_cache_root, 1024)
+
+    with patch.object(MediaCache, '_download', side_effect=OSError('connection reset')):
+        with pytest.raises(OSError):
+            with cache.open(remote('videos/a.mp4', b'video')):
+                pass
+
+    # Neither a partial download nor the entry's lock file is left behind
+    assert list(media_cache_root.glob('*/*')) == []
+
+
+def test_s3_objects_are_downloaded_with_transfer_config(media_cache_root):
+    cache = MediaCache(media_cache_root, 1024)
+    remote_file = Mock(size=5, obj=Mock(e_tag='"etag"'))
+    remote_file.obj.download_file.side_effect = lambda path, Config: Path(path).write_bytes(b'video')
+    storage = Mock(transfer_config='config')
+    storage.open.return_value.__enter__ = Mock(return_value=remote_file)
+    storage.open.return_value.__exit__ = Mock(return_value=False)
+
+    field_file = Mock(storage=storage)
+    field_file.name = 'videos/a.mp4'
+    with cache.open(field_file) as path:
+        assert Path(path).read_bytes() == b'video'
+
+    assert remote_file.obj.download_file.call_args.kwargs == {'Config': 'config'}
+
+
+def test_local_media(remote, media_cache_root):
+    field_file = remote('audios/a.m4a', b'audio')
+
+    with local_media(field_file) as path:
+        assert Path(path).parent.parent == media_cache_root
+    with open_media(field_file) as file:
+        assert file.read() == b'audio'
+    assert read_media(field_file) == b'audio'
+    # The file was fetched for the first use and only checked afterwards
+    assert len(cached_files(media_cache_root)) == 1
+
+
+def test_local_media_streams_uncached_files_without_fill(remote, media_cache_root):
+    field_file = remote('videos/a.mp4', b'video')
+
+    with local_media(field_file, fill=False) as source:
+        assert source == 'https://bucket.example.com/videos/a.mp4'
+    with local_media(field_file) as cached:
+        pass
+    with local_media(field_file, fill=False) as source:
+        assert source == cached
+
+
+def test_local_media_disabled(remote, media_cache_root):
+    field_file = remote('audios/a.m4a', b'audio')
+
+    with override_settings(MEDIA_CACHE_MAX_BYTES=0):
+        with local_media(field_file) as source:
+            assert source == 'https://bucket.example.com/audios/a.m4a'
+        assert read_media(field_file) == b'audio'
+
+    assert not media_cache_root.exists()
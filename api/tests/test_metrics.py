@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+
+from apps.metrics import (
+    BYTES_TRANSFERRED,
+    Counter,
+    FFMPEG_SPEED,
+    Histogram,
+    LLM_TOKENS,
+    STAGE_SECONDS,
+    record_translation_usage,
+    timed,
+)
+
+
+def test_counter_render():
+    counter = Counter('test_total', 'Test counter.', ['stage'])
+    counter.inc(3, stage='upload')
+    counter.inc(stage='upload')
+    counter.inc(2.5, stage='a"b')
+    assert counter.render() == '\n'.join([
+        '# HELP test_total Test counter.',
+        '# TYPE test_total counter',
+        'test_total{stage="a\\"b"} 2.5',
+        'test_total{stage="upload"} 4',
+    ])
+
+
+def test_histogram_render():
+    histogram = Histogram('test_seconds', 'Test histogram.', ['stage'], buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, stage='burn')
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{stage="burn",le="1"} 2',
+        'test_seconds_bucket{stage="burn",le="5"} 3',
+        'test_seconds_bucket{stage="burn",le="+Inf"} 4',
+        'test_seconds_sum{stage="burn"} 14.5',
+        'test_seconds_count{stage="burn"} 4',
+    ]
+
+
+def test_timed_records_stage(caplog):
+    count = STAGE_SECONDS.count(stage='test_stage', status='ok')
+    transferred = BYTES_TRANSFERRED.value(stage='test_stage')
+    speeds = FFMPEG_SPEED.count(stage='test_stage')
+
+    with caplog.at_level('INFO', logger='wandlung.metrics'):
+        with timed('test_stage', video_id='test123') as record:
+            record.update(bytes=1024, media_seconds=60)
+
+    assert STAGE_SECONDS.count(stage='test_stage', status='ok') == count + 1
+    assert BYTES_TRANSFERRED.value(stage='test_stage') == transferred + 1024
+    assert FFMPEG_SPEED.count(stage='test_stage') == speeds + 1
+    assert '"stage":"test_stage"' in caplog.text
+    assert '"video_id":"test123"' in caplog.text
+    assert '"speed":' in caplog.text
+
+
+def test_timed_records_failure():
+    count = STAGE_SECONDS.count(stage='test_failing', status='error')
+    transferred = BYTES_TRANSFERRED.value(stage='test_failing')
+
+    with pytest.raises(ValueError):
+        with timed('test_failing') as record:
+            record['bytes'] = 10
+            raise ValueError('boom')
+
+    assert STAGE_SECONDS.count(stage='test_failing', status='error') == count + 1
+    assert BYTES_TRANSFERRED.value(stage='test_failing') == transferred
+
+
+def test_record_translation_usage():
+    before = LLM_TOKENS.value(model='test-model', direction='input'), LLM_TOKENS.value(model='test-model', direction='output')
+
+    record_translation_usage('test-model', SimpleNamespace(input_tokens=120, output_tokens=80))
+    record_translation_usage('test-model', None)
+
+    assert LLM_TOKENS.value(model='test-model', direction='input') == before[0] + 120
+    assert LLM_TOKENS.value(model='test-model', direction='output') == before[1] + 80
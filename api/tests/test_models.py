@@ -1,6 +1,8 @@
 import pytest
 from datetime import timedelta
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from unittest.mock import patch
 from apps.models import YouTubeVideo, Subtitle, Settings
 from wandlung.storages import MediaStorage
 
@@ -159,3 +161,41 @@ def test_settings_singleton():
             max_video_height=1080,
             use_he_aac_v2=False
         )
+
+
+@pytest.mark.django_db
+def test_settings_load_is_cached(django_assert_num_queries):
+    """
+    Tests that the singleton is queried once and reloaded after a save.
+    """
+    Settings.objects.create(openai_api_key="key_1")
+
+    with django_assert_num_queries(1):
+        assert Settings.load().openai_api_key == "key_1"
+        assert Settings.load().openai_api_key == "key_1"
+
+    settings = Settings.objects.get()
+    settings.openai_api_key = "key_2"
+    settings.save()
+    assert Settings.load().openai_api_key == "key_2"
+
+
+@pytest.mark.django_db
+def test_settings_load_reloads_on_version_change(django_assert_num_queries):
+    """
+    Tests that a save by another process is picked up once the recheck interval passed.
+    """
+    Settings.objects.create(openai_api_key="key_1")
+    Settings.load()
+
+    # Another process saving the row, which moves its stamp
+    Settings.objects.update(openai_api_key="key_2", updated=timezone.now())
+    assert Settings.load().openai_api_key == "key_1"
+
+    with patch('apps.models.SETTINGS_RECHECK_SECONDS', 0):
+        # The stamp differs, so the row is reloaded
+        with django_assert_num_queries(2):
+            assert Settings.load().openai_api_key == "key_2"
+        # The stamp is unchanged, so only the stamp is read
+        with django_assert_num_queries(1):
+            assert Settings.load().openai_api_key == "key_2"
@@ -0,0 +1,74 @@
+import pytest
+from datetime import datetime, timezone
+from io import BytesIO
+from django.test import RequestFactory
+from django.utils.http import http_date
+
+from apps.responses import media_response, parse_range, RangeNotSatisfiable
+
+MODIFIED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def get(**headers):
+    return RequestFactory().get('/media', headers=headers)
+
+
+def body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range('bytes=0-9', 100) == (0, 9)
+    assert parse_range('bytes=90-', 100) == (90, 99)
+    assert parse_range('bytes=-10', 100) == (90, 99)
+    assert parse_range('bytes=50-500', 100) == (50, 99)
+    assert parse_range('bytes=0-1,5-6', 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range('bytes=100-', 100)
+
+
+def test_full_response():
+    response = media_response(get(), b'0123456789', 'text/plain', etag='abc', last_modified=MODIFIED)
+
+    assert response.status_code == 200
+    assert body(response) == b'0123456789'
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['ETag'] == '"abc"'
+    assert response['Last-Modified'] == http_date(MODIFIED.timestamp())
+
+
+def test_range_response_from_file():
+    response = media_response(get(Range='bytes=2-5'), BytesIO(b'0123456789'), 'video/mp4', size=10)
+
+    assert response.status_code == 206
+    assert body(response) == b'2345'
+    assert response['Content-Range'] == 'bytes 2-5/10'
+    assert response['Content-Length'] == '4'
+
+
+def test_range_not_satisfiable():
+    response = media_response(get(Range='bytes=20-'), b'0123456789', 'text/plain')
+
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */10'
+
+
+def test_if_none_match():
+    response = media_response(get(If_None_Match='"abc"'), b'0123456789', 'text/plain', etag='abc')
+
+    assert response.status_code == 304
+
+
+def test_if_modified_since():
+    response = media_response(get(If_Modified_Since=http_date(MODIFIED.timestamp())), b'0123456789',
+                              'text/plain', last_modified=MODIFIED)
+
+    assert response.status_code == 304
+
+
+def test_if_range_mismatch_serves_full_content():
+    response = media_response(get(Range='bytes=2-5', If_Range='"stale"'), b'0123456789', 'text/plain', etag='abc')
+
+    assert response.status_code == 200
+    assert body(response) == b'0123456789'
@@ -0,0 +1,42 @@
+from unittest.mock import Mock, patch
+
+from wandlung.storages import SignedUrlCache, get_media_storage, signed_url
+
+
+def make_storage(expire=900):
+    storage = Mock(querystring_expire=expire)
+    storage.url.side_effect = lambda name: f"https://signed/{name}?n={storage.url.call_count}"
+    return storage
+
+
+def test_reuses_url_for_half_its_lifetime():
+    storage = make_storage()
+    cache = SignedUrlCache()
+
+    with patch('time.monotonic', return_value=1000.0):
+        first = cache.get(storage, 'videos/a.mp4')
+    with patch('time.monotonic', return_value=1449.0):
+        assert cache.get(storage, 'videos/a.mp4') == first
+    with patch('time.monotonic', return_value=1451.0):
+        assert cache.get(storage, 'videos/a.mp4') != first
+    assert storage.url.call_count == 2
+
+
+def test_evicts_least_recently_used():
+    storage = make_storage()
+    cache = SignedUrlCache(max_entries=2)
+
+    cache.get(storage, 'a')
+    cache.get(storage, 'b')
+    cache.get(storage, 'a')
+    cache.get(storage, 'c')
+    cache.get(storage, 'a')
+    cache.get(storage, 'b')
+
+    # 'b' was evicted when 'c' was added, everything else came from the cache
+    assert [call.args[0] for call in storage.url.call_args_list] == ['a', 'b', 'c', 'b']
+
+
+def test_shared_media_storage():
+    assert get_media_storage() is get_media_storage()
+    assert signed_url('thumbnails/a.jpg') == signed_url('thumbnails/a.jpg')
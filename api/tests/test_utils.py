@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import Mock
+
+from apps.cues import CueList
+from apps.utils import (
+    Cue,
+    parse_srt,
+    slice_cues,
+    srt_to_webvtt,
+    stitch_srt,
+    media_source,
+    ffmpeg_input_options,
+    download_url,
+)
+from wandlung.storages import MediaStorage
+
+
+def test_parse_srt_is_compact():
+    cues = parse_srt("1\n00:00:01,000 --> 00:00:02,000\nHello\n")
+
+    assert isinstance(cues, CueList)
+    assert list(cues) == [Cue(1000, 2000, "Hello")]
+
+
+@pytest.mark.parametrize("content", [
+    "1\n00:00:01,000 --> 00:00:02,500\nHello\nworld\n\n2\n00:00:03,000 --> 00:00:04,000\n\n"
+    "3\n00:00:05,000 --> 00:00:06,000\nLast\n",
+    # Not canonical: cue settings, short milliseconds, CRLF, extra blank lines, whitespace-only lines
+    "1\n00:00:01,000 --> 00:00:02,000 align:start\nSettings\n",
+    "1\n00:00:01.5 --> 00:00:02.25\nShort\n",
+    "\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\nWindows\r\n",
+    "1\n00:00:01,000 --> 00:00:02,000\nA\n\n\n\n2\n00:00:03,000 --> 00:00:04,000\nB\n",
+    "1\n00:00:01,000 --> 00:00:02,000\nA\n  \nB\n",
+    "",
+])
+def test_srt_to_webvtt_matches_parsed_conversion(content):
+    assert srt_to_webvtt(content) == CueList.parse(content).to_vtt()
+
+
+def test_stitch_srt():
+    """
+    Cues from later segments are shifted by the segment offset
+    and all cues are renumbered in order.
+    """
+    first = "1\n00:00:00,000 --> 00:00:02,000\nHello\n\n2\n00:00:02,500 --> 00:00:04,000\nWorld\n"
+    second = "1\n00:00:01,000 --> 00:00:03,000\nAgain\nand again\n"
+
+    stitched = stitch_srt([(0.0, first), (600.5, second), (1200.0, "")])
+
+    assert stitched == (
+        "1\n00:00:00,000 --> 00:00:02,000\nHello\n\n"
+        "2\n00:00:02,500 --> 00:00:04,000\nWorld\n\n"
+        "3\n00:10:01,500 --> 00:10:03,500\nAgain\nand again\n"
+    )
+
+
+def test_slice_cues():
+    cues = CueList.from_cues(
+        [Cue(0, 1000, "a"), Cue(9000, 11000, "b"), Cue(12000, 13000, "c"), Cue(19500, 21000, "d")])
+
+    assert list(slice_cues(cues, 10000, 20000)) == [
+        Cue(0, 1000, "b"), Cue(2000, 3000, "c"), Cue(9500, 10000, "d")]
+
+
+def test_media_source_local():
+    field_file = Mock(path="/media/videos/video.mp4")
+
+    assert media_source(field_file) == "/media/videos/video.mp4"
+    assert ffmpeg_input_options(media_source(field_file)) == ""
+
+
+def test_media_source_remote():
+    field_file = Mock()
+    type(field_file).path = property(Mock(side_effect=NotImplementedError))
+    field_file.storage.url.return_value = "https://bucket.s3.amazonaws.com/media/videos/video.mp4?X-Amz-Signature=x"
+
+    source = media_source(field_file)
+
+    assert source.startswith("https://")
+    assert "-reconnect 1" in ffmpeg_input_options(source)
+
+
+def test_download_url_s3(mocker):
+    storage = mocker.patch('apps.utils.default_storage', spec=MediaStorage)
+    storage.url.return_value = "https://signed"
+
+    assert download_url("burns/1/a.mp4", "video.mp4", expire=300) == "https://signed"
+    storage.url.assert_called_once_with("burns/1/a.mp4", parameters={
+        'ResponseContentDisposition': 'attachment; filename="video.mp4"',
+    }, expire=300)
+
+    download_url("burns/1/a.mp4", "video.mp4", expire=300, inline=True)
+    assert storage.url.call_args.kwargs["parameters"] == {
+        'ResponseContentDisposition': 'inline; filename="video.mp4"',
+    }
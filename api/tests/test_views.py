@@ -0,0 +1,25 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+def test_serve_media_range(client):
+    name = default_storage.save('burns/1/video.mp4', ContentFile(b'0123456789'))
+
+    response = client.get(f'/media/{name}', headers={'Range': 'bytes=5-'})
+
+    assert response.status_code == 206
+    assert response['Content-Type'] == 'video/mp4'
+    assert b''.join(response.streaming_content) == b'56789'
+
+
+def test_serve_media_missing(client):
+    response = client.get('/media/burns/1/missing.mp4')
+
+    assert response.status_code == 404
+
+
+def test_metrics(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert b'# TYPE wandlung_stage_duration_seconds histogram' in response.content
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+from django.test import override_settings
+
+from apps.exceptions import WorkspaceError
+from apps.workspace import Workspace, check_size_limit, ffmpeg_size_limit, sweep_workspaces, workspace
+
+
+def test_workspace_is_unique_and_removed(scratch_root):
+    with workspace('burn-1') as first, workspace('burn-1') as second:
+        assert first.path != second.path
+        assert first.path.parent == scratch_root
+        assert first.path.name.startswith('burn-1-')
+        with open(first.file('video.mp4'), 'w') as f:
+            f.write('video')
+
+    assert list(scratch_root.iterdir()) == []
+
+
+def test_workspace_removed_on_error(scratch_root):
+    with pytest.raises(ValueError):
+        with workspace('download') as scratch:
+            (scratch.path / 'partial.mp4').write_bytes(b'partial')
+            raise ValueError('failed')
+
+    assert list(scratch_root.iterdir()) == []
+
+
+def test_workspace_name_is_sanitized(scratch_root):
+    with workspace('../transcribe/a b') as scratch:
+        assert scratch.path.parent == scratch_root
+        assert scratch.path.name.startswith('.._transcribe_a_b-')
+
+
+def test_workspace_quota(tmp_path):
+    scratch = Workspace(tmp_path, quota=10)
+    (tmp_path / 'a').write_bytes(b'12345')
+    assert scratch.remaining() == 5
+    scratch.check()
+
+    (tmp_path / 'b').write_bytes(b'123456')
+    assert scratch.remaining() == 0
+    with pytest.raises(WorkspaceError, match='over its quota'):
+        scratch.check()
+
+    assert Workspace(tmp_path).remaining() is None
+
+
+def test_workspace_size_limit(tmp_path):
+    scratch = Workspace(tmp_path, quota=10)
+    (tmp_path / 'a').write_bytes(b'1234')
+    assert scratch.size_limit() == 6
+    assert scratch.size_limit(share=4) == 1
+    assert ffmpeg_size_limit(scratch.size_limit()) == '-fs 6'
+    with pytest.raises(WorkspaceError, match='used up'):
+        scratch.size_limit(share=7)
+
+    scratch.reserve(6)
+    with pytest.raises(WorkspaceError, match='7 required'):
+        scratch.reserve(7)
+
+    unlimited = Workspace(tmp_path)
+    assert unlimited.size_limit() is None
+    assert ffmpeg_size_limit(None) == ''
+    unlimited.reserve(1 << 40)
+
+
+def test_check_size_limit(tmp_path):
+    output = tmp_path / 'out.mp4'
+    output.write_bytes(b'12345')
+
+    check_size_limit(str(output), None)
+    check_size_limit(str(output), 6)
+    # ffmpeg stopped writing at the limit, so the output is incomplete
+    with pytest.raises(WorkspaceError, match='cut off'):
+        check_size_limit(str(output), 5)
+
+
+def test_workspace_min_free(scratch_root):
+    with override_settings(SCRATCH_MIN_FREE=1 << 60):
+        with pytest.raises(WorkspaceError, match='scratch disk'):
+            with workspace('burn-1'):
+                pass
+
+    assert list(scratch_root.iterdir()) == []
+
+
+def test_sweep_workspaces(scratch_root):
+    stale = scratch_root / 'burn-1-old'
+    current = scratch_root / 'burn-2-new'
+    stale.mkdir(parents=True)
+    current.mkdir()
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+
+    assert sweep_workspaces(60) == 1
+    assert list(scratch_root.iterdir()) == [current]
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from decouple import config
 
@@ -145,3 +146,47 @@ STORAGES = {
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 FFMPEG_BIN = config('FFMPEG_BIN', default='/opt/homebrew/bin/ffmpeg')
+
+# Background jobs
+JOB_WORKERS = config('JOB_WORKERS', default=2, cast=int)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=1.0, cast=float)
+JOB_METRICS_PORT = config('JOB_METRICS_PORT', default=0, cast=int)
+# Running jobs without a heartbeat for this long are claimed again by another worker
+JOB_LEASE_SECONDS = config('JOB_LEASE_SECONDS', default=60, cast=int)
+# A job whose worker died this many times is failed instead of claimed again
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+
+# Scratch space for the media files of running jobs, one directory per job.
+# Point it at fast local storage (tmpfs, NVMe); a quota of 0 means unlimited.
+SCRATCH_ROOT = config('SCRATCH_ROOT', default=os.path.join(tempfile.gettempdir(), 'wandlung'))
+SCRATCH_QUOTA = config('SCRATCH_QUOTA_MB', default=0, cast=int) * 1024 * 1024
+SCRATCH_MIN_FREE = config('SCRATCH_MIN_FREE_MB', default=1024, cast=int) * 1024 * 1024
+
+# Local cache of media downloaded from S3 for transcriptions and burns, evicted
+# least recently used first beyond its size; 0 disables it
+MEDIA_CACHE_ROOT = config('MEDIA_CACHE_ROOT', default=os.path.join(tempfile.gettempdir(), 'wandlung-media'))
+MEDIA_CACHE_MAX_BYTES = config('MEDIA_CACHE_MAX_MB', default=10240, cast=int) * 1024 * 1024
+
+# Cache of rendered WebVTT. Use a shared backend, e.g. FileBasedCache or Redis, so that
+# several processes render each subtitle version once.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Pipeline stage timings are logged as one JSON object per line on `wandlung.metrics`
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'wandlung': {
+            'handlers': ['console'],
+            'level': config('LOG_LEVEL', default='INFO'),
+        },
+    },
+}
@@ -1,5 +1,14 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Tuple
+
+from boto3.s3.transfer import TransferConfig
 from storages.backends.s3boto3 import S3Boto3Storage
 
+MB = 1024 * 1024
+
 
 class MediaStorage(S3Boto3Storage):
     location = 'media'
@@ -10,9 +19,64 @@ class MediaStorage(S3Boto3Storage):
     querystring_expire = 900
     signature_version = 's3v4'
 
+    # Large media (burned videos, originals) is uploaded in parallel multipart chunks
+    transfer_config = TransferConfig(
+        multipart_threshold=16 * MB,
+        multipart_chunksize=16 * MB,
+        max_concurrency=8,
+        use_threads=True,
+    )
+
 
 class StaticStorage(S3Boto3Storage):
     location = 'static'
     default_acl = 'public-read'
     file_overwrite = True
 
+
+
+class SignedUrlCache:
+    """
+    Process-wide cache of signed media URLs. A URL is reused for the first half
+    of its lifetime, so every URL handed out stays valid for at least
+    `querystring_expire / 2` seconds while listings sign each object only once
+    per period instead of on every request.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, storage: S3Boto3Storage, name: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(name)
+                return entry[0]
+
+        url = storage.url(name)
+        with self._lock:
+            self._entries[name] = (url, now + storage.querystring_expire / 2)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return url
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+signed_url_cache = SignedUrlCache()
+
+
+@lru_cache(maxsize=None)
+def get_media_storage() -> MediaStorage:
+    """Shared MediaStorage instance; boto3 clients are created once per thread by the storage."""
+    return MediaStorage()
+
+
+def signed_url(name: str) -> str:
+    return signed_url_cache.get(get_media_storage(), name)
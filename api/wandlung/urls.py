@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from apps.api import api
+from apps.views import metrics, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', api.urls),
+    path('media/<path:path>', serve_media),
+    path('metrics', metrics),
 ]
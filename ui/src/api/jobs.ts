@@ -0,0 +1,64 @@
+export type JobStatus = 'pending' | 'running' | 'succeeded' | 'failed';
+
+export interface Job<R> {
+  id: number;
+  kind: string;
+  status: JobStatus;
+  progress: number;
+  result: R | null;
+  error: string;
+}
+
+export interface SubtitleJobResult {
+  success: boolean;
+  subtitle_id: number;
+}
+
+export interface BurnJobResult {
+  name: string;
+  url: string;
+  video_id: string;
+}
+
+export interface DownloadJobResult {
+  video_id: string;
+}
+
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Queue a background job and poll it until it finishes, so long operations
+// never hold a web worker for their whole duration.
+export const runJob = async <R>(
+  kind: 'download' | 'transcribe' | 'translate' | 'burn',
+  params: object,
+  onProgress?: (progress: number) => void,
+): Promise<R> => {
+  const response = await fetch(`/api/jobs/${kind}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(params),
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to start ${kind} job: Status: ${response.status}`);
+  }
+
+  let job: Job<R> = await response.json();
+  while (job.status === 'pending' || job.status === 'running') {
+    await sleep(POLL_INTERVAL_MS);
+    const poll = await fetch(`/api/jobs/${job.id}`);
+    if (!poll.ok) {
+      throw new Error(`Failed to fetch ${kind} job: Status: ${poll.status}`);
+    }
+    job = await poll.json();
+    onProgress?.(job.progress);
+  }
+
+  if (job.status === 'failed') {
+    throw new Error(job.error || `The ${kind} job failed`);
+  }
+  return job.result as R;
+};
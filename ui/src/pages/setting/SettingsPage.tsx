@@ -14,6 +14,7 @@ const SettingsPage: React.FC = () => {
           anthropicKey: data.anthropic_api_key,
           maxHeight: data.max_video_height.toString(),
           useHeAacV2: data.use_he_aac_v2,
+          copyAudioStream: data.copy_audio_stream,
         });
       })
       .catch(error => {
@@ -28,6 +29,7 @@ const SettingsPage: React.FC = () => {
       anthropic_api_key: values.anthropicKey,
       max_video_height: parseInt(values.maxHeight),
       use_he_aac_v2: values.useHeAacV2,
+      copy_audio_stream: values.copyAudioStream,
     };
 
     fetch('/api/settings', {
@@ -58,6 +60,7 @@ const SettingsPage: React.FC = () => {
         anthropicKey: '',
         resolution: '1080p',
         useHeAacV2: false,
+        copyAudioStream: false,
       }}
     >
       <Form.Item
@@ -98,6 +101,14 @@ const SettingsPage: React.FC = () => {
         <Switch />
       </Form.Item>
 
+      <Form.Item
+        label="Keep downloaded AAC/Opus audio without re-encoding"
+        name="copyAudioStream"
+        valuePropName="checked"
+      >
+        <Switch />
+      </Form.Item>
+
       <Form.Item>
         <Button type="primary" htmlType="submit">
           Save Settings
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
-import { Modal, Select, message, Spin } from 'antd';
+import { Modal, Select, message, Spin, Progress } from 'antd';
+import { runJob, type SubtitleJobResult } from '../../api/jobs';
 
 interface Video {
   video_id: string;
@@ -8,6 +9,11 @@ interface Video {
   duration: number;
 }
 
+interface VideoPage {
+  items: Video[];
+  next_cursor: number | null;
+}
+
 interface TranscribeVideoModalProps {
   open: boolean;
   onClose: () => void;
@@ -18,9 +24,11 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
   onClose,
 }) => {
   const [videos, setVideos] = useState<Video[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
   const [selectedVideo, setSelectedVideo] = useState<string>();
   const [loading, setLoading] = useState(false);
   const [transcribing, setTranscribing] = useState(false);
+  const [progress, setProgress] = useState(0);
 
   useEffect(() => {
     if (open) {
@@ -28,13 +36,15 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
     }
   }, [open]);
 
-  const fetchVideos = async () => {
+  const fetchVideos = async (cursor?: number) => {
     setLoading(true);
     try {
-      const response = await fetch('/api/videos/recent');
+      const response = await fetch(
+        cursor === undefined ? '/api/videos/recent' : `/api/videos/recent?cursor=${cursor}`);
       if (!response.ok) throw new Error('Failed to fetch videos');
-      const data = await response.json();
-      setVideos(data);
+      const data: VideoPage = await response.json();
+      setVideos((previous) => (cursor === undefined ? data.items : [...previous, ...data.items]));
+      setNextCursor(data.next_cursor ?? null);
     } catch (error) {
       message.error('Failed to load videos');
       console.error(error);
@@ -43,6 +53,14 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
     }
   };
 
+  // Load the next page once the dropdown is scrolled to its end
+  const handlePopupScroll = (event: React.UIEvent<HTMLDivElement>) => {
+    const target = event.currentTarget;
+    if (!loading && nextCursor !== null && target.scrollTop + target.clientHeight >= target.scrollHeight - 16) {
+      fetchVideos(nextCursor);
+    }
+  };
+
   const handleOk = async () => {
     if (!selectedVideo) {
       message.warning('Please select a video');
@@ -50,12 +68,9 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
     }
 
     setTranscribing(true);
+    setProgress(0);
     try {
-      const response = await fetch(`/api/videos/${selectedVideo}/transcribe`, {
-        method: 'POST',
-      });
-
-      if (!response.ok) throw new Error('Failed to transcribe video');
+      await runJob<SubtitleJobResult>('transcribe', { video_id: selectedVideo }, setProgress);
 
       message.success('Video transcribed successfully');
       onClose();
@@ -82,13 +97,14 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
       confirmLoading={transcribing}
       okText="Transcribe"
     >
-      <Spin spinning={loading}>
+      <Spin spinning={loading && videos.length === 0}>
         <Select
           style={{ width: '100%' }}
           placeholder="Select a video to transcribe"
           onChange={setSelectedVideo}
           value={selectedVideo}
           loading={loading}
+          onPopupScroll={handlePopupScroll}
           optionLabelProp="label"
           options={videos.map(video => ({
             value: video.video_id,
@@ -111,6 +127,7 @@ const TranscribeVideoModal: React.FC<TranscribeVideoModalProps> = ({
           }))}
         />
       </Spin>
+      {transcribing && <Progress style={{ marginTop: 16 }} percent={progress} status="active" />}
     </Modal>
   );
 };
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
-import { Modal, Input, message, Form } from 'antd';
+import { Modal, Input, message, Form, Progress } from 'antd';
+import { runJob, type SubtitleJobResult } from '../../api/jobs';
 
 interface TranslateSubtitleModalProps {
   open: boolean;
@@ -13,27 +14,22 @@ const TranslateSubtitleModal: React.FC<TranslateSubtitleModalProps> = ({
   onClose,
 }) => {
   const [loading, setLoading] = useState(false);
+  const [progress, setProgress] = useState(0);
   const [form] = Form.useForm();
 
   const handleOk = async () => {
     try {
       const values = await form.validateFields();
       setLoading(true);
+      setProgress(0);
 
-      const response = await fetch(`/api/subtitles/${subtitleId}/translate`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          target_language: values.target_language,
-          temperature: values.temperature,
-        }),
-      });
+      const { subtitle_id } = await runJob<SubtitleJobResult>('translate', {
+        subtitle_id: subtitleId,
+        target_language: values.target_language,
+        temperature: values.temperature,
+      }, setProgress);
 
-      if (!response.ok) throw new Error('Translation failed');
-
-      message.success('Translation started successfully');
+      message.success(`Translation finished as subtitle ${subtitle_id}`);
       form.resetFields();
       onClose();
     } catch (error) {
@@ -92,6 +88,7 @@ const TranslateSubtitleModal: React.FC<TranslateSubtitleModalProps> = ({
           />
         </Form.Item>
       </Form>
+      {loading && <Progress percent={progress} status="active" />}
     </Modal>
   );
 };
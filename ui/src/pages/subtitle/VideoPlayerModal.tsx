@@ -1,5 +1,6 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { Modal, Input, Button, message } from 'antd';
+import { runJob, type BurnJobResult } from '../../api/jobs';
 
 interface VideoInfo {
   video_url: string;
@@ -44,6 +45,9 @@ const VideoPlayerModal: React.FC<VideoPlayerModalProps> = ({
   const [editedContent, setEditedContent] = useState<string>('');
   const [startTime, setStartTime] = useState<string>('');
   const [endTime, setEndTime] = useState<string>('');
+  const [burnProgress, setBurnProgress] = useState<number | null>(null);
+  const [previewUrl, setPreviewUrl] = useState<string | null>(null);
+  const [previewing, setPreviewing] = useState(false);
   const videoRef = useRef<HTMLVideoElement>(null);
 
   useEffect(() => {
@@ -67,6 +71,7 @@ const VideoPlayerModal: React.FC<VideoPlayerModalProps> = ({
       }
     };
 
+    setPreviewUrl(null);
     if (open && videoId && subtitleId) {
       fetchData();
     } else {
@@ -120,41 +125,49 @@ const VideoPlayerModal: React.FC<VideoPlayerModalProps> = ({
       return;
     }
 
+    setBurnProgress(0);
     try {
-      const response = await fetch(`/api/subtitles/${subtitleId}/burn`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          start_seconds: startSeconds,
-          end_seconds: endSeconds,
-        }),
-      });
+      const { url } = await runJob<BurnJobResult>('burn', {
+        subtitle_id: subtitleId,
+        start_seconds: startSeconds,
+        end_seconds: endSeconds,
+      }, setBurnProgress);
 
-      if (!response.ok) throw new Error('Burn request failed');
-
-      // Get filename from Content-Disposition header if available
-      const contentDisposition = response.headers.get('Content-Disposition');
-      const filename = contentDisposition
-        ? contentDisposition.split('filename=')[1].replace(/"/g, '')
-        : 'video-with-subtitle.mp4';
-
-      // Create a download link and trigger it
-      const blob = await response.blob();
-      const url = window.URL.createObjectURL(blob);
+      // The burned video is downloaded straight from storage through a signed URL
       const a = document.createElement('a');
       a.href = url;
-      a.download = filename;
+      a.download = 'video-with-subtitle.mp4';
       document.body.appendChild(a);
       a.click();
-      window.URL.revokeObjectURL(url);
       document.body.removeChild(a);
 
       message.success('Video download started');
     } catch (error) {
       console.error('Error burning subtitle:', error);
       message.error('Failed to burn subtitle into video');
+    } finally {
+      setBurnProgress(null);
+    }
+  };
+
+  const handlePreview = async () => {
+    if (!subtitleId) return;
+
+    setPreviewing(true);
+    try {
+      // Short low-resolution burn around the current playback position,
+      // played in place of the original video
+      const { url } = await runJob<BurnJobResult>('burn', {
+        subtitle_id: subtitleId,
+        preview: true,
+        at_seconds: videoRef.current?.currentTime ?? 0,
+      });
+      setPreviewUrl(url);
+    } catch (error) {
+      console.error('Error previewing subtitle:', error);
+      message.error('Failed to preview burned subtitle');
+    } finally {
+      setPreviewing(false);
     }
   };
 
@@ -173,7 +186,19 @@ const VideoPlayerModal: React.FC<VideoPlayerModalProps> = ({
       width={800}
       style={{ display: 'flex', flexDirection: 'column', gap: '16px' }}
     >
-      {videoInfo && (
+      {videoInfo && previewUrl && (
+        // The subtitles are burned into the preview, so no track is needed
+        <video
+          controls
+          autoPlay
+          style={{ width: '100%' }}
+          key={previewUrl}
+        >
+          <source src={previewUrl} type="video/mp4" />
+        </video>
+      )}
+
+      {videoInfo && !previewUrl && (
         <video
           ref={videoRef}
           controls
@@ -222,8 +247,17 @@ const VideoPlayerModal: React.FC<VideoPlayerModalProps> = ({
                 onChange={(e) => setEndTime(e.target.value)}
                 style={{ width: '150px' }}
               />
-              <Button type="primary" onClick={handleBurn}>
-                Burn with subtitle
+              {previewUrl ? (
+                <Button onClick={() => setPreviewUrl(null)}>
+                  Back to video
+                </Button>
+              ) : (
+                <Button onClick={handlePreview} loading={previewing}>
+                  Preview
+                </Button>
+              )}
+              <Button type="primary" onClick={handleBurn} loading={burnProgress !== null}>
+                {burnProgress === null ? 'Burn with subtitle' : `Burning ${burnProgress}%`}
               </Button>
             </div>
           </div>
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
-import { Modal, Input, Spin, Button } from 'antd';
+import { Modal, Input, Progress, Button } from 'antd';
+import { runJob, type DownloadJobResult } from '../../api/jobs';
 
 interface AddVideoModalProps {
   open: boolean;
@@ -9,6 +10,7 @@ interface AddVideoModalProps {
 const AddVideoModal: React.FC<AddVideoModalProps> = ({ open, onClose }) => {
   const [youtubeUrl, setYoutubeUrl] = useState('');
   const [isDownloading, setIsDownloading] = useState(false);
+  const [progress, setProgress] = useState(0);
 
   useEffect(() => {
     if (!open) {
@@ -18,19 +20,10 @@ const AddVideoModal: React.FC<AddVideoModalProps> = ({ open, onClose }) => {
 
   const handleDownload = async () => {
     setIsDownloading(true);
+    setProgress(0);
 
     try {
-      const response = await fetch('/api/videos/download', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ url: youtubeUrl }),
-      });
-
-      if (!response.ok) {
-        throw new Error(`Failed to download video: Status: ${response.status}`);
-      }
+      await runJob<DownloadJobResult>('download', { url: youtubeUrl }, setProgress);
       onClose();
     } catch (error) {
       console.error('Download error', error);
@@ -53,9 +46,7 @@ const AddVideoModal: React.FC<AddVideoModalProps> = ({ open, onClose }) => {
         onChange={(e) => setYoutubeUrl(e.target.value)}
       />
       {isDownloading ? (
-        <div style={{ marginTop: 16, textAlign: 'center' }}>
-          <Spin />
-        </div>
+        <Progress style={{ marginTop: 16 }} percent={progress} status="active" />
       ) : (
         <Button
           type="primary"
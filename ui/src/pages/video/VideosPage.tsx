@@ -12,19 +12,27 @@ interface VideoItem {
   thumbnail_url: string;
 }
 
+interface VideoPage {
+  items: VideoItem[];
+  next_cursor: number | null;
+}
+
 const VideosPage: React.FC = () => {
   const [isAddModalOpen, setIsAddModalOpen] = useState(false);
 
   const [videos, setVideos] = useState<VideoItem[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
   const [loading, setLoading] = useState(false);
 
-  const fetchVideos = async () => {
+  // Without a cursor the list is reloaded from the newest video; with one the next page is appended
+  const fetchVideos = async (cursor?: number) => {
     setLoading(true);
     try {
-      const response = await fetch('/api/videos');
+      const response = await fetch(cursor === undefined ? '/api/videos' : `/api/videos?cursor=${cursor}`);
       if (!response.ok) throw new Error('Failed to fetch videos');
-      const data = await response.json();
-      setVideos(data);
+      const data: VideoPage = await response.json();
+      setVideos((previous) => (cursor === undefined ? data.items : [...previous, ...data.items]));
+      setNextCursor(data.next_cursor ?? null);
     } catch (error) {
       message.error('Failed to load videos');
       console.error(error);
@@ -128,6 +136,13 @@ const VideosPage: React.FC = () => {
         loading={loading}
         rowKey="video_id" 
       />
+      {nextCursor !== null && (
+        <div style={{ textAlign: 'center' }}>
+          <Button onClick={() => fetchVideos(nextCursor)} loading={loading}>
+            Load more
+          </Button>
+        </div>
+      )}
       <AddVideoModal open={isAddModalOpen} onClose={handleCloseModal} />
     </div>
   );